@@ -0,0 +1,280 @@
+"""Нагрузочный тест лент: WSGI (gunicorn, потоки) против ASGI (uvicorn).
+
+Оба сервера поднимаются на одной базе набора (``dataset.py``) с профилем
+``yatube.settings_production``; под ASGI ленты обслуживают асинхронные
+представления (``posts.async_views``). Клиенты — сопрограммы с сырыми
+HTTP-соединениями: часть запросов анонимные, часть — с сессией, часть
+клиентов медленные (отправляют запрос и читают ответ мелкими порциями
+с паузами, как мобильная сеть). Для каждого сервера печатаются запросы
+в секунду и задержки p50/p95/p99.
+
+    python benchmarks/asgi_load.py --size small --clients 64 --seconds 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import dataset
+from posts_views import DATA, prepare
+
+ROOT = Path(__file__).resolve().parent.parent
+HOST = '127.0.0.1'
+SERVERS = ('wsgi', 'asgi')
+# Доля медленных клиентов, размер их порции в байтах и пауза между ними.
+SLOW_SHARE = 0.25
+SLOW_CHUNK = 512
+SLOW_PAUSE = 0.01
+# Доля запросов с сессией и число пользователей, под которыми они идут.
+LOGIN_SHARE = 0.3
+LOGIN_USERS = 20
+STARTUP_SECONDS = 30
+WARMUP_SECONDS = 2
+
+
+def targets(seed):
+    """Адреса лент с перекосом к популярным авторам, сообществам и постам."""
+    from django.urls import reverse
+    from posts.models import Group, Post, User
+
+    rng = random.Random(seed)
+    usernames = list(User.objects.order_by('pk').values_list(
+        'username', flat=True
+    )[:200])
+    slugs = list(Group.objects.order_by('pk').values_list('slug', flat=True))
+    post_ids = list(Post.objects.order_by('pk').values_list(
+        'pk', flat=True
+    )[:2000])
+    urls = []
+    for _ in range(500):
+        urls.extend((
+            reverse('posts:index') + f'?page={dataset.skewed(rng, 3)}',
+            reverse('posts:group_list', args=[
+                slugs[dataset.skewed(rng, len(slugs)) - 1]
+            ]),
+            reverse('posts:profile', args=[
+                usernames[dataset.skewed(rng, len(usernames)) - 1]
+            ]),
+            reverse('posts:post_detail', args=[
+                post_ids[dataset.skewed(rng, len(post_ids)) - 1]
+            ]),
+        ))
+    return urls
+
+
+def login_cookies():
+    """Сессии первых пользователей: строки заголовка Cookie."""
+    from django.conf import settings
+    from django.test import Client
+    from posts.models import User
+
+    cookies = []
+    for user in User.objects.order_by('pk')[:LOGIN_USERS]:
+        client = Client()
+        client.force_login(user)
+        name = settings.SESSION_COOKIE_NAME
+        cookies.append(f'{name}={client.cookies[name].value}')
+    return cookies
+
+
+def forget_sessions(cookies):
+    from django.contrib.sessions.models import Session
+
+    Session.objects.filter(session_key__in=[
+        cookie.split('=', 1)[1] for cookie in cookies
+    ]).delete()
+
+
+async def fetch(port, path, cookie, slow):
+    """Один запрос в новом соединении: статус ответа."""
+    reader, writer = await asyncio.open_connection(HOST, port)
+    try:
+        head = f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\n'
+        if cookie:
+            head += f'Cookie: {cookie}\r\n'
+        data = (head + 'Connection: close\r\n\r\n').encode()
+        step = SLOW_CHUNK if slow else len(data)
+        for start in range(0, len(data), step):
+            writer.write(data[start:start + step])
+            await writer.drain()
+            if slow:
+                await asyncio.sleep(SLOW_PAUSE)
+        status = int((await reader.readline()).split()[1])
+        while await reader.read(SLOW_CHUNK if slow else 65536):
+            if slow:
+                await asyncio.sleep(SLOW_PAUSE)
+        return status
+    finally:
+        writer.close()
+
+
+async def client(number, port, urls, cookies, deadline, samples):
+    rng = random.Random(number)
+    slow = rng.random() < SLOW_SHARE
+    while time.monotonic() < deadline:
+        cookie = None
+        path = rng.choice(urls)
+        if rng.random() < LOGIN_SHARE:
+            cookie = rng.choice(cookies)
+            if rng.random() < 0.5:
+                path = '/follow/'
+        start = time.perf_counter()
+        try:
+            status = await fetch(port, path, cookie, slow)
+        except (OSError, IndexError, ValueError):
+            status = None
+        samples.append((status, time.perf_counter() - start))
+
+
+async def load(port, urls, cookies, clients, seconds):
+    samples = []
+    deadline = time.monotonic() + seconds
+    await asyncio.gather(*(
+        client(number, port, urls, cookies, deadline, samples)
+        for number in range(clients)
+    ))
+    return samples
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def summary(samples, seconds):
+    times = sorted(seconds for status, seconds in samples if status == 200)
+    if not times:
+        return {'rps': 0, 'errors': len(samples)}
+    return {
+        'rps': round(len(times) / seconds, 1),
+        'p50': round(percentile(times, 0.5), 6),
+        'p95': round(percentile(times, 0.95), 6),
+        'p99': round(percentile(times, 0.99), 6),
+        'errors': len(samples) - len(times),
+    }
+
+
+def command(server, port, workers, threads):
+    if server == 'wsgi':
+        return [
+            sys.executable, '-m', 'gunicorn', 'yatube.wsgi:application',
+            '--bind', f'{HOST}:{port}',
+            '--worker-class', 'gthread',
+            '--workers', str(workers),
+            '--threads', str(threads),
+            '--log-level', 'warning',
+        ]
+    return [
+        sys.executable, '-m', 'uvicorn', 'yatube.asgi:application',
+        '--host', HOST,
+        '--port', str(port),
+        '--workers', str(workers),
+        '--log-level', 'warning',
+        '--no-access-log',
+    ]
+
+
+def start(server, database, port, workers, threads):
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE='server_settings',
+        PYTHONPATH=os.pathsep.join(
+            (str(ROOT / 'benchmarks'), str(ROOT / 'yatube'))
+        ),
+        YATUBE_BENCH_DATABASE=database,
+    )
+    # Асинхронные ленты включает только yatube.asgi.
+    env.pop('YATUBE_ASYNC_VIEWS', None)
+    process = subprocess.Popen(
+        command(server, port, workers, threads),
+        cwd=ROOT / 'yatube',
+        env=env
+    )
+    deadline = time.monotonic() + STARTUP_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            if asyncio.run(fetch(port, '/', None, False)) == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    sys.exit(f'{server}: сервер не ответил за {STARTUP_SECONDS} с')
+
+
+def run(server, database, port, args, urls, cookies):
+    process = start(server, database, port, args.workers, args.threads)
+    try:
+        asyncio.run(load(port, urls, cookies, args.clients, WARMUP_SECONDS))
+        samples = asyncio.run(
+            load(port, urls, cookies, args.clients, args.seconds)
+        )
+    finally:
+        process.terminate()
+        process.wait()
+    result = summary(samples, args.seconds)
+    print(f'{server}: {result["rps"]:8.1f} запросов/с', *(
+        f'{name} {result[name] * 1000:7.1f} мс'
+        for name in ('p50', 'p95', 'p99') if name in result
+    ), f'ошибок {result["errors"]}')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', choices=dataset.SIZES, default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--database',
+        help='Файл базы набора; по умолчанию — в benchmarks/data/.'
+    )
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument(
+        '--threads',
+        type=int,
+        default=8,
+        help='Потоков на воркер gunicorn (WSGI).'
+    )
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--server', choices=SERVERS, nargs='+',
+                        default=SERVERS)
+    parser.add_argument('--output', help='Куда записать результаты JSON.')
+    args = parser.parse_args()
+    database = os.path.abspath(args.database or str(
+        DATA / f'posts-{args.size}-{args.seed}.sqlite3'
+    ))
+    DATA.mkdir(exist_ok=True)
+    prepare(args.size, args.seed, database)
+    from django.db import connections
+
+    urls = targets(args.seed)
+    cookies = login_cookies()
+    connections.close_all()
+    try:
+        results = {
+            server: run(server, database, args.port, args, urls, cookies)
+            for server in args.server
+        }
+    finally:
+        forget_sessions(cookies)
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            'meta': {
+                'size': args.size,
+                'seed': args.seed,
+                'clients': args.clients,
+                'seconds': args.seconds,
+                'workers': args.workers,
+                'threads': args.threads,
+            },
+            'servers': results,
+        }, indent=2, sort_keys=True) + '\n')
+
+
+if __name__ == '__main__':
+    main()
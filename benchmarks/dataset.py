@@ -0,0 +1,247 @@
+"""Детерминированный генератор больших наборов данных для бенчмарков.
+
+Строки вставляются пачками с заранее известными id и датами, без mixer
+и без сигналов ``bulk_created``: производные таблицы (счётчики, поисковый
+индекс, домашние ленты) затем один раз строятся штатными пересборками.
+Один и тот же ``--seed`` и размер дают одну и ту же базу, распределения
+перекошены (Ципф-подобно): у первых пользователей больше всего постов
+и подписчиков, у первых постов — комментариев, у первых сообществ — постов.
+
+    python benchmarks/dataset.py --size large --database /tmp/large.sqlite3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'yatube'))
+
+SIZES = {
+    'tiny': dict(
+        users=100, groups=5, posts=1_000, follows=1_000, comments=2_000,
+        timeline_users=None
+    ),
+    'small': dict(
+        users=1_000, groups=20, posts=20_000, follows=20_000,
+        comments=40_000, timeline_users=None
+    ),
+    'medium': dict(
+        users=10_000, groups=50, posts=100_000, follows=1_000_000,
+        comments=200_000, timeline_users=1_000
+    ),
+    'large': dict(
+        users=100_000, groups=100, posts=1_000_000, follows=10_000_000,
+        comments=2_000_000, timeline_users=1_000
+    ),
+}
+CHUNK_SIZE = 10_000
+SKEW = 3
+GROUP_SHARE = 0.7
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+VOCABULARY = (
+    'пост', 'новости', 'город', 'погода', 'котики', 'собака', 'работа',
+    'отпуск', 'море', 'горы', 'книга', 'фильм', 'музыка', 'концерт',
+    'футбол', 'хоккей', 'программирование', 'питон', 'джанго', 'база',
+    'данных', 'запрос', 'индекс', 'кеш', 'лента', 'подписка', 'друзья',
+    'семья', 'утро', 'вечер', 'кофе', 'чай', 'завтрак', 'ужин', 'рецепт',
+    'путешествие', 'поезд', 'самолёт', 'фотография', 'закат', 'рассвет',
+    'django', 'python', 'benchmark', 'cache', 'query', 'index',
+)
+# Первый пользователь — сотрудник: ему доступны все выгрузки.
+STAFF_USERNAME = 'user1'
+
+
+def setup(database):
+    """Настраивает Django на файл базы до первого обращения к ней."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = database
+    settings.DEBUG = False
+    django.setup()
+
+
+def skewed(rng, count):
+    """Номер от 1 до ``count``, малые номера выпадают чаще."""
+    return int(count * rng.random() ** SKEW) + 1
+
+
+def text(rng):
+    return ' '.join(
+        rng.choice(VOCABULARY) for _ in range(rng.randint(5, 30))
+    ).capitalize()
+
+
+@contextmanager
+def explicit_pub_date(*models):
+    """Отключает ``auto_now_add``, чтобы даты задавал генератор."""
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def insert(model, objs, log):
+    """Пачками вставляет строки мимо сигналов ``bulk_created``."""
+    start = time.monotonic()
+    total = 0
+    batch = []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) == CHUNK_SIZE:
+            model._base_manager.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    model._base_manager.bulk_create(batch)
+    total += len(batch)
+    log(f'{model._meta.model_name}: {total} за '
+        f'{time.monotonic() - start:.1f} с')
+    return total
+
+
+def users(size):
+    from posts.models import User
+
+    for pk in range(1, size['users'] + 1):
+        yield User(
+            pk=pk,
+            username=f'user{pk}',
+            password='!',
+            is_staff=pk == 1
+        )
+
+
+def groups(size):
+    from posts.models import Group
+
+    for pk in range(1, size['groups'] + 1):
+        yield Group(
+            pk=pk,
+            slug=f'group-{pk}',
+            title=f'Сообщество {pk}',
+            description=f'Описание сообщества {pk}'
+        )
+
+
+def posts(size, rng):
+    from posts.models import Post
+
+    for pk in range(1, size['posts'] + 1):
+        author_id = skewed(rng, size['users'])
+        group_id = None
+        if rng.random() < GROUP_SHARE:
+            group_id = skewed(rng, size['groups'])
+        # Снимок автора и сообщества (posts.snapshots) известен заранее.
+        yield Post(
+            pk=pk,
+            text=text(rng),
+            author_id=author_id,
+            author_username=f'user{author_id}',
+            group_id=group_id,
+            group_slug=f'group-{group_id}' if group_id else '',
+            group_title=f'Сообщество {group_id}' if group_id else '',
+            pub_date=START + timedelta(minutes=pk)
+        )
+
+
+def follows(size, rng):
+    from posts.models import Follow
+
+    count = size['users']
+    base, extra = divmod(size['follows'], count)
+    pk = 0
+    for user_id in range(1, count + 1):
+        wanted = min(base + (user_id <= extra), count - 1)
+        authors = set()
+        while len(authors) < wanted:
+            author_id = skewed(rng, count)
+            if author_id != user_id:
+                authors.add(author_id)
+        for author_id in sorted(authors):
+            pk += 1
+            yield Follow(pk=pk, user_id=user_id, author_id=author_id)
+
+
+def comments(size, rng):
+    from posts.models import Comment
+
+    for pk in range(1, size['comments'] + 1):
+        post_id = skewed(rng, size['posts'])
+        yield Comment(
+            pk=pk,
+            post_id=post_id,
+            author_id=rng.randint(1, size['users']),
+            text=text(rng),
+            pub_date=START + timedelta(minutes=post_id, seconds=pk % 59 + 1)
+        )
+
+
+def derive(size, log):
+    """Строит счётчики, поисковый индекс и ленты штатными средствами."""
+    from io import StringIO
+    from itertools import islice
+
+    from django.core.management import call_command
+    from posts import timeline
+    from posts.models import User
+    from posts.settings import TIMELINE_BATCH_SIZE
+
+    for command in ('recount_stats', 'rebuild_search_index'):
+        start = time.monotonic()
+        call_command(command, stdout=StringIO())
+        log(f'{command} за {time.monotonic() - start:.1f} с')
+    start = time.monotonic()
+    # Ленты всех пользователей большого набора заняли бы сотни миллионов
+    # строк: собираем их только первым timeline_users пользователям.
+    user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+    if size['timeline_users'] is not None:
+        user_ids = user_ids[:size['timeline_users']]
+    user_ids = user_ids.iterator()
+    for chunk in iter(lambda: list(islice(user_ids, TIMELINE_BATCH_SIZE)),
+                      []):
+        timeline.rebuild(chunk)
+    log(f'rebuild_timelines за {time.monotonic() - start:.1f} с')
+
+
+def generate(size_name, seed, log=print):
+    """Заполняет пустую (после migrate) базу набором ``size_name``."""
+    from django.core.management import call_command
+    from posts.models import Comment, Follow, Group, Post, User
+
+    size = SIZES[size_name]
+    rng = random.Random(seed)
+    call_command('migrate', verbosity=0)
+    counts = {'users': insert(User, users(size), log)}
+    counts['groups'] = insert(Group, groups(size), log)
+    with explicit_pub_date(Post, Comment):
+        counts['posts'] = insert(Post, posts(size, rng), log)
+        counts['follows'] = insert(Follow, follows(size, rng), log)
+        counts['comments'] = insert(Comment, comments(size, rng), log)
+    derive(size, log)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database', required=True)
+    args = parser.parse_args()
+    if os.path.exists(args.database):
+        parser.error(f'{args.database} уже существует')
+    setup(args.database)
+    generate(args.size, args.seed)
+
+
+if __name__ == '__main__':
+    main()
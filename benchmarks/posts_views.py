@@ -0,0 +1,351 @@
+"""Бенчмарк представлений posts: время и число SQL-запросов на большом наборе.
+
+Каждое представление из ``posts/urls.py`` покрыто сценарием. Сценарий
+выполняется ``--repeat`` раз «холодным» (кеш очищен) и сразу «тёплым»
+запросом; для обоих считаются число SQL-запросов, время в базе и полное
+время запроса, включая чтение потоковых ответов выгрузок. Запросы на
+запись откатываются, так что набор данных не меняется между прогонами.
+
+База строится генератором ``dataset.py`` один раз и переиспользуется
+(``benchmarks/data/``). Результаты пишутся в JSON с отсортированными
+ключами — их удобно сравнивать между коммитами:
+
+    python benchmarks/posts_views.py --size small --output before.json
+    python benchmarks/posts_views.py --size small --compare before.json
+
+При ``--compare`` код выхода 1 означает регрессию: больше SQL-запросов
+или медиана времени хуже на ``--threshold`` процентов.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from urllib.parse import urlencode
+
+import dataset
+
+DATA = Path(__file__).resolve().parent / 'data'
+# Сколько авторов из подсказок отмечено в сценарии follow_many.
+FOLLOW_MANY_AUTHORS = 10
+SEARCH_QUERY = 'кофе завтрак'
+# Разница меньше этой считается шумом при любом пороге в процентах.
+NOISE_SECONDS = 0.005
+
+
+class Scenario:
+    def __init__(self, name, url_name, args=(), method='get', data=None,
+                 login=False, query=None):
+        self.name = name
+        self.url_name = url_name
+        self.args = args
+        self.method = method
+        self.data = data
+        self.login = login
+        self.query = query
+
+    @property
+    def url(self):
+        from django.urls import reverse
+
+        url = reverse(f'posts:{self.url_name}', args=self.args)
+        if self.query:
+            url += '?' + urlencode(self.query)
+        return url
+
+
+def scenarios():
+    """Сценарии по целям, выбранным в сгенерированном наборе."""
+    from posts import popular
+    from posts.models import Follow, Group, Post, User
+    from posts.paginators import KeysetPaginator
+    from posts.settings import POSTS_PER_PAGE
+
+    staff = User.objects.get(username=dataset.STAFF_USERNAME)
+    followed = Follow.objects.filter(user=staff).select_related(
+        'author'
+    ).order_by('pk').first().author
+    strangers = list(User.objects.exclude(pk=staff.pk).exclude(
+        following__user=staff
+    ).order_by('pk').values_list('pk', flat=True)[:FOLLOW_MANY_AUTHORS])
+    stranger = User.objects.get(pk=strangers[0])
+    group = Group.objects.order_by('pk').first()
+    post = Post.objects.order_by('pk').first()
+    own_post = Post.objects.filter(author=staff).first()
+    paginator = KeysetPaginator(Post.objects.all(), POSTS_PER_PAGE)
+    paginator.get_page(1)
+    deep_page = paginator.num_pages // 2
+    # Рейтинг считает фоновая задача; без него страница была бы пустой.
+    popular.refresh()
+    return [
+        Scenario('index', 'index'),
+        Scenario('index_deep_page', 'index', query={'page': deep_page}),
+        Scenario(
+            'index_next_cursor',
+            'index',
+            query={'cursor': paginator.next_cursor}
+        ),
+        Scenario('index_authenticated', 'index', login=True),
+        Scenario('group_list', 'group_list', args=[group.slug]),
+        Scenario('profile', 'profile', args=[staff.username]),
+        Scenario('post_detail', 'post_detail', args=[post.pk]),
+        Scenario('post_comments', 'post_comments', args=[post.pk]),
+        Scenario('search', 'search', query={'q': SEARCH_QUERY}),
+        Scenario('popular', 'popular'),
+        Scenario('follow_index', 'follow_index', login=True),
+        Scenario('post_create', 'post_create', login=True),
+        Scenario(
+            'post_create_submit',
+            'post_create',
+            method='post',
+            data={'text': 'Пост из бенчмарка'},
+            login=True
+        ),
+        Scenario('post_edit', 'post_edit', args=[own_post.pk], login=True),
+        Scenario(
+            'post_edit_submit',
+            'post_edit',
+            args=[own_post.pk],
+            method='post',
+            data={'text': 'Отредактировано бенчмарком'},
+            login=True
+        ),
+        Scenario(
+            'add_comment',
+            'add_comment',
+            args=[post.pk],
+            method='post',
+            data={'text': 'Комментарий из бенчмарка'},
+            login=True
+        ),
+        Scenario(
+            'profile_follow',
+            'profile_follow',
+            args=[stranger.username],
+            login=True
+        ),
+        Scenario(
+            'follow_many',
+            'follow_many',
+            method='post',
+            data={'authors': strangers},
+            login=True
+        ),
+        Scenario(
+            'profile_unfollow',
+            'profile_unfollow',
+            args=[followed.username],
+            login=True
+        ),
+        Scenario(
+            'profile_export',
+            'profile_export',
+            args=[staff.username],
+            login=True
+        ),
+        Scenario('group_export', 'group_export', args=[group.slug],
+                 login=True),
+        Scenario('site_export', 'site_export', login=True),
+    ]
+
+
+def check_coverage(scenarios):
+    """Каждое представление posts должно иметь сценарий."""
+    from posts.urls import urlpatterns
+
+    missing = {pattern.name for pattern in urlpatterns} - {
+        scenario.url_name for scenario in scenarios
+    }
+    if missing:
+        sys.exit(f'Нет сценариев для: {", ".join(sorted(missing))}')
+
+
+def request(client, scenario):
+    """Один запрос: статус, время, число и время SQL-запросов."""
+    from core.metrics import RequestMetrics
+    from django.db import connections, transaction
+
+    metrics = RequestMetrics()
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+        # Запись откатывается: следующий прогон видит тот же набор данных.
+        stack.enter_context(transaction.atomic())
+        response = getattr(client, scenario.method)(
+            scenario.url, scenario.data
+        )
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        transaction.set_rollback(True)
+    return response.status_code, {
+        'seconds': time.perf_counter() - start,
+        'queries': metrics.queries,
+        'db_seconds': metrics.db_time,
+    }
+
+
+def summary(samples):
+    times = sorted(sample['seconds'] for sample in samples)
+    return {
+        'median': round(statistics.median(times), 6),
+        'min': round(times[0], 6),
+        'max': round(times[-1], 6),
+        'db_median': round(
+            statistics.median(sample['db_seconds'] for sample in samples), 6
+        ),
+        'queries': max(sample['queries'] for sample in samples),
+    }
+
+
+def run(scenarios, repeat):
+    from django.core.cache import cache
+    from django.test import Client
+    from posts.models import User
+
+    guest = Client()
+    user = Client()
+    user.force_login(User.objects.get(username=dataset.STAFF_USERNAME))
+    results = {}
+    for scenario in scenarios:
+        client = user if scenario.login else guest
+        # Прогрев: загрузка шаблонов и импорты не входят в замеры.
+        request(client, scenario)
+        cold, warm = [], []
+        for _ in range(repeat):
+            cache.clear()
+            status, sample = request(client, scenario)
+            cold.append(sample)
+            warm.append(request(client, scenario)[1])
+        result = results[scenario.name] = {
+            'url': scenario.url,
+            'method': scenario.method.upper(),
+            'status': status,
+            'cold': summary(cold),
+            'warm': summary(warm),
+        }
+        print(f'{scenario.name:<22} {status}', *(
+            f'{state} {result[state]["median"] * 1000:8.2f} мс '
+            f'{result[state]["queries"]:3} SQL'
+            for state in ('cold', 'warm')
+        ))
+    return results
+
+
+def regressions(before, after, threshold):
+    """Сценарии, ставшие медленнее или сделавшие больше запросов."""
+    found = []
+    for name, result in sorted(after['scenarios'].items()):
+        old = before['scenarios'].get(name)
+        if old is None:
+            continue
+        for state in ('cold', 'warm'):
+            was, now = old[state], result[state]
+            if now['queries'] > was['queries']:
+                found.append(
+                    f'{name} ({state}): SQL-запросов '
+                    f'{was["queries"]} → {now["queries"]}'
+                )
+            slower = now['median'] - was['median']
+            if (
+                slower > NOISE_SECONDS
+                and slower > was['median'] * threshold / 100
+            ):
+                found.append(
+                    f'{name} ({state}): медиана '
+                    f'{was["median"] * 1000:.2f} → '
+                    f'{now["median"] * 1000:.2f} мс'
+                )
+    return found
+
+
+def prepare(size, seed, database):
+    """Подключается к базе набора, при необходимости генерируя её."""
+    meta = Path(f'{database}.json')
+    if not meta.exists() and os.path.exists(database):
+        # Генерация была прервана: начинаем заново.
+        os.remove(database)
+    dataset.setup(database)
+    if meta.exists():
+        return json.loads(meta.read_text())
+    start = time.monotonic()
+    counts = dataset.generate(size, seed)
+    print(f'Набор {size} сгенерирован за {time.monotonic() - start:.1f} с')
+    meta.write_text(json.dumps(counts, indent=2, sort_keys=True))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', choices=dataset.SIZES, default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--database',
+        help='Файл базы набора; по умолчанию — в benchmarks/data/.'
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--only',
+        nargs='+',
+        metavar='SCENARIO',
+        help='Запустить только эти сценарии.'
+    )
+    parser.add_argument('--output', help='Куда записать результаты JSON.')
+    parser.add_argument('--compare', help='Результаты JSON для сравнения.')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=25,
+        help='Допустимое замедление медианы, в процентах.'
+    )
+    args = parser.parse_args()
+    database = args.database or str(
+        DATA / f'posts-{args.size}-{args.seed}.sqlite3'
+    )
+    DATA.mkdir(exist_ok=True)
+    # Число запросов бенчмарк сообщает сам: предупреждения о бюджетах
+    # (core.metrics) только засоряли бы вывод.
+    logging.getLogger('core.metrics').setLevel(logging.ERROR)
+    counts = prepare(args.size, args.seed, database)
+    selected = scenarios()
+    check_coverage(selected)
+    if args.only:
+        selected = [s for s in selected if s.name in args.only]
+    import django
+
+    results = {
+        'meta': {
+            'size': args.size,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'dataset': counts,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'cache': os.environ.get('YATUBE_CACHE', 'file'),
+        },
+        'scenarios': run(selected, args.repeat),
+    }
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps(results, indent=2, sort_keys=True, ensure_ascii=False)
+            + '\n'
+        )
+    if args.compare:
+        found = regressions(
+            json.loads(Path(args.compare).read_text()),
+            results,
+            args.threshold
+        )
+        for line in found:
+            print(f'РЕГРЕССИЯ {line}')
+        sys.exit(1 if found else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+"""Настройки серверов для ``asgi_load.py``: боевой профиль на базе набора."""
+import os
+
+from yatube.settings_production import *  # noqa: F401, F403
+from yatube.settings_production import DATABASES
+
+DEBUG = False
+
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        'NAME': os.environ['YATUBE_BENCH_DATABASE'],
+    },
+}
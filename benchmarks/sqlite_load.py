@@ -0,0 +1,145 @@
+"""Нагрузочный тест SQLite: смешанные чтение и запись из нескольких процессов.
+
+Сравнивает базовые настройки (``yatube.settings``) с профилем
+``yatube.settings_production``: каждый режим получает свежую базу
+во временном каталоге, одинаковые данные и одинаковый поток запросов —
+в основном чтение лент и постов, остальное — комментарии и подписки.
+
+    python benchmarks/sqlite_load.py --workers 8 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'yatube'))
+
+PROFILES = {
+    'baseline': 'yatube.settings',
+    'tuned': 'yatube.settings_production',
+}
+USERS = 50
+POSTS = 500
+WRITE_SHARE = 0.2
+
+
+def setup(profile, database):
+    """Настраивает Django на временную базу до первого обращения к ней."""
+    os.environ['DJANGO_SETTINGS_MODULE'] = PROFILES[profile]
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = database
+    settings.DEBUG = False
+    django.setup()
+
+
+def seed():
+    from django.core.management import call_command
+    from posts.models import Post, User
+
+    call_command('migrate', verbosity=0)
+    User.objects.bulk_create(
+        User(username=f'user{i}') for i in range(USERS)
+    )
+    users = list(User.objects.all())
+    Post.objects.bulk_create(
+        Post(text=f'Пост {i}', author=random.choice(users))
+        for i in range(POSTS)
+    )
+
+
+def worker(number, deadline, results):
+    from django.db import OperationalError, connections
+    from django.test import Client
+    from django.urls import reverse
+    from posts.models import Post, User
+
+    connections.close_all()
+    random.seed(number)
+    users = list(User.objects.values_list('username', flat=True))
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    me = users.pop(number % len(users))
+    client = Client(raise_request_exception=True)
+    client.force_login(User.objects.get(username=me))
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            if random.random() < WRITE_SHARE:
+                if random.random() < 0.5:
+                    client.post(
+                        reverse('posts:add_comment',
+                                args=[random.choice(post_ids)]),
+                        {'text': 'Нагрузочный комментарий'}
+                    )
+                else:
+                    username = random.choice(users)
+                    client.get(reverse('posts:profile_follow',
+                                       args=[username]))
+                    client.get(reverse('posts:profile_unfollow',
+                                       args=[username]))
+            else:
+                client.get(random.choice((
+                    reverse('posts:index'),
+                    reverse('posts:follow_index'),
+                    reverse('posts:profile', args=[random.choice(users)]),
+                    reverse('posts:post_detail',
+                            args=[random.choice(post_ids)]),
+                )))
+            done += 1
+        except OperationalError:
+            errors += 1
+    results.put((done, errors))
+
+
+def run(profile, workers, seconds):
+    with tempfile.TemporaryDirectory() as directory:
+        setup(profile, os.path.join(directory, 'load.sqlite3'))
+        seed()
+        from django.db import connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        deadline = time.monotonic() + seconds
+        processes = [
+            context.Process(target=worker, args=(i, deadline, results))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    done = sum(done for done, _ in totals)
+    errors = sum(errors for _, errors in totals)
+    return done / seconds, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--profile', choices=PROFILES)
+    args = parser.parse_args()
+    if args.profile:
+        rate, errors = run(args.profile, args.workers, args.seconds)
+        print(f'{args.profile}: {rate:.1f} запросов/с, '
+              f'ошибок блокировки: {errors}')
+        return
+    # Django настраивается один раз на процесс: каждый режим — отдельно.
+    for profile in PROFILES:
+        os.spawnv(os.P_WAIT, sys.executable, [
+            sys.executable, __file__,
+            '--profile', profile,
+            '--workers', str(args.workers),
+            '--seconds', str(args.seconds),
+        ])
+
+
+if __name__ == '__main__':
+    main()
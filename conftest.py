@@ -0,0 +1,10 @@
+import pytest
+from django.test.utils import override_settings
+
+
+@pytest.fixture(autouse=True, scope='session')
+def test_settings():
+    """Настройки тестового прогона те же, что у ``manage.py test``."""
+    from core.test_runner import TEST_SETTINGS
+    with override_settings(**TEST_SETTINGS):
+        yield
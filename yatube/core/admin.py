@@ -0,0 +1,21 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'args',
+        'attempts',
+        'failed',
+        'run_after',
+        'locked_until',
+    )
+    search_fields = ('name', 'key')
+    list_filter = ('failed', 'name')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,41 @@
+"""Синхронный код (ORM, кеш, шаблоны) в асинхронных представлениях.
+
+В Django 3.2 нет асинхронных ORM и кеша, поэтому асинхронные
+представления вызывают их через ``sync_to_async``. По умолчанию он
+выполняет всё в одном общем потоке, и независимые запросы идут друг
+за другом. ``parallel`` запускает функцию в потоке пула со своим
+соединением с базой — несколько вызовов под ``asyncio.gather`` идут
+одновременно. После вызова соединения потока закрываются по тем же
+правилам, что и в конце обычного запроса (``CONN_MAX_AGE``).
+
+При ``ASYNC_PARALLEL_QUERIES = False`` (в тестах: ``TestCase`` держит
+данные в транзакции своего соединения) вызовы идут через общий поток.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+def _closing(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return wrapper
+
+
+def parallel(func):
+    """Асинхронная версия ``func`` для одновременных вызовов."""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not settings.ASYNC_PARALLEL_QUERIES:
+            return await sync_to_async(func)(*args, **kwargs)
+        return await sync_to_async(
+            _closing(func),
+            thread_sensitive=False
+        )(*args, **kwargs)
+    return wrapper
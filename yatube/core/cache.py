@@ -0,0 +1,187 @@
+"""Двухуровневый кеш: LRU процесса перед общим хранилищем.
+
+Общий бэкенд (файлы, таблица в базе, Redis или Memcached) указывается
+алиасом в ``LOCATION``. Значения, прочитанные или записанные через этот
+процесс, остаются в ограниченном LRU на ``LOCAL_TIMEOUT`` секунд.
+
+Согласованность держится на версиях: ключи фрагментов и целых страниц
+содержат метки поколений (``posts.feed_cache``), поэтому значение под
+старым ключом в памяти других процессов просто перестаёт запрашиваться.
+Изменяемые ключи — сами метки и записи sorl-thumbnail — перечислены
+в ``SHARED_ONLY_PREFIXES`` и всегда читаются из общего хранилища.
+
+Попадания и промахи копятся в процессе и раз в ``STATS_FLUSH_EVERY``
+обращений складываются в общее хранилище (см. команду ``cache_stats``).
+"""
+import time
+from collections import Counter, OrderedDict
+from threading import Lock
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+STATS = ('local_hits', 'shared_hits', 'misses')
+STATS_KEY = 'tiered-cache-stats:{}'
+MISSING = object()
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location
+        self.local_max_entries = options.get('LOCAL_MAX_ENTRIES', 1000)
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 300)
+        self.shared_only = tuple(options.get('SHARED_ONLY_PREFIXES', ()))
+        self.stats_flush_every = options.get('STATS_FLUSH_EVERY', 100)
+        self._local = OrderedDict()
+        self._lock = Lock()
+        self._stats = Counter()
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self._remember(key, value, timeout, version)
+        return added
+
+    def get(self, key, default=None, version=None):
+        value = self._recall(key, version)
+        if value is not MISSING:
+            self._count('local_hits')
+            return value
+        value = self.shared.get(key, MISSING, version)
+        if value is MISSING:
+            self._count('misses')
+            return default
+        self._count('shared_hits')
+        self._remember(key, value, DEFAULT_TIMEOUT, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        for key in keys:
+            value = self._recall(key, version)
+            if value is not MISSING:
+                found[key] = value
+        self._count('local_hits', len(found))
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self.shared.get_many(missing, version)
+            for key, value in shared.items():
+                self._remember(key, value, DEFAULT_TIMEOUT, version)
+            self._count('shared_hits', len(shared))
+            self._count('misses', len(missing) - len(shared))
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self._remember(key, value, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        for key, value in data.items():
+            if key not in failed:
+                self._remember(key, value, timeout, version)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self._forget(key, version)
+        return self.shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._forget(key, version)
+        self.shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        return (
+            self._recall(key, version) is not MISSING
+            or self.shared.has_key(key, version)
+        )
+
+    def incr(self, key, delta=1, version=None):
+        self._forget(key, version)
+        return self.shared.incr(key, delta, version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.flush_stats()
+        self.shared.close(**kwargs)
+
+    def stats(self):
+        """Счётчики всех процессов вместе с ещё не сброшенными своими."""
+        self.flush_stats()
+        totals = self.shared.get_many(STATS_KEY.format(name) for name in STATS)
+        return {name: totals.get(STATS_KEY.format(name), 0) for name in STATS}
+
+    def flush_stats(self):
+        with self._lock:
+            pending, self._stats = self._stats, Counter()
+        for name, amount in pending.items():
+            if not amount:
+                continue
+            key = STATS_KEY.format(name)
+            self.shared.add(key, 0, timeout=None)
+            try:
+                self.shared.incr(key, amount)
+            except ValueError:
+                # Ключ вытеснен между add и incr: эти попадания теряются.
+                pass
+
+    def _local_key(self, key, version):
+        if self.local_max_entries <= 0 or key.startswith(self.shared_only):
+            return None
+        return self.make_key(key, version)
+
+    def _recall(self, key, version):
+        local_key = self._local_key(key, version)
+        if local_key is None:
+            return MISSING
+        with self._lock:
+            expires, value = self._local.get(local_key, (0, MISSING))
+            if expires < time.monotonic():
+                self._local.pop(local_key, None)
+                return MISSING
+            self._local.move_to_end(local_key)
+            return value
+
+    def _remember(self, key, value, timeout, version):
+        local_key = self._local_key(key, version)
+        if local_key is None:
+            return
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is not None and timeout <= time.time():
+            return
+        lifetime = self.local_timeout
+        if timeout is not None:
+            lifetime = min(lifetime, timeout - time.time())
+        with self._lock:
+            self._local[local_key] = (time.monotonic() + lifetime, value)
+            self._local.move_to_end(local_key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _forget(self, key, version):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            with self._lock:
+                self._local.pop(local_key, None)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+            flush = sum(self._stats.values()) >= self.stats_flush_every
+        if flush:
+            self.flush_stats()
@@ -0,0 +1,128 @@
+"""Чтение с реплик базы данных.
+
+``ReplicaMiddleware`` разрешает чтение с реплик только безопасным
+запросам (GET, HEAD) без метки закрепления. После запроса, который
+что-то записывает, ответ ставит метку ``REPLICA_PIN_COOKIE`` на
+``REPLICA_PIN_SECONDS``: пока реплики догоняют основную базу, следующие
+страницы (например, после редиректа с формы) читаются с неё же.
+Запись внутри GET-запроса закрепляет за основной базой остаток запроса.
+Вне запросов (команды, фоновые процессы) всё идёт в основную базу.
+
+``apply_sqlite_pragmas`` настраивает каждое новое соединение SQLite
+по ``SQLITE_PRAGMAS`` (см. профиль ``yatube.settings_production``).
+"""
+import asyncio
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD')
+CACHE_APP_LABEL = 'django_cache'
+
+_state = ContextVar('replica_state', default=None)
+
+
+class RequestState:
+    def __init__(self, replica_reads):
+        self.replica_reads = replica_reads
+        self.wrote = False
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            # Кеш в базе (DatabaseCache) должен видеть свежие записи.
+            model._meta.app_label == CACHE_APP_LABEL
+            or state is None
+            or not state.replica_reads
+            or not settings.DATABASE_REPLICAS
+        ):
+            return self._primary(**hints)
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        # Запись в кеш не меняет данные, которые читают с реплик.
+        if state is not None and model._meta.app_label != CACHE_APP_LABEL:
+            state.replica_reads = False
+            state.wrote = True
+        return self._primary(**hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def _primary(self, instance=None, **hints):
+        """Основная база для объектов, прочитанных с реплики.
+
+        Для остальных решает Django: база объекта или ``default``.
+        """
+        if instance is not None and (
+            instance._state.db in settings.DATABASE_REPLICAS
+        ):
+            return DEFAULT_DB_ALIAS
+        return None
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django узнаёт, что middleware можно вызывать асинхронно.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        state = self.state(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(request, state, response)
+
+    async def __acall__(self, request):
+        state = self.state(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(request, state, response)
+
+    @staticmethod
+    def state(request):
+        return RequestState(
+            request.method in SAFE_METHODS
+            and settings.REPLICA_PIN_COOKIE not in request.COOKIES
+        )
+
+    @staticmethod
+    def pin(request, state, response):
+        if state.wrote or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Обработчик ``connection_created``: PRAGMA из настроек для SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
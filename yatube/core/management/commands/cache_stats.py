@@ -0,0 +1,34 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cache import TieredCache
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает попадания и промахи двухуровневого кеша '
+        '(core.cache.TieredCache) по всем процессам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--alias',
+            default='default',
+            help='Алиас кеша из CACHES.'
+        )
+
+    def handle(self, *args, alias='default', **options):
+        cache = caches[alias]
+        if not isinstance(cache, TieredCache):
+            raise CommandError(
+                f'Кеш {alias} не TieredCache: статистика не собирается '
+                '(выберите общий профиль в YATUBE_CACHE).'
+            )
+        stats = cache.stats()
+        total = sum(stats.values())
+        hits = stats['local_hits'] + stats['shared_hits']
+        for name, value in stats.items():
+            self.stdout.write(f'{name}: {value}')
+        self.stdout.write(
+            f'hit_ratio: {hits / total:.3f}' if total else 'hit_ratio: -'
+        )
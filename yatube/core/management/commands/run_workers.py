@@ -0,0 +1,60 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.tasks import claim, execute
+
+
+class Command(BaseCommand):
+    help = (
+        'Пул процессов, выполняющий фоновые задачи из очереди в базе '
+        '(core.tasks): рассылку постов, индексацию, миниатюры.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.TASK_WORKERS,
+            help='Число процессов; 0 — выполнять в текущем процессе.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и выйти, не дожидаясь новых задач.'
+        )
+
+    def handle(self, *args, workers=None, once=False, **options):
+        if workers > 0:
+            # spawn: дочерним процессам не достаются открытые соединения.
+            pool = ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup
+            )
+            run = pool.map
+        else:
+            pool = None
+            run = map
+        done = failed = 0
+        try:
+            while True:
+                batch = claim(settings.TASK_BATCH_SIZE)
+                if batch:
+                    results = list(run(execute, batch))
+                    done += sum(results)
+                    failed += len(results) - sum(results)
+                elif once:
+                    break
+                else:
+                    time.sleep(settings.TASK_POLL_INTERVAL)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.stdout.write(f'Выполнено задач: {done}, с ошибкой: {failed}')
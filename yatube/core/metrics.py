@@ -0,0 +1,241 @@
+"""Метрики запросов: число и время SQL, время шаблонов, общее время.
+
+``MetricsMiddleware`` собирает их для каждого запроса и складывает
+в гистограммы с меткой ``view`` (``resolver_match.view_name``), которые
+``metrics_view`` отдаёт в текстовом формате Prometheus. Реестр живёт
+в памяти процесса: при нескольких воркерах Prometheus опрашивает каждый.
+
+SQL-запросы считает обёртка ``count_query``, которую ``install`` ставит
+каждому новому соединению: запрос относится к HTTP-запросу через
+``ContextVar``, поэтому учитываются и запросы асинхронных представлений
+из потоков ``sync_to_async``. Время шаблонов меряет бэкенд
+``TimedDjangoTemplates``. Бюджеты запросов
+задаются в ``QUERY_BUDGETS`` (``{'posts:index': 5}``): превышение пишется
+в лог, а при ``QUERY_BUDGETS_STRICT`` — поднимает
+``QueryBudgetExceeded``. Его включают для всего прогона тестов
+``core.test_runner.TEST_SETTINGS`` — и в ``manage.py test``, и в pytest.
+"""
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+UNMATCHED = 'unmatched'
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Представление сделало больше запросов, чем разрешено бюджетом."""
+
+
+class Histogram:
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series = {}
+        self._lock = Lock()
+
+    def observe(self, view, value):
+        with self._lock:
+            counts, total = self.series.get(
+                view, ([0] * (len(self.buckets) + 1), 0)
+            )
+            counts[bisect_left(self.buckets, value)] += 1
+            self.series[view] = (counts, total + value)
+
+    def exposition(self):
+        lines = [
+            f'# HELP {self.name} {self.help}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self._lock:
+            series = sorted(
+                (view, list(counts), total)
+                for view, (counts, total) in self.series.items()
+            )
+        for view, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{view="{view}",le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{self.name}_sum{{view="{view}"}} {total}')
+            lines.append(f'{self.name}_count{{view="{view}"}} {cumulative}')
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'yatube_request_duration_seconds',
+    'Время обработки запроса.',
+    DURATION_BUCKETS
+)
+DB_QUERIES = Histogram(
+    'yatube_db_queries',
+    'Число SQL-запросов на HTTP-запрос.',
+    QUERY_BUCKETS
+)
+DB_DURATION = Histogram(
+    'yatube_db_duration_seconds',
+    'Суммарное время SQL-запросов на HTTP-запрос.',
+    DURATION_BUCKETS
+)
+TEMPLATE_DURATION = Histogram(
+    'yatube_template_render_seconds',
+    'Время отрисовки шаблонов на HTTP-запрос.',
+    DURATION_BUCKETS
+)
+HISTOGRAMS = (REQUEST_DURATION, DB_QUERIES, DB_DURATION, TEMPLATE_DURATION)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        # Асинхронное представление может выполнять запросы параллельно.
+        self._lock = Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка ``execute_wrapper``: считает запрос и его время."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.db_time += time.perf_counter() - start
+                self.queries += 1
+
+
+def count_query(execute, sql, params, many, context):
+    """Постоянная обёртка соединений: считает запросы текущего запроса."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install(sender, connection, **kwargs):
+    """Обработчик ``connection_created``: подключает ``count_query``."""
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics = _current.get()
+            if metrics is not None:
+                metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд Django-шаблонов, замеряющий время отрисовки."""
+
+    def from_string(self, template_code):
+        template = super().from_string(template_code)
+        return TimedTemplate(template.template, self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+def check_budget(view, queries):
+    budget = settings.QUERY_BUDGETS.get(view)
+    if budget is None or queries <= budget:
+        return
+    message = f'{view}: {queries} SQL-запросов при бюджете {budget}'
+    if settings.QUERY_BUDGETS_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django узнаёт, что middleware можно вызывать асинхронно.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, metrics, start)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, metrics, start)
+        return response
+
+    @staticmethod
+    def record(request, metrics, start):
+        match = request.resolver_match
+        view = match.view_name if match else UNMATCHED
+        REQUEST_DURATION.observe(view, time.perf_counter() - start)
+        DB_QUERIES.observe(view, metrics.queries)
+        DB_DURATION.observe(view, metrics.db_time)
+        TEMPLATE_DURATION.observe(view, metrics.template_time)
+        check_budget(view, metrics.queries)
+
+
+def cache_lines():
+    stats = getattr(cache, 'stats', None)
+    if stats is None:
+        return []
+    lines = [
+        '# HELP yatube_cache_operations_total Обращения к кешу по итогу.',
+        '# TYPE yatube_cache_operations_total counter',
+    ]
+    for result, value in stats().items():
+        lines.append(
+            f'yatube_cache_operations_total{{result="{result}"}} {value}'
+        )
+    return lines
+
+
+def metrics_view(request):
+    """Метрики в формате Prometheus; доступны только с INTERNAL_IPS."""
+    if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        raise Http404
+    lines = [line for histogram in HISTOGRAMS
+             for line in histogram.exposition()]
+    lines.extend(cache_lines())
+    return HttpResponse(
+        '\n'.join(lines) + '\n',
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
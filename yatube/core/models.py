@@ -5,10 +5,73 @@ class CreatedModel(models.Model):
     """Абстрактная модель. Добавляет дату создания."""
     pub_date = models.DateTimeField(
         verbose_name='Дата создания',
-        auto_now_add=True,
-        db_index=True
+        auto_now_add=True
     )
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         abstract = True
+
+
+class Task(models.Model):
+    """Отложенный вызов функции для фоновых воркеров (см. core.tasks)."""
+    name = models.CharField(
+        max_length=200,
+        verbose_name='Функция'
+    )
+    args = models.JSONField(
+        default=list,
+        verbose_name='Аргументы'
+    )
+    # Одинаковые задачи, ещё ждущие в очереди, не дублируются; воркер
+    # снимает ключ, когда берёт задачу.
+    key = models.CharField(
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name='Ключ идемпотентности'
+    )
+    run_after = models.DateTimeField(
+        verbose_name='Не раньше'
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Занята воркером до'
+    )
+    claimed_by = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Воркер'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    failed = models.BooleanField(
+        default=False,
+        verbose_name='Попытки исчерпаны'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Поставлена'
+    )
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            models.Index(
+                fields=('run_after', 'id'),
+                condition=models.Q(failed=False),
+                name='task_due_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name}{tuple(self.args)}'
@@ -0,0 +1,126 @@
+"""Очередь фоновых задач в таблице базы данных.
+
+Представления и сигналы только ставят задачу (``enqueue``) в той же
+транзакции, что и сама запись, — задача появляется вместе с данными
+и пропадает при откате. Воркеры (команда ``run_workers``) забирают
+готовые задачи пачками: ``claim`` одним UPDATE помечает их своим
+токеном и арендой на ``TASK_LEASE`` секунд. Успешная задача удаляется,
+упавшая повторяется с растущей паузой до ``TASK_MAX_ATTEMPTS`` раз,
+а задачу умершего воркера после конца аренды заберёт другой.
+
+Доставка «хотя бы один раз»: задача может выполниться повторно, поэтому
+функции задач идемпотентны — читают текущее состояние по id, а не
+снимок из аргументов. Ключ ``key`` не даёт поставить вторую такую же
+задачу, пока первая ждёт; взятая воркером задача ключ освобождает,
+чтобы изменения во время её работы поставили новую.
+"""
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+
+def task(func):
+    """Помечает функцию как задачу: воркер вызывает только такие."""
+    func.is_task = True
+    return func
+
+
+def enqueue(func, *args, key=None, delay=0):
+    """Ставит ``func(*args)`` в очередь; аргументы — JSON-значения."""
+    enqueue_many(func, [(args, key)], delay=delay)
+
+
+def enqueue_many(func, calls, delay=0):
+    """Ставит пачку вызовов ``func`` одним INSERT: пары (аргументы, ключ)."""
+    if not getattr(func, 'is_task', False):
+        raise ValueError(f'{func.__qualname__} не помечена @task')
+    run_after = timezone.now() + timedelta(seconds=delay)
+    tasks = [
+        Task(
+            name=f'{func.__module__}.{func.__qualname__}',
+            args=list(args),
+            key=key,
+            run_after=run_after
+        )
+        for args, key in calls
+    ]
+    Task.objects.bulk_create(
+        tasks,
+        ignore_conflicts=any(task.key is not None for task in tasks)
+    )
+
+
+def claim(limit):
+    """Забирает до ``limit`` готовых задач; возвращает их id."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = Task.objects.filter(
+        Q(locked_until=None) | Q(locked_until__lt=now),
+        failed=False,
+        run_after__lte=now
+    )
+    Task.objects.filter(
+        pk__in=list(due.order_by('pk').values_list('pk', flat=True)[:limit])
+    ).filter(
+        # Повтор условия: задачу могли забрать между двумя запросами.
+        Q(locked_until=None) | Q(locked_until__lt=now)
+    ).update(
+        claimed_by=token,
+        locked_until=now + timedelta(seconds=settings.TASK_LEASE),
+        attempts=F('attempts') + 1,
+        key=None
+    )
+    return list(Task.objects.filter(
+        claimed_by=token
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def execute(task_id):
+    """Выполняет забранную задачу; возвращает, удалась ли она."""
+    entry = Task.objects.filter(pk=task_id).first()
+    if entry is None:
+        return False
+    try:
+        func = import_string(entry.name)
+        if not getattr(func, 'is_task', False):
+            raise ValueError(f'{entry.name} не помечена @task')
+        func(*entry.args)
+    except Exception:
+        logger.exception('Задача %s упала (попытка %s)', entry,
+                         entry.attempts)
+        failed = entry.attempts >= settings.TASK_MAX_ATTEMPTS
+        Task.objects.filter(pk=task_id).update(
+            failed=failed,
+            locked_until=None,
+            error=traceback.format_exc(),
+            run_after=timezone.now() + timedelta(
+                seconds=settings.TASK_RETRY_DELAY * 2 ** (entry.attempts - 1)
+            )
+        )
+        return False
+    Task.objects.filter(pk=task_id).delete()
+    return True
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи в текущем процессе, пока они есть.
+
+    Возвращает число успешных. Задачи, поставленные по ходу, тоже
+    выполняются; упавшие ждут повтора и в этот прогон не попадают.
+    """
+    done = 0
+    while True:
+        batch = claim(limit or settings.TASK_BATCH_SIZE)
+        if not batch:
+            return done
+        done += sum(map(execute, batch))
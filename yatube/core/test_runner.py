@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from yatube.cache_profiles import caches_for
+
+# Настройки любого прогона тестов — и ``manage.py test``, и pytest
+# (``conftest.py`` в корне репозитория). Кеш в памяти процесса: общий
+# файловый кеш пережил бы прогон и подмешал данные прошлого. Превышение
+# бюджета запросов — ошибка.
+TEST_SETTINGS = {
+    'CACHES': caches_for('locmem', settings.BASE_DIR),
+    'QUERY_BUDGETS_STRICT': True,
+}
+
+
+class StrictBudgetRunner(DiscoverRunner):
+    """Прогон тестов, в котором превышение бюджета запросов — ошибка."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(**TEST_SETTINGS)
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,9 +1,22 @@
 from django.contrib import admin
 
+from . import search
 from .models import Comment, Follow, Group, Post
 
 
-class PostAdmin(admin.ModelAdmin):
+class IndexSearchMixin:
+    """Поиск в админке по обратному индексу вместо LIKE '%слово%'."""
+    search_comments = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=search.matching_ids(
+            search_term, comments=self.search_comments
+        )), False
+
+
+class PostAdmin(IndexSearchMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -28,7 +41,7 @@ class GroupAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexSearchMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -37,6 +50,7 @@ class CommentAdmin(admin.ModelAdmin):
         'pub_date',
     )
     search_fields = ('text',)
+    search_comments = True
     list_filter = ('pub_date', 'author')
     empty_value_display = '-пусто-'
 
@@ -0,0 +1,166 @@
+"""Асинхронные версии лент для запуска под ASGI (``yatube.asgi``).
+
+Представления те же, что в ``views``, но независимые запросы идут
+одновременно (``core.aio.parallel`` + ``asyncio.gather``): в профиле —
+автор, подписка и страница постов, в посте — сам пост и первая страница
+комментариев, в ленте подписок — метка ленты и подсказки «кого
+почитать». Страницы главной, сообщества и подписок, как и в ``views``,
+не выбираются вовсе, если фрагмент ленты уже в кеше. Пока ждёт база,
+цикл событий обслуживает другие соединения, так что медленные клиенты не
+занимают рабочие потоки. Маршруты подменяет ``urls_async``.
+"""
+import asyncio
+
+from core.aio import parallel
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+
+from . import feed_cache, groups, stats, suggestions, thumbnails, timeline
+from .forms import CommentForm
+from .models import Follow, Post, User, UserStats
+from .settings import FEED_CACHE_TIMEOUT
+from .views import (comments_page, follow_page, group_page, group_scopes,
+                    feed_page, index_scopes, post_scopes, posts_page,
+                    profile_scopes)
+
+render_async = parallel(render)
+
+
+def authenticated(request):
+    return request.user.is_authenticated
+
+
+def is_following(user, username):
+    return (
+        user.is_authenticated
+        and user.username != username
+        and Follow.objects.filter(
+            user=user,
+            author__username=username
+        ).exists()
+    )
+
+
+def profile_author(username):
+    author = User.objects.select_related('stats').filter(
+        username=username
+    ).first()
+    return (None, None) if author is None else (author, stats.for_user(author))
+
+
+def detail_post(post_id):
+    post = Post.objects.select_related(
+        'author__stats', 'group'
+    ).filter(id=post_id).first()
+    if post is None:
+        return None, None
+    thumbnails.resolve([post])
+    return post, stats.for_user(post.author)
+
+
+def profile_page(request, username):
+    """Страница постов автора с числом постов из его счётчика.
+
+    Счётчик читается до выборки: иначе ``has_next`` посчитал бы COUNT(*)
+    раньше, чем представление узнает его из статистики автора.
+    """
+    author_id, posts_count = UserStats.objects.filter(
+        user__username=username
+    ).values_list('user_id', 'posts_count').first() or (None, None)
+    if author_id is None:
+        # Статистики ещё нет: автора ищем подзапросом, число — COUNT(*).
+        posts = Post.objects.filter(author_id__in=User.objects.filter(
+            username=username
+        ).values('pk'))
+    else:
+        posts = Post.objects.filter(author_id=author_id)
+    return posts_page(request, posts.for_feed(), count=posts_count)
+
+
+def follow_version(user):
+    return feed_cache.version_key(*timeline.feed_scopes(user))
+
+
+@feed_cache.cache_anonymous_page(index_scopes)
+async def index(request):
+    version = await parallel(feed_cache.version_key)('global')
+    return await render_async(request, 'posts/index.html', {
+        'page_obj': await parallel(feed_page)(
+            request,
+            ('index_page', version),
+            posts_page, request, Post.objects.for_feed()
+        ),
+        'feed_version': version,
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
+    })
+
+
+@feed_cache.cache_anonymous_page(group_scopes)
+async def group_posts(request, slug):
+    group = await parallel(groups.by_slug)(slug)
+    if group is None:
+        raise Http404
+    version = await parallel(feed_cache.version_key)(f'group:{group.pk}')
+    return await render_async(request, 'posts/group_list.html', {
+        'group': group,
+        'page_obj': await parallel(feed_page)(
+            request,
+            ('group_page', group.pk, version),
+            group_page, request, group
+        ),
+        'feed_version': version,
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
+    })
+
+
+@feed_cache.cache_anonymous_page(profile_scopes)
+async def profile(request, username):
+    (author, author_stats), following, page = await asyncio.gather(
+        parallel(profile_author)(username),
+        parallel(is_following)(request.user, username),
+        parallel(profile_page)(request, username),
+    )
+    if author is None:
+        raise Http404
+    return await render_async(request, 'posts/profile.html', {
+        'page_obj': page,
+        'author': author,
+        'stats': author_stats,
+        'following': following,
+    })
+
+
+@feed_cache.cache_anonymous_page(post_scopes)
+async def post_detail(request, post_id):
+    (post, author_stats), comments = await asyncio.gather(
+        parallel(detail_post)(post_id),
+        parallel(comments_page)(request, post_id),
+    )
+    if post is None:
+        raise Http404
+    return await render_async(request, 'posts/post_detail.html', {
+        'post': post,
+        'stats': author_stats,
+        'comments': comments,
+        'form': CommentForm(),
+    })
+
+
+async def follow_index(request):
+    if not await parallel(authenticated)(request):
+        return redirect_to_login(request.get_full_path())
+    version, suggested = await asyncio.gather(
+        parallel(follow_version)(request.user),
+        parallel(suggestions.for_user)(request.user),
+    )
+    return await render_async(request, 'posts/follow.html', {
+        'page_obj': await parallel(feed_page)(
+            request,
+            ('follow_page', request.user.pk, version),
+            follow_page, request, request.user
+        ),
+        'feed_version': version,
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
+        'suggestions': suggested,
+    })
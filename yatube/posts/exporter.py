@@ -0,0 +1,96 @@
+"""Потоковая выгрузка постов и комментариев в JSON Lines или CSV.
+
+Строки читаются из базы курсором пачками по ``EXPORT_CHUNK_SIZE``
+(``iterator(chunk_size=...)``) и сразу отдаются генератором, поэтому
+память не растёт с числом постов. Записи постов совместимы
+с ``import_posts``; комментарии идут после постов с типом ``comment``
+и ссылкой на пост, и импорт их пропускает.
+"""
+import csv
+import json
+
+from .models import Comment, Post
+from .settings import EXPORT_CHUNK_SIZE
+
+FIELDS = ('type', 'id', 'post', 'author', 'group', 'pub_date', 'text',
+          'image')
+POST_COLUMNS = ('pk', 'author__username', 'group__slug', 'pub_date', 'text',
+                'image')
+COMMENT_COLUMNS = ('pk', 'post_id', 'author__username', 'pub_date', 'text')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def querysets(author=None, group=None):
+    """Посты и комментарии профиля, сообщества или всего сайта."""
+    posts = Post.objects.all()
+    comments = Comment.objects.all()
+    if author is not None:
+        posts = posts.filter(author=author)
+        comments = comments.filter(author=author)
+    if group is not None:
+        posts = posts.filter(group=group)
+        comments = comments.filter(post__group=group)
+    return posts.order_by('pk'), comments.order_by('pk')
+
+
+def records(author=None, group=None):
+    posts, comments = querysets(author=author, group=group)
+    for pk, username, slug, pub_date, text, image in posts.values_list(
+        *POST_COLUMNS
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'type': 'post',
+            'id': pk,
+            'post': None,
+            'author': username,
+            'group': slug,
+            'pub_date': pub_date.isoformat(),
+            'text': text,
+            'image': image,
+        }
+    for pk, post_id, username, pub_date, text in comments.values_list(
+        *COMMENT_COLUMNS
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'type': 'comment',
+            'id': pk,
+            'post': post_id,
+            'author': username,
+            'group': None,
+            'pub_date': pub_date.isoformat(),
+            'text': text,
+            'image': None,
+        }
+
+
+def write_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Псевдофайл для csv.writer: строка возвращается, а не пишется."""
+
+    def write(self, value):
+        return value
+
+
+def write_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in FIELDS])
+
+
+WRITERS = {
+    'jsonl': write_jsonl,
+    'csv': write_csv,
+}
+
+
+def export(format='jsonl', author=None, group=None):
+    """Генератор строк выгрузки в формате ``format``."""
+    return WRITERS[format](records(author=author, group=group))
@@ -0,0 +1,170 @@
+"""Поколения лент для ключей кеша фрагментов.
+
+Каждая область данных — вся лента (``global``), сообщество
+(``group:<id>``), автор (``author:<id>``), лента подписок пользователя
+(``user:<id>``) и пост (``post:<id>``) — хранит в кеше метку своего
+последнего изменения. Метки входят в ключи фрагментов, поэтому фрагменты
+живут долго, а устаревают не по таймеру, а когда сигналы ``Post``,
+``Comment`` и ``Follow`` ставят области новую метку.
+"""
+import asyncio
+import hashlib
+import time
+from functools import wraps
+
+from core.aio import parallel
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from . import timeline
+from .settings import FEED_CACHE_TIMEOUT
+
+KEY = 'feed-version:{}'
+PAGE_KEY = 'anonymous-page:{}'
+
+
+def _token():
+    return repr(time.time())
+
+
+def versions(*scopes):
+    """Текущие метки областей; отсутствующие в кеше создаются заново."""
+    keys = [KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: _token() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def version_key(*scopes):
+    return '.'.join(versions(*scopes))
+
+
+def bump(*scopes):
+    """Ставит областям новую метку сразу и ещё раз после фиксации.
+
+    Одной метки до фиксации мало: параллельный запрос успел бы
+    закешировать под ней ещё старые данные. Одной после фиксации тоже:
+    откаченная транзакция (например, в тестах) оставила бы кеш прежним.
+    """
+    def stamp():
+        token = _token()
+        cache.set_many(
+            {KEY.format(scope): token for scope in scopes},
+            timeout=None
+        )
+
+    stamp()
+    transaction.on_commit(stamp)
+
+
+def fragment_cached(name, *vary_on):
+    """Лежит ли в кеше фрагмент ``{% cache … name vary_on %}``."""
+    return make_template_fragment_key(name, vary_on) in cache
+
+
+def post_scopes(posts):
+    """Области лент, где показываются эти посты."""
+    author_ids = {post.author_id for post in posts}
+    group_ids = {post.group_id for post in posts} | {
+        getattr(post, 'loaded_group_id', None) for post in posts
+    }
+    return (
+        'global',
+        *(f'post:{post.pk}' for post in posts),
+        *(f'author:{pk}' for pk in author_ids),
+        *(f'group:{pk}' for pk in group_ids if pk is not None),
+        *(f'user:{pk}' for pk in timeline.followers_of(author_ids)),
+    )
+
+
+def _lookup(request, get_scopes, args, kwargs):
+    """Ключ страницы и готовый ответ: 304 или страница из кеша.
+
+    ``None``, если страницу не кешируем.
+    """
+    if (
+        request.method not in ('GET', 'HEAD')
+        or request.user.is_authenticated
+    ):
+        return None
+    scopes = get_scopes(*args, **kwargs)
+    if scopes is None:
+        return None
+    stamps = versions(*scopes)
+    digest = hashlib.md5(
+        '|'.join([request.get_full_path(), *stamps]).encode()
+    ).hexdigest()
+    etag = quote_etag(digest)
+    last_modified = int(max(float(stamp) for stamp in stamps))
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified
+    )
+    if response is None:
+        response = cache.get(PAGE_KEY.format(digest))
+    return (digest, etag, last_modified), response
+
+
+def _store(key, response, cached):
+    """Кладёт новую страницу в кеш и ставит заголовки проверки."""
+    digest, etag, last_modified = key
+    if not cached:
+        if response.status_code != 200:
+            return response
+        cache.set(PAGE_KEY.format(digest), response, FEED_CACHE_TIMEOUT)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, max_age=0)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def cache_anonymous_page(get_scopes):
+    """Кеширует страницу целиком для анонимных посетителей.
+
+    ``get_scopes`` получает аргументы представления и возвращает области,
+    от которых зависит страница (или ``None``, если кешировать нечего).
+    Ключ и ETag строятся из адреса и меток областей, Last-Modified — из
+    самой свежей метки, так что повторный запрос браузера получает 304.
+    Авторизованным пользователям страница отдаётся без кеша: у них
+    другие шапка и форма комментария. Подходит и для асинхронных
+    представлений.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            return _async_decorator(view, get_scopes)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            found = _lookup(request, get_scopes, args, kwargs)
+            if found is None:
+                return view(request, *args, **kwargs)
+            key, response = found
+            cached = response is not None
+            if not cached:
+                response = view(request, *args, **kwargs)
+            return _store(key, response, cached)
+        return wrapper
+    return decorator
+
+
+def _async_decorator(view, get_scopes):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        found = await parallel(_lookup)(request, get_scopes, args, kwargs)
+        if found is None:
+            return await view(request, *args, **kwargs)
+        key, response = found
+        cached = response is not None
+        if not cached:
+            response = await view(request, *args, **kwargs)
+        return await parallel(_store)(key, response, cached)
+    return wrapper
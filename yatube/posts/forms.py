@@ -1,6 +1,6 @@
 from django import forms
 
-from .models import Comment, Post
+from .models import Comment, Post, User
 
 
 class PostForm(forms.ModelForm):
@@ -13,3 +13,10 @@ class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text', )
+
+
+class FollowManyForm(forms.Form):
+    authors = forms.ModelMultipleChoiceField(
+        queryset=User.objects.only('pk'),
+        label='Авторы'
+    )
@@ -0,0 +1,92 @@
+"""Горячий путь ленты сообщества: сообщество по метке и первая страница.
+
+Сообщество читается по ``slug`` из кеша; сигналы ``Group`` удаляют
+запись при сохранении и удалении — и под прежней меткой, если её
+сменили. Первая страница ленты каждого сообщества хранится готовым
+списком id постов (на один больше ``POSTS_PER_PAGE``: лишний говорит,
+есть ли следующая страница) вместе с числом постов. Создание,
+правка и удаление поста пересчитывают список его сообщества (и
+прежнего, если пост перенесли) после фиксации, так что первая страница
+выбирается одним ``IN`` по первичному ключу и без ``COUNT(*)``.
+
+Запись до фиксации только удаляется, а читатель кладёт пересчитанное
+через ``cache.add``: значение, прочитанное до чужой фиксации, не
+перезапишет свежее.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Group, Post
+from .settings import FEED_CACHE_TIMEOUT, POSTS_PER_PAGE
+
+GROUP_KEY = 'group-by-slug:{}'
+PAGE_KEY = 'group-page:{}'
+
+
+def _group_key(slug):
+    # Метка может быть не ASCII, а Memcached принимает только ASCII.
+    return GROUP_KEY.format(hashlib.md5(slug.encode()).hexdigest())
+
+
+def by_slug(slug):
+    """Сообщество по метке или ``None``."""
+    group = cache.get(_group_key(slug))
+    if group is None:
+        group = Group.objects.filter(slug=slug).first()
+        if group is not None:
+            cache.add(_group_key(slug), group, FEED_CACHE_TIMEOUT)
+    return group
+
+
+def group_changed(group):
+    keys = [_group_key(slug) for slug in {
+        group.slug, getattr(group, 'loaded_slug', group.slug)
+    }]
+
+    def forget():
+        cache.delete_many(keys)
+
+    forget()
+    transaction.on_commit(forget)
+
+
+def _compute(group_id):
+    posts = Post.objects.filter(group_id=group_id)
+    return {
+        'ids': list(posts.order_by('-pub_date', '-id').values_list(
+            'pk', flat=True
+        )[:POSTS_PER_PAGE + 1]),
+        'count': posts.count(),
+    }
+
+
+def first_page(group_id):
+    """id постов первой страницы и число постов сообщества."""
+    head = cache.get(PAGE_KEY.format(group_id))
+    if head is None:
+        head = _compute(group_id)
+        cache.add(PAGE_KEY.format(group_id), head, FEED_CACHE_TIMEOUT)
+    return head
+
+
+def refresh(group_ids):
+    cache.set_many(
+        {PAGE_KEY.format(pk): _compute(pk) for pk in group_ids},
+        FEED_CACHE_TIMEOUT
+    )
+
+
+def posts_changed(posts):
+    """Пересчитывает первые страницы сообществ этих постов."""
+    group_ids = {
+        pk
+        for post in posts
+        for pk in (post.group_id, getattr(post, 'loaded_group_id', None))
+        if pk is not None
+    }
+    if not group_ids:
+        return
+    cache.delete_many([PAGE_KEY.format(pk) for pk in group_ids])
+    transaction.on_commit(lambda: refresh(group_ids))
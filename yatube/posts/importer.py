@@ -0,0 +1,142 @@
+"""Массовый импорт постов из JSON Lines или CSV.
+
+Записи читаются потоком и вставляются пачками через ``bulk_create``:
+одна транзакция на пачку, а счётчики, ленты, поисковый индекс и кеши
+обновляются сигналом ``bulk_created`` один раз на пачку. Авторы и
+сообщества ищутся по словарям в памяти, изображения (пути в хранилище
+медиа) получают миниатюры фоновыми задачами (``run_workers``).
+
+Запись: ``text``, ``author`` (username), необязательные ``group`` (slug),
+``pub_date`` (ISO 8601) и ``image``. Выгрузка ``export_posts`` кладёт
+в тот же поток комментарии: записи с ``type`` не ``post`` пропускаются.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from .models import Group, Post, TimelineEntry, User
+from .settings import IMPORT_CHUNK_SIZE
+
+
+class InvalidRecord(ValueError):
+    """Запись импорта не удаётся превратить в пост."""
+
+
+def read_jsonl(lines):
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise InvalidRecord(f'Строка {number}: {error}')
+
+
+def read_csv(lines):
+    return csv.DictReader(lines)
+
+
+READERS = {
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+}
+
+
+def posts_only(records):
+    for record in records:
+        if (record.get('type') or 'post') == 'post':
+            yield record
+
+
+class Importer:
+    """Превращает записи в посты, запоминая найденных авторов и сообщества."""
+
+    def __init__(self, create_authors=False):
+        self.create_authors = create_authors
+        self.authors = {}
+        self.groups = {}
+
+    def resolve(self, records):
+        usernames = {record.get('author') for record in records} - set(
+            self.authors
+        ) - {None, ''}
+        slugs = {record.get('group') for record in records} - set(
+            self.groups
+        ) - {None, ''}
+        if usernames:
+            self.authors.update(
+                User.objects.in_bulk(usernames, field_name='username')
+            )
+            missing = usernames - set(self.authors)
+            if missing and self.create_authors:
+                User.objects.bulk_create(
+                    User(username=username, password=make_password(None))
+                    for username in missing
+                )
+                self.authors.update(
+                    User.objects.in_bulk(missing, field_name='username')
+                )
+        if slugs:
+            self.groups.update(Group.objects.in_bulk(slugs, field_name='slug'))
+
+    def build(self, record):
+        author = self.authors.get(record.get('author'))
+        if author is None:
+            raise InvalidRecord(f'Нет автора: {record.get("author")!r}')
+        slug = record.get('group') or None
+        if slug is not None and slug not in self.groups:
+            raise InvalidRecord(f'Нет сообщества: {slug!r}')
+        pub_date = None
+        if record.get('pub_date'):
+            pub_date = parse_datetime(record['pub_date'])
+            if pub_date is None:
+                raise InvalidRecord(f'Неверная дата: {record["pub_date"]!r}')
+            if is_naive(pub_date):
+                pub_date = make_aware(pub_date)
+        image = record.get('image') or ''
+        post = Post(
+            text=record.get('text') or '',
+            author=author,
+            group=self.groups.get(slug),
+            image=image,
+            thumbnail_pending=bool(image)
+        )
+        return post, pub_date
+
+    @transaction.atomic
+    def save(self, records):
+        self.resolve(records)
+        built = [self.build(record) for record in records]
+        posts = Post.objects.bulk_create(post for post, _ in built)
+        # auto_now_add перезаписывает дату при вставке: возвращаем исходную.
+        dated = []
+        for post, pub_date in built:
+            if pub_date is not None:
+                post.pub_date = pub_date
+                dated.append(post)
+        if dated:
+            Post.objects.bulk_update(dated, ('pub_date',))
+            # Ленты подписчиков скопировали дату вставки ещё в bulk_created.
+            TimelineEntry.objects.filter(
+                post_id__in=[post.pk for post in dated]
+            ).update(pub_date=Subquery(
+                Post.objects.filter(pk=OuterRef('post_id')).values('pub_date')
+            ))
+        return posts
+
+
+def import_posts(records, chunk_size=IMPORT_CHUNK_SIZE,
+                 create_authors=False):
+    """Импортирует записи пачками по ``chunk_size``; возвращает их число."""
+    importer = Importer(create_authors=create_authors)
+    records = posts_only(records)
+    imported = 0
+    chunks = iter(lambda: list(islice(records, chunk_size)), [])
+    for chunk in chunks:
+        imported += len(importer.save(chunk))
+    return imported
@@ -0,0 +1,88 @@
+"""Хранилище ключей sorl-thumbnail с LRU процесса перед общим кешем.
+
+Записи о готовых миниатюрах не меняются, поэтому их можно держать
+в памяти процесса: повторные запросы не ходят ни в кеш, ни в базу.
+``get_many`` достаёт записи для целой страницы постов за один
+``cache.get_many`` и не больше чем за один запрос к базе.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import \
+    KVStore as CachedDBKVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .settings import THUMBNAIL_LRU_SIZE
+
+
+class KVStore(CachedDBKVStore):
+    def __init__(self):
+        super().__init__()
+        self._local = OrderedDict()
+        self._lock = Lock()
+
+    def get_many(self, image_files):
+        """Словарь ``key`` файла -> записанный ``ImageFile`` для найденных."""
+        keys = {add_prefix(image_file.key): image_file.key
+                for image_file in image_files}
+        values = {}
+        for key in keys:
+            value = self._recall(key)
+            if value is not None:
+                values[key] = value
+        missing = [key for key in keys if key not in values]
+        if missing:
+            values.update(self.cache.get_many(missing))
+            missing = [key for key in missing if key not in values]
+        if missing:
+            found = dict(KVStoreModel.objects.filter(
+                key__in=missing
+            ).values_list('key', 'value'))
+            self.cache.set_many(
+                {key: found.get(key, EMPTY_VALUE) for key in missing},
+                settings.THUMBNAIL_CACHE_TIMEOUT
+            )
+            values.update(found)
+        result = {}
+        for key, value in values.items():
+            if value == EMPTY_VALUE:
+                continue
+            self._remember(key, value)
+            result[keys[key]] = deserialize_image_file(value)
+        return result
+
+    def _get_raw(self, key):
+        value = self._recall(key)
+        if value is None:
+            value = super()._get_raw(key)
+            if value is not None:
+                self._remember(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self._remember(key, value)
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+
+    def _recall(self, key):
+        with self._lock:
+            value = self._local.get(key)
+            if value is not None:
+                self._local.move_to_end(key)
+            return value
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._local[key] = value
+            self._local.move_to_end(key)
+            while len(self._local) > THUMBNAIL_LRU_SIZE:
+                self._local.popitem(last=False)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет снимки автора и сообщества во всех постах '
+        '(после загрузки данных в обход модели).'
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Заполнено снимков: {snapshots.backfill()}')
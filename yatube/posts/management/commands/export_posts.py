@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporter import WRITERS, export
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты и комментарии автора, сообщества '
+        'или всего сайта в JSON Lines или CSV.'
+    )
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument('--author', help='Username автора.')
+        scope.add_argument('--group', help='Slug сообщества.')
+        parser.add_argument(
+            '--format',
+            choices=WRITERS,
+            default='jsonl',
+            help='Формат выгрузки.'
+        )
+
+    def handle(self, *args, author=None, group=None, format='jsonl',
+               **options):
+        filters = {}
+        try:
+            if author:
+                filters['author'] = User.objects.get(username=author)
+            if group:
+                filters['group'] = Group.objects.get(slug=group)
+        except (User.DoesNotExist, Group.DoesNotExist) as error:
+            raise CommandError(error)
+        for chunk in export(format, **filters):
+            self.stdout.write(chunk, ending='')
@@ -0,0 +1,56 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import READERS, InvalidRecord, import_posts
+from posts.settings import IMPORT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты из файла JSON Lines или CSV пачками '
+        '(перенос материалов из других блогов).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл с записями; «-» — стандартный ввод.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=READERS,
+            help='Формат файла; по умолчанию — по расширению.'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help='Сколько постов вставлять одной пачкой.'
+        )
+        parser.add_argument(
+            '--create-authors',
+            action='store_true',
+            help='Создавать отсутствующих авторов без пароля.'
+        )
+
+    def handle(self, *args, path, format=None, chunk_size=IMPORT_CHUNK_SIZE,
+               create_authors=False, **options):
+        if format is None:
+            format = 'csv' if path.endswith('.csv') else 'jsonl'
+        source = (
+            sys.stdin if path == '-'
+            else open(path, encoding='utf-8', newline='')
+        )
+        try:
+            imported = import_posts(
+                READERS[format](source),
+                chunk_size=chunk_size,
+                create_authors=create_authors
+            )
+        except InvalidRecord as error:
+            raise CommandError(error)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        self.stdout.write(f'Импортировано постов: {imported}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import popular
+from posts.settings import POPULAR_INTERVAL
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг популярных постов и ставит его периодический '
+        'пересчёт в очередь фоновых задач (run_workers).'
+    )
+
+    def handle(self, *args, **options):
+        ranked = popular.refresh()
+        popular.schedule(POPULAR_INTERVAL)
+        self.stdout.write(f'Постов в рейтинге: {len(ranked)}')
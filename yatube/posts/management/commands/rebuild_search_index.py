@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import SearchEntry
+from posts.search import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново строит поисковый индекс по всем постам и комментариям '
+        '(после загрузки данных или смены правил разбора слов).'
+    )
+
+    def handle(self, *args, **options):
+        rebuild()
+        self.stdout.write(f'Записей индекса: {SearchEntry.objects.count()}')
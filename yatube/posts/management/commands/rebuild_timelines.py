@@ -0,0 +1,33 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from posts.models import User
+from posts.settings import TIMELINE_BATCH_SIZE
+from posts.timeline import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново собирает домашние ленты подписчиков по таблице подписок '
+        '(после загрузки данных или смены FANOUT_FOLLOWERS_LIMIT).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help='Пользователи, чьи ленты пересобрать; по умолчанию — все.'
+        )
+
+    def handle(self, *args, usernames=(), **options):
+        users = User.objects.order_by('pk')
+        if usernames:
+            users = users.filter(username__in=usernames)
+        user_ids = users.values_list('pk', flat=True).iterator()
+        rebuilt = 0
+        chunks = iter(lambda: list(islice(user_ids, TIMELINE_BATCH_SIZE)), [])
+        for chunk in chunks:
+            rebuild(chunk)
+            rebuilt += len(chunk)
+        self.stdout.write(f'Пересобрано лент: {rebuilt}')
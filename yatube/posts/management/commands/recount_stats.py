@@ -0,0 +1,34 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from posts.models import User
+from posts.settings import STATS_CHUNK_SIZE
+from posts.stats import recount
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики постов, подписок, подписчиков и комментариев '
+        'пользователей и исправляет расхождения (например, после loaddata).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только показать количество расхождений, ничего не меняя.'
+        )
+
+    def handle(self, *args, check=False, **options):
+        user_ids = User.objects.order_by('pk').values_list(
+            'pk', flat=True
+        ).iterator()
+        drifted = 0
+        chunks = iter(lambda: list(islice(user_ids, STATS_CHUNK_SIZE)), [])
+        for chunk in chunks:
+            drifted += len(recount(chunk, dry_run=check))
+        self.stdout.write(
+            f'Расхождений: {drifted}'
+            if check else f'Исправлено записей: {drifted}'
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Follow
+from posts.suggestions import refresh
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает подсказки «кого почитать» пачками по таблице '
+        'подписок (запускается периодически, например из cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help='Пользователи, чьи подсказки пересчитать; по умолчанию — '
+                 'все, у кого есть подписки.'
+        )
+
+    def handle(self, *args, usernames=(), **options):
+        follows = Follow.objects.all()
+        if usernames:
+            follows = follows.filter(user__username__in=usernames)
+        user_ids = follows.order_by('user_id').values_list(
+            'user_id', flat=True
+        ).distinct()
+        refreshed = refresh(user_ids.iterator())
+        self.stdout.write(f'Пересчитано подсказок: {refreshed}')
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.4 on 2026-10-18 20:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('posts', '0018_ordering_by_pub_date_and_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='auth.user', verbose_name='Пользователь')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='Количество постов')),
+                ('follows_count', models.IntegerField(default=0, verbose_name='Количество подписок')),
+                ('followers_count', models.IntegerField(default=0, verbose_name='Количество подписчиков')),
+                ('comments_count', models.IntegerField(default=0, verbose_name='Количество комментариев')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+    ]
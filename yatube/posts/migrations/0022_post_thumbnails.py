@@ -0,0 +1,45 @@
+# Generated by Django 3.2.4 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+def queue_existing_images(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.exclude(image='').update(thumbnail_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_height',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Высота миниатюры'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_pending',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Миниатюра ждёт обработки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_url',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Адрес миниатюры'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_width',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Ширина миниатюры'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('thumbnail_pending', True)), fields=['id'], name='post_thumbnail_pending_idx'),
+        ),
+        migrations.RunPython(
+            queue_existing_images, migrations.RunPython.noop
+        ),
+    ]
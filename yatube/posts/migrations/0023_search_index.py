@@ -0,0 +1,83 @@
+# Generated by Django 3.2.4 on 2026-10-18 20:28
+
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.db import migrations, models
+import django.db.models.deletion
+import snowballstemmer
+
+# Копия токенизатора posts.search на момент миграции: код приложения
+# может измениться, а миграция должна давать тот же индекс.
+WORD = re.compile(r'\w{2,}')
+CYRILLIC = re.compile('[а-я]')
+RUSSIAN = snowballstemmer.stemmer('russian')
+ENGLISH = snowballstemmer.stemmer('english')
+TERM_LENGTH = 64
+
+
+@lru_cache(maxsize=100000)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    stemmer = RUSSIAN if CYRILLIC.search(word) else ENGLISH
+    return stemmer.stemWord(word)[:TERM_LENGTH]
+
+
+def terms(text):
+    return Counter(stem(word) for word in WORD.findall(text))
+
+
+def fill_search_index(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    Post = apps.get_model('posts', 'Post')
+    SearchEntry = apps.get_model('posts', 'SearchEntry')
+    posts = Post.objects.values_list('pk', 'text').iterator()
+    comments = Comment.objects.values_list('pk', 'post_id', 'text')
+    SearchEntry.objects.bulk_create(
+        (
+            SearchEntry(post_id=pk, term=term, count=count)
+            for pk, text in posts
+            for term, count in terms(text).items()
+        ),
+        batch_size=1000
+    )
+    SearchEntry.objects.bulk_create(
+        (
+            SearchEntry(
+                post_id=post_id, comment_id=pk, term=term, count=count
+            )
+            for pk, post_id, text in comments.iterator()
+            for term, count in terms(text).items()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_post_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='Сколько раз встречается')),
+                ('comment', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='posts.comment', verbose_name='Комментарий, если слово из него')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='posts.post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Запись поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchentry',
+            index=models.Index(fields=['term', 'post'], name='search_term_post_idx'),
+        ),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 3.2.4 on 2026-10-18 20:51
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Trim
+
+
+def fill_snapshots(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Group = apps.get_model('posts', 'Group')
+    author = User.objects.filter(pk=OuterRef('author_id'))
+    group = Group.objects.filter(pk=OuterRef('group_id'))
+    Post.objects.update(
+        author_username=Subquery(author.values('username')[:1]),
+        author_full_name=Subquery(author.annotate(
+            full_name=Trim(Concat('first_name', Value(' '), 'last_name'))
+        ).values('full_name')[:1]),
+        group_slug=Coalesce(Subquery(group.values('slug')[:1]), Value('')),
+        group_title=Coalesce(Subquery(group.values('title')[:1]), Value('')),
+    )
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0023_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='author_full_name',
+            field=models.CharField(blank=True, editable=False, max_length=301, verbose_name='Полное имя автора'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='author_username',
+            field=models.CharField(blank=True, editable=False, max_length=150, verbose_name='Имя пользователя автора'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='group_slug',
+            field=models.CharField(blank=True, editable=False, max_length=50, verbose_name='Короткая метка сообщества'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='group_title',
+            field=models.CharField(blank=True, editable=False, max_length=200, verbose_name='Название сообщества'),
+        ),
+        migrations.CreateModel(
+            name='SnapshotRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('requested', models.DateTimeField(auto_now=True, verbose_name='Когда запрошено обновление')),
+                ('author', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Переименованный автор')),
+                ('group', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.group', verbose_name='Переименованное сообщество')),
+            ],
+            options={
+                'verbose_name': 'Обновление снимков',
+                'verbose_name_plural': 'Обновления снимков',
+            },
+        ),
+        migrations.RunPython(fill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.4 on 2026-10-18 21:08
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def enqueue_thumbnails(apps, schema_editor):
+    """Миниатюры, ждавшие thumbnail_worker, переходят в очередь задач."""
+    Post = apps.get_model('posts', 'Post')
+    Task = apps.get_model('core', 'Task')
+    now = timezone.now()
+    pending = Post.objects.filter(thumbnail_pending=True).values_list(
+        'pk', flat=True
+    )
+    Task.objects.bulk_create(
+        (
+            Task(
+                name='posts.thumbnails.generate',
+                args=[pk],
+                key=f'thumbnail:{pk}',
+                run_after=now
+            )
+            for pk in pending.iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('posts', '0024_post_snapshots'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_thumbnail_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='follow',
+            name='timeline_pending',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Лента ждёт постов автора'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='timeline_pending',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Ждёт рассылки в ленты'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('timeline_pending', True)), fields=['author'], name='post_timeline_pending_idx'),
+        ),
+        migrations.RunPython(enqueue_thumbnails, migrations.RunPython.noop),
+    ]
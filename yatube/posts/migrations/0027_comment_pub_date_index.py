@@ -0,0 +1,17 @@
+# Generated by Django 3.2.4 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_timelineentry_pub_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['pub_date', 'post'], name='comment_pub_date_post_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.4 on 2026-10-18 21:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0027_comment_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_failed',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Изображение не читается'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 3.2.4 on 2026-10-18 21:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0028_post_thumbnail_failed'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='SnapshotRefresh',
+        ),
+    ]
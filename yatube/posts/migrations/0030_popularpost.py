@@ -0,0 +1,26 @@
+# Generated by Django 3.2.4 on 2026-10-18 22:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0029_delete_snapshotrefresh'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='posts.post', verbose_name='Пост')),
+                ('position', models.PositiveIntegerField(unique=True, verbose_name='Место в рейтинге')),
+            ],
+            options={
+                'verbose_name': 'Популярный пост',
+                'verbose_name_plural': 'Популярные посты',
+                'ordering': ('position',),
+            },
+        ),
+    ]
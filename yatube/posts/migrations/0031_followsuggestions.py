@@ -0,0 +1,27 @@
+# Generated by Django 3.2.4 on 2026-10-18 22:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('posts', '0030_popularpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowSuggestions',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='follow_suggestions', serialize=False, to='auth.user', verbose_name='Пользователь')),
+                ('author_ids', models.JSONField(default=list, verbose_name='id авторов по убыванию очков')),
+                ('refreshed', models.DateTimeField(verbose_name='Дата пересчёта')),
+            ],
+            options={
+                'verbose_name': 'Подсказки пользователя',
+                'verbose_name_plural': 'Подсказки пользователей',
+            },
+        ),
+    ]
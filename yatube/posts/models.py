@@ -1,9 +1,124 @@
 from core.models import CreatedModel
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import connections, models, transaction
+from django.dispatch import Signal
+
+from .settings import FEED_SNAPSHOTS
 
 User = get_user_model()
 
+# Отправляется после bulk_create: обычные post_save для пачки не приходят.
+bulk_created = Signal()
+
+
+class BulkCreateQuerySet(models.QuerySet):
+    """QuerySet, сообщающий подписчикам о массовом создании объектов."""
+
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(
+                objs,
+                batch_size=batch_size,
+                ignore_conflicts=ignore_conflicts
+            )
+            if objs and objs[0].pk is None and not ignore_conflicts:
+                self._fill_pks(objs)
+        if objs:
+            bulk_created.send(
+                sender=self.model,
+                objs=objs,
+                ignore_conflicts=ignore_conflicts
+            )
+        return objs
+
+    def _fill_pks(self, objs):
+        """Проставляет id после вставки там, где СУБД их не вернула.
+
+        SQLite держит блокировку записи до конца транзакции, поэтому
+        последние ``len(objs)`` id таблицы принадлежат только что
+        вставленным строкам и идут в том же порядке.
+        """
+        if connections[self.db].vendor != 'sqlite':
+            return
+        pks = self.model._base_manager.using(self.db).order_by(
+            '-pk'
+        ).values_list('pk', flat=True)[:len(objs)]
+        for obj, pk in zip(objs, reversed(pks)):
+            obj.pk = pk
+
+
+# Колонки пользователя, которые карточки постов и комментариев не показывают.
+UNUSED_AUTHOR_FIELDS = tuple(
+    f'author__{field}' for field in (
+        'password',
+        'last_login',
+        'is_superuser',
+        'email',
+        'is_staff',
+        'is_active',
+        'date_joined',
+    )
+)
+
+
+class PostQuerySet(BulkCreateQuerySet):
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
+        objs = list(objs)
+        self.model.fill_snapshots(objs)
+        return super().bulk_create(
+            objs,
+            batch_size=batch_size,
+            ignore_conflicts=ignore_conflicts
+        )
+
+    def for_feed(self):
+        """Посты для лент.
+
+        Карточкам хватает снимка автора и сообщества в самом посте, так что
+        лента читается из одной таблицы. Без ``FEED_SNAPSHOTS`` автор
+        и сообщество подтягиваются тем же запросом.
+        """
+        if FEED_SNAPSHOTS:
+            return self.all()
+        return self.select_related('author', 'group').defer(
+            *UNUSED_AUTHOR_FIELDS,
+            'group__description'
+        )
+
+
+class CommentQuerySet(BulkCreateQuerySet):
+    def for_thread(self):
+        """Комментарии вместе с авторами одним запросом."""
+        return self.select_related('author').defer(*UNUSED_AUTHOR_FIELDS)
+
+
+class FollowQuerySet(BulkCreateQuerySet):
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
+        objs = list(objs)
+        # Как у save(): посты автора добавит в ленту фоновая задача.
+        for follow in objs:
+            follow.timeline_pending = True
+        return super().bulk_create(
+            objs,
+            batch_size=batch_size,
+            ignore_conflicts=ignore_conflicts
+        )
+
+    def follow(self, user, author_ids):
+        """Подписывает пользователя на авторов одним INSERT.
+
+        Уже оформленные подписки пропускает уникальное ограничение
+        ``unique_follow`` (без предварительной проверки и гонки между
+        ней и вставкой), подписка на себя отбрасывается.
+        """
+        return self.bulk_create(
+            [
+                self.model(user_id=user.pk, author_id=author_id)
+                for author_id in sorted(set(author_ids) - {user.pk})
+            ],
+            ignore_conflicts=True
+        )
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -28,6 +143,13 @@ class Group(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        group = super().from_db(db, field_names, values)
+        # Прежняя метка: её запись в кеше (posts.groups) тоже устарела.
+        group.loaded_slug = group.__dict__.get('slug')
+        return group
+
 
 class Post(CreatedModel):
     text = models.TextField(
@@ -55,6 +177,69 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    # Миниатюру готовит фоновая задача (команда run_workers), пока её
+    # нет — шаблоны показывают заглушку.
+    thumbnail_url = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name='Адрес миниатюры'
+    )
+    thumbnail_width = models.PositiveIntegerField(
+        null=True,
+        editable=False,
+        verbose_name='Ширина миниатюры'
+    )
+    thumbnail_height = models.PositiveIntegerField(
+        null=True,
+        editable=False,
+        verbose_name='Высота миниатюры'
+    )
+    thumbnail_pending = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Миниатюра ждёт обработки'
+    )
+    # Изображение не удалось разобрать: миниатюры не будет, и шаблоны
+    # не показывают заглушку.
+    thumbnail_failed = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Изображение не читается'
+    )
+    # Пока рассылка в ленты подписчиков ждёт воркера, пост подмешивается
+    # в их ленты при чтении (см. posts.timeline).
+    timeline_pending = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Ждёт рассылки в ленты'
+    )
+    # Снимок автора и сообщества для карточек лент (см. posts.snapshots):
+    # пустое имя пользователя значит, что снимка ещё нет.
+    author_username = models.CharField(
+        max_length=150,
+        blank=True,
+        editable=False,
+        verbose_name='Имя пользователя автора'
+    )
+    author_full_name = models.CharField(
+        max_length=301,
+        blank=True,
+        editable=False,
+        verbose_name='Полное имя автора'
+    )
+    group_slug = models.CharField(
+        max_length=50,
+        blank=True,
+        editable=False,
+        verbose_name='Короткая метка сообщества'
+    )
+    group_title = models.CharField(
+        max_length=200,
+        blank=True,
+        editable=False,
+        verbose_name='Название сообщества'
+    )
     TEMPLATE_FIELDS = (
         'Краткое содержание поста: {text:.15}, '
         'Сообщество: {group}, '
@@ -62,9 +247,77 @@ class Post(CreatedModel):
         'Дата публикации поста: {pub_date}'
     )
 
+    objects = PostQuerySet.as_manager()
+
     class Meta(CreatedModel.Meta):
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Под каждую ленту: фильтр (если есть) и порядок CreatedModel.
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author',),
+                condition=models.Q(timeline_pending=True),
+                name='post_timeline_pending_idx'
+            ),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        post.loaded_author_id = post.__dict__.get('author_id')
+        # Сообщество до редактирования: его ленту тоже нужно сбросить.
+        post.loaded_group_id = post.__dict__.get('group_id')
+        # Прежнее изображение: при замене миниатюру нужно готовить заново.
+        post.loaded_image = post.__dict__.get('image')
+        return post
+
+    @classmethod
+    def fill_snapshots(cls, posts):
+        """Снимает автора и сообщество в посты, где снимок устарел.
+
+        Недостающих в памяти авторов и сообщества читает одним запросом
+        на модель.
+        """
+        authors = [post for post in posts if post.author_id and (
+            not post.author_username
+            or post.author_id != getattr(
+                post, 'loaded_author_id', post.author_id
+            )
+        )]
+        groups = [post for post in posts if (
+            post.group_id != getattr(post, 'loaded_group_id', post.group_id)
+            or bool(post.group_id) != bool(post.group_slug)
+        )]
+        users = User.objects.in_bulk({
+            post.author_id for post in authors
+            if not cls.author.is_cached(post)
+        })
+        found = Group.objects.in_bulk({
+            post.group_id for post in groups
+            if post.group_id and not cls.group.is_cached(post)
+        })
+        for post in authors:
+            author = users.get(post.author_id) or post.author
+            post.author_username = author.username
+            post.author_full_name = author.get_full_name()
+        for post in groups:
+            group = None
+            if post.group_id:
+                group = found.get(post.group_id) or post.group
+            post.group_slug = group.slug if group else ''
+            post.group_title = group.title if group else ''
 
     def __str__(self):
         return self.TEMPLATE_FIELDS.format(
@@ -93,9 +346,22 @@ class Comment(CreatedModel):
         help_text='Введите текст комментария'
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta(CreatedModel.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', '-pub_date', '-id'),
+                name='comment_post_pub_date_idx'
+            ),
+            # Окно свежих комментариев для рейтинга популярного.
+            models.Index(
+                fields=('pub_date', 'post'),
+                name='comment_pub_date_post_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:15]
@@ -114,7 +380,169 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор на которого подписались',
     )
+    # Посты автора ещё не добавлены в ленту подписчика (см. posts.timeline).
+    timeline_pending = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Лента ждёт постов автора'
+    )
+
+    objects = FollowQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow'
+            ),
+        )
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, поддерживаемые сигналами (см. posts.stats)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.IntegerField(
+        default=0,
+        verbose_name='Количество постов'
+    )
+    follows_count = models.IntegerField(
+        default=0,
+        verbose_name='Количество подписок'
+    )
+    followers_count = models.IntegerField(
+        default=0,
+        verbose_name='Количество подписчиков'
+    )
+    comments_count = models.IntegerField(
+        default=0,
+        verbose_name='Количество комментариев'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class TimelineEntry(models.Model):
+    """Пост в домашней ленте подписчика (fan-out при публикации)."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик, в ленту которого попал пост',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    # Копия даты поста: лента читается по индексу записей в нужном
+    # порядке, без выборки всех постов и сортировки.
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации поста'
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx'
+            ),
+        )
+
+
+class SearchEntry(models.Model):
+    """Основа слова в тексте поста или комментария (см. posts.search)."""
+    term = models.CharField(
+        max_length=64,
+        verbose_name='Основа слова'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_entries',
+        verbose_name='Пост',
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='search_entries',
+        verbose_name='Комментарий, если слово из него',
+    )
+    count = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Сколько раз встречается'
+    )
+
+    class Meta:
+        verbose_name = 'Запись поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+        indexes = (
+            models.Index(
+                fields=('term', 'post'),
+                name='search_term_post_idx'
+            ),
+        )
+
+
+class FollowSuggestions(models.Model):
+    """Подсказки «кого почитать» пользователя (см. posts.suggestions)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь',
+    )
+    author_ids = models.JSONField(
+        default=list,
+        verbose_name='id авторов по убыванию очков'
+    )
+    refreshed = models.DateTimeField(
+        verbose_name='Дата пересчёта'
+    )
+
+    class Meta:
+        verbose_name = 'Подсказки пользователя'
+        verbose_name_plural = 'Подсказки пользователей'
+
+
+class PopularPost(models.Model):
+    """Место поста в рейтинге популярных (см. posts.popular)."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='popularity',
+        verbose_name='Пост',
+    )
+    position = models.PositiveIntegerField(
+        unique=True,
+        verbose_name='Место в рейтинге'
+    )
+
+    class Meta:
+        ordering = ('position',)
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
@@ -0,0 +1,425 @@
+import base64
+import binascii
+import hashlib
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .settings import PAGE_WINDOW, PAGINATOR_COUNT_TIMEOUT
+
+COUNT_KEY = 'paginator-count:{}'
+
+
+class InvalidCursor(ValueError):
+    """Курсор повреждён или не подходит к паджинатору."""
+
+
+def load_cursor(cursor):
+    """Номер страницы, направление, значения ключей и пропуск из курсора."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        number, forward, values, *rest = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    skip = rest[0] if rest else 0
+    if (
+        not isinstance(number, int) or number < 1
+        or not isinstance(forward, bool)
+        or not isinstance(values, list)
+        or len(rest) > 1
+        or not isinstance(skip, int) or skip < 0
+    ):
+        raise InvalidCursor(cursor)
+    return number, forward, values, skip
+
+
+def requested_number(number=None, cursor=None):
+    """Номер запрошенной страницы по ``?page=`` и ``?cursor=`` без выборки."""
+    if cursor:
+        try:
+            return load_cursor(cursor)[0]
+        except InvalidCursor:
+            pass
+    try:
+        return max(int(number), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+class KeysetPaginator(Paginator):
+    """Паджинатор по ключу (seek-метод) вместо LIMIT/OFFSET.
+
+    Следующая и предыдущая страницы выбираются условием вида
+    ``(pub_date, id) < (значения курсора)``, поэтому стоимость запроса
+    не зависит от глубины страницы. Курсор хранит номер страницы, так что
+    шаблоны по-прежнему получают обычный ``Page``.
+
+    Ссылки на номера страниц тоже курсоры (``window_links``): ближние
+    страницы отсчитываются от краёв текущей и пропускают лишь страницы
+    окна между ними, первая и последняя — от краёв выборки. Через OFFSET
+    обслуживаются только старые закладки ``?page=N``.
+
+    Точный ``COUNT(*)`` на каждый запрос не нужен: число объектов берётся
+    из ``count`` (например, поддерживаемого счётчика) или из кеша на
+    ``PAGINATOR_COUNT_TIMEOUT`` секунд. Оценку поправляет сама выборка
+    страницы — она читает один лишний объект и знает, есть ли следующая,
+    а на последней странице узнаёт точное число.
+
+    ``first_ids`` — готовые id первой страницы (``per_page + 1``, как
+    в обычной выборке): тогда она читается одним ``IN`` по ключу.
+
+    ``merge`` — второй запрос с теми же ключами, подмешиваемый к выборке.
+    Из каждого запроса страница читает столько же объектов, сколько из
+    одного, и сливает их по ключу; повторы по id отбрасываются.
+    """
+    ELLIPSIS = Paginator.ELLIPSIS
+    INFINITY = '∞'
+
+    def __init__(self, object_list, per_page, keys=('pub_date', 'id'),
+                 count=None, first_ids=None, merge=None, **kwargs):
+        self.keys = keys
+        self.first_ids = first_ids
+        ordering = [f'-{key}' for key in keys]
+        self.merge = None if merge is None else merge.order_by(*ordering)
+        super().__init__(
+            object_list.order_by(*ordering),
+            per_page,
+            **kwargs
+        )
+        self.next_cursor = None
+        self.previous_cursor = None
+        self.number = 1
+        self._items = None
+        self.count_hint = count
+        # Что известно из прочитанных страниц: нижняя граница и точное
+        # число, если дошли до конца.
+        self._at_least = 0
+        self._exact_count = None
+        self._counted = False
+
+    @cached_property
+    def count(self):
+        if self._exact_count is not None:
+            return self._exact_count
+        return max(self._estimate(), self._at_least)
+
+    @property
+    def last_page(self):
+        """Номер последней страницы, если число объектов известно точно."""
+        num_pages = self.num_pages
+        if (
+            self._exact_count is not None
+            or self.count_hint is not None
+            or self._counted
+        ):
+            return num_pages
+        return None
+
+    @property
+    def window(self):
+        """Номера страниц вокруг текущей: ``1 … 47 48 49 … ∞``.
+
+        Если число объектов только оценено, далёкая последняя страница
+        показывается как ∞.
+        """
+        pages = list(self.get_elided_page_range(
+            self.number,
+            on_each_side=PAGE_WINDOW,
+            on_ends=1
+        ))
+        if (
+            self.last_page is None
+            and len(pages) > 1
+            and pages[-2] == self.ELLIPSIS
+        ):
+            pages[-1] = self.INFINITY
+        return pages
+
+    def _estimate(self):
+        if self.count_hint is not None:
+            return self.count_hint
+        if self.object_list.query.is_empty():
+            return 0
+        if not PAGINATOR_COUNT_TIMEOUT:
+            self._counted = True
+            return self._countable().count()
+        count = cache.get(self._count_key())
+        if count is None:
+            count = self._countable().count()
+            self._counted = True
+            cache.set(self._count_key(), count, PAGINATOR_COUNT_TIMEOUT)
+        return count
+
+    def _countable(self):
+        if self.merge is None:
+            return self.object_list
+        return self.object_list.order_by().values('pk').union(
+            self.merge.order_by().values('pk')
+        )
+
+    def _count_key(self):
+        return COUNT_KEY.format(
+            hashlib.md5(str(self._countable().query).encode()).hexdigest()
+        )
+
+    def _sources(self):
+        if self.merge is None:
+            return [self.object_list]
+        return [self.object_list, self.merge]
+
+    def _select(self, sources, start, stop, reverse=False):
+        """Объекты ``[start:stop]`` слияния запросов по ключу."""
+        if len(sources) == 1:
+            return list(sources[0][start:stop])
+        found = {
+            obj.pk: obj for queryset in sources for obj in queryset[:stop]
+        }
+        return sorted(
+            found.values(),
+            key=lambda obj: [getattr(obj, key) for key in self.keys],
+            reverse=not reverse
+        )[start:stop]
+
+    def _learn(self, at_least, exact=False):
+        """Уточняет число объектов по прочитанной странице."""
+        if exact:
+            self._exact_count = at_least
+            if (
+                PAGINATOR_COUNT_TIMEOUT
+                and self.count_hint is None
+                and not self.object_list.query.is_empty()
+            ):
+                cache.set(self._count_key(), at_least, PAGINATOR_COUNT_TIMEOUT)
+        self._at_least = max(self._at_least, at_least)
+        for name in ('count', 'num_pages'):
+            self.__dict__.pop(name, None)
+
+    def validate_number(self, number):
+        # Верхнюю границу проверяет сама выборка: число может быть оценкой.
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(number)
+        if number < 1:
+            raise EmptyPage(number)
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        if number == 1 and self.first_ids is not None:
+            items = list(self.object_list.filter(pk__in=self.first_ids))
+        else:
+            items = self._select(
+                self._sources(), bottom, bottom + self.per_page + 1
+            )
+        more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if not items and number > 1:
+            raise EmptyPage(number)
+        self._learn(bottom + len(items) + more, exact=not more)
+        self.number = number
+        return self._get_page(items, number, self)
+
+    def get_page(self, number=None, cursor=None):
+        if cursor:
+            try:
+                return self.cursor_page(cursor)
+            except InvalidCursor:
+                pass
+        try:
+            number = self.validate_number(number)
+        except (PageNotAnInteger, EmptyPage):
+            number = 1
+        try:
+            page = self.page(number)
+        except EmptyPage:
+            # За концом выборки: последняя страница по точному числу.
+            self._learn(self._countable().count(), exact=True)
+            page = self.page(self.num_pages)
+        self._set_cursors(page, page.number > 1, page.has_next())
+        return page
+
+    def cursor_page(self, cursor):
+        """Страница, начинающаяся сразу после (или перед) курсором.
+
+        Курсор без значений ключей отсчитывает от начала выборки (вперёд)
+        или от её конца (назад); ``skip`` объектов от курсора
+        пропускаются.
+        """
+        number, forward, values, skip = self.decode_cursor(cursor)
+        lookup = 'lt' if forward else 'gt'
+        try:
+            sources = [
+                queryset.filter(self._seek(values, lookup)) if values
+                else queryset
+                for queryset in self._sources()
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise InvalidCursor(cursor)
+        if not forward:
+            sources = [queryset.reverse() for queryset in sources]
+        tail = not forward and not values
+        size = self._tail_size(number) if tail else self.per_page
+        items = self._select(
+            sources, skip, skip + size + 1, reverse=not forward
+        )
+        more = len(items) > size
+        items = items[:size]
+        if not items:
+            return self.get_page(1)
+        if not forward:
+            items.reverse()
+        if forward:
+            self._learn(
+                (number - 1) * self.per_page + len(items) + more,
+                exact=not more
+            )
+        elif tail:
+            self._learn((number - 1) * self.per_page + len(items))
+        else:
+            self._learn(number * self.per_page + 1)
+        self.number = number
+        page = self._get_page(items, number, self)
+        if forward:
+            self._set_cursors(page, True, more)
+        else:
+            self._set_cursors(page, more, not tail)
+        return page
+
+    def _tail_size(self, number):
+        """Размер последней страницы ``number``: она может быть неполной."""
+        size = self.count - (number - 1) * self.per_page
+        return size if 0 < size <= self.per_page else self.per_page
+
+    def encode_cursor(self, number, forward, obj=None, skip=0):
+        values = [] if obj is None else [
+            str(getattr(obj, key)) for key in self.keys
+        ]
+        data = [number, forward, values] + ([skip] if skip else [])
+        raw = json.dumps(data).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        number, forward, values, skip = load_cursor(cursor)
+        if values and len(values) != len(self.keys):
+            raise InvalidCursor(cursor)
+        return number, forward, values, skip
+
+    def _seek(self, values, lookup):
+        """Условие «строго после» кортежа ключей в порядке сортировки."""
+        conditions = []
+        for index, key in enumerate(self.keys):
+            exact = dict(zip(self.keys[:index], values[:index]))
+            exact[f'{key}__{lookup}'] = values[index]
+            conditions.append(Q(**exact))
+        bound = Q(**{f'{self.keys[0]}__{lookup}e': values[0]})
+        return bound & reduce(or_, conditions)
+
+    def page_cursor(self, number):
+        """Курсор страницы ``number`` для ссылки из текущей страницы.
+
+        Первая и последняя страницы отсчитываются от краёв выборки,
+        остальные — от краёв текущей страницы.
+        """
+        items = self._items
+        if number == 1:
+            return self.encode_cursor(1, True)
+        if number == self.last_page:
+            return self.encode_cursor(number, False)
+        if not items or number == self.number:
+            return None
+        if number > self.number:
+            return self.encode_cursor(
+                number, True, items[-1],
+                (number - self.number - 1) * self.per_page
+            )
+        return self.encode_cursor(
+            number, False, items[0],
+            (self.number - number - 1) * self.per_page
+        )
+
+    @property
+    def first_cursor(self):
+        return self.page_cursor(1)
+
+    @property
+    def last_cursor(self):
+        return self.last_page and self.page_cursor(self.last_page)
+
+    @property
+    def window_links(self):
+        """Пары ``(номер, курсор)`` окна; у многоточий курсора нет."""
+        return [
+            (number, self.page_cursor(number) if isinstance(number, int)
+             else None)
+            for number in self.window
+        ]
+
+    def _set_cursors(self, page, has_previous, has_next):
+        items = page.object_list
+        self._items = items
+        if not items:
+            return
+        if has_previous:
+            self.previous_cursor = self.encode_cursor(
+                page.number - 1, False, items[0]
+            )
+        if has_next:
+            self.next_cursor = self.encode_cursor(
+                page.number + 1, True, items[-1]
+            )
+
+
+class RankedPaginator(Paginator):
+    """Паджинатор готового списка id (рейтинга) с объектами из ``queryset``.
+
+    Число объектов — длина списка, а страница выбирается одним ``IN``
+    в порядке списка. Курсоров нет: ссылки только на номера страниц,
+    и OFFSET здесь — срез списка id в памяти.
+    """
+    ELLIPSIS = Paginator.ELLIPSIS
+    INFINITY = KeysetPaginator.INFINITY
+    previous_cursor = next_cursor = None
+    first_cursor = last_cursor = None
+
+    def __init__(self, ids, queryset, per_page, **kwargs):
+        super().__init__(ids, per_page, **kwargs)
+        self.queryset = queryset
+        self.number = 1
+
+    @property
+    def last_page(self):
+        return self.num_pages
+
+    @property
+    def window(self):
+        return list(self.get_elided_page_range(
+            self.number,
+            on_each_side=PAGE_WINDOW,
+            on_ends=1
+        ))
+
+    def page_cursor(self, number):
+        return None
+
+    @property
+    def window_links(self):
+        return [(number, None) for number in self.window]
+
+    def _get_page(self, ids, number, paginator):
+        found = self.queryset.in_bulk(ids)
+        self.number = number
+        return super()._get_page(
+            [found[pk] for pk in ids if pk in found],
+            number,
+            paginator
+        )
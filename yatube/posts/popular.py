@@ -0,0 +1,111 @@
+"""Популярные посты: рейтинг по скорости комментариев и подписчикам автора.
+
+Скорость — число комментариев за окно, делённое на его длину, сложенное
+по окнам ``POPULAR_WINDOWS`` (часы): свежий комментарий попадает во все
+окна, а старый — только в длинные и весит меньше, то есть вклад
+затухает со временем. Скорость умножается на
+``1 + POPULAR_FOLLOWER_WEIGHT * log10(1 + подписчики автора)``.
+
+Рейтинг считает периодическая фоновая задача (``core.tasks``) двумя
+запросами на все посты сразу: комментарии за самое длинное окно,
+сгруппированные по посту, с условными COUNT по каждому окну, и число
+подписчиков авторов этих постов. Первые ``POPULAR_SIZE`` id ложатся
+в таблицу ``PopularPost`` — её видят все процессы, а не только воркер,
+посчитавший рейтинг, — и страница ``posts:popular`` читает id оттуда
+и выбирает посты одним ``IN``. Задача ставит следующий запуск через
+``POPULAR_INTERVAL`` секунд; первый ставит команда ``rank_popular`` или
+страница, не нашедшая рейтинга.
+"""
+import heapq
+import math
+from datetime import timedelta
+
+from core.tasks import enqueue, task
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from . import feed_cache
+from .models import Comment, PopularPost, Post
+from .settings import (POPULAR_FOLLOWER_WEIGHT, POPULAR_INTERVAL,
+                       POPULAR_SIZE, POPULAR_WINDOWS)
+
+
+def _comment_counts(since):
+    """Число комментариев каждого поста по окнам ``since`` (часы -> начало).
+
+    Только таблица комментариев, без JOIN: иначе планировщик SQLite
+    обходит все посты. Группировка по выражению, а не по ``post_id``:
+    иначе SQLite ради порядка группировки обходит весь
+    comment_post_pub_date_idx, а так читает из comment_pub_date_post_idx
+    только окно.
+    """
+    return Comment.objects.filter(
+        pub_date__gte=since[max(since)]
+    ).order_by().values(ranked_post=F('post_id') + 0).annotate(**{
+        f'last_{hours}h': Count('pk', filter=Q(pub_date__gte=start))
+        for hours, start in since.items()
+    })
+
+
+def rank(now=None):
+    """id самых популярных постов по убыванию очков."""
+    now = now or timezone.now()
+    since = {
+        hours: now - timedelta(hours=hours) for hours in POPULAR_WINDOWS
+    }
+    velocity = {
+        row['ranked_post']: sum(
+            row[f'last_{hours}h'] / hours for hours in POPULAR_WINDOWS
+        )
+        for row in _comment_counts(since)
+    }
+    followers = Post.objects.filter(pk__in=velocity).values_list(
+        'pk', 'author__stats__followers_count'
+    )
+    scored = (
+        (
+            velocity[post_id] * (
+                1 + POPULAR_FOLLOWER_WEIGHT * math.log10(1 + (count or 0))
+            ),
+            post_id,
+        )
+        for post_id, count in followers.iterator()
+    )
+    return [post_id for _, post_id in heapq.nlargest(POPULAR_SIZE, scored)]
+
+
+@transaction.atomic
+def refresh():
+    """Пересчитывает рейтинг и сбрасывает кеш страницы популярного."""
+    post_ids = rank()
+    PopularPost.objects.all().delete()
+    PopularPost.objects.bulk_create(
+        PopularPost(post_id=post_id, position=position)
+        for position, post_id in enumerate(post_ids)
+    )
+    feed_cache.bump('popular')
+    return post_ids
+
+
+def ranked_ids():
+    """Рейтинг из таблицы; если он пуст — ставит пересчёт.
+
+    Пока пересчёт ждёт своего часа, ключ задачи занят, и повторная
+    постановка ничего не добавляет.
+    """
+    post_ids = list(PopularPost.objects.values_list('post_id', flat=True))
+    if not post_ids:
+        schedule()
+    return post_ids
+
+
+def schedule(delay=0):
+    enqueue(rank_periodically, key='popular:rank', delay=delay)
+
+
+@task
+def rank_periodically():
+    # Следующий запуск ставится первым: сбой пересчёта его не отменит.
+    schedule(POPULAR_INTERVAL)
+    refresh()
@@ -0,0 +1,149 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Обратный индекс хранится в ``SearchEntry``: для каждого документа —
+основы его слов (стемминг Snowball, русский и английский) с числом
+вхождений. Посты и комментарии переиндексируют фоновые задачи
+(``core.tasks``), которые сигналы ставят при сохранении; удаление
+документа удаляет его записи каскадом. Поиск находит посты, где
+в тексте или комментариях есть все основы запроса, и ранжирует их
+по числу вхождений, причём слова самого поста весят больше.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+
+import snowballstemmer
+from core.tasks import enqueue, task
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+
+from .models import Comment, Post, SearchEntry
+from .settings import (SEARCH_BATCH_SIZE, SEARCH_COMMENT_WEIGHT,
+                       SEARCH_MAX_TERMS, SEARCH_POST_WEIGHT,
+                       SEARCH_STEM_CACHE_SIZE)
+
+WORD = re.compile(r'\w{2,}')
+CYRILLIC = re.compile('[а-я]')
+RUSSIAN = snowballstemmer.stemmer('russian')
+ENGLISH = snowballstemmer.stemmer('english')
+TERM_LENGTH = SearchEntry._meta.get_field('term').max_length
+
+
+# Словарь текстов невелик, а стемминг Snowball на чистом Python дорог.
+@lru_cache(maxsize=SEARCH_STEM_CACHE_SIZE)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    stemmer = RUSSIAN if CYRILLIC.search(word) else ENGLISH
+    return stemmer.stemWord(word)[:TERM_LENGTH]
+
+
+def terms(text):
+    """Основы слов текста с числом вхождений."""
+    return Counter(stem(word) for word in WORD.findall(text))
+
+
+def query_terms(query):
+    return list(terms(query))[:SEARCH_MAX_TERMS]
+
+
+def index_posts(posts):
+    SearchEntry.objects.filter(
+        post__in=[post.pk for post in posts], comment=None
+    ).delete()
+    SearchEntry.objects.bulk_create(
+        (
+            SearchEntry(post_id=post.pk, term=term, count=count)
+            for post in posts
+            for term, count in terms(post.text).items()
+        ),
+        batch_size=SEARCH_BATCH_SIZE
+    )
+
+
+def index_comments(comments):
+    SearchEntry.objects.filter(
+        comment__in=[comment.pk for comment in comments]
+    ).delete()
+    SearchEntry.objects.bulk_create(
+        (
+            SearchEntry(
+                post_id=comment.post_id,
+                comment_id=comment.pk,
+                term=term,
+                count=count
+            )
+            for comment in comments
+            for term, count in terms(comment.text).items()
+        ),
+        batch_size=SEARCH_BATCH_SIZE
+    )
+
+
+def post_saved(post):
+    enqueue(index_post, post.pk, key=f'search:post:{post.pk}')
+
+
+def comment_saved(comment):
+    enqueue(index_comment, comment.pk, key=f'search:comment:{comment.pk}')
+
+
+@task
+def index_post(post_id):
+    index_posts(list(Post.objects.filter(pk=post_id).only('text')))
+
+
+@task
+def index_comment(comment_id):
+    index_comments(list(Comment.objects.filter(pk=comment_id).only(
+        'post_id', 'text'
+    )))
+
+
+def search(query, queryset=None):
+    """Посты с рангом ``rank``, где встречаются все слова запроса."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    words = query_terms(query)
+    if not words:
+        return queryset.annotate(
+            rank=Value(0, output_field=IntegerField())
+        ).none()
+    return queryset.filter(search_entries__term__in=words).annotate(
+        rank=Sum(
+            F('search_entries__count') * Case(
+                When(
+                    search_entries__comment=None,
+                    then=Value(SEARCH_POST_WEIGHT)
+                ),
+                default=Value(SEARCH_COMMENT_WEIGHT)
+            ),
+            output_field=IntegerField()
+        ),
+        matched=Count('search_entries__term', distinct=True)
+    ).filter(matched=len(words))
+
+
+def matching_ids(query, comments=False):
+    """Подзапрос id постов или комментариев, содержащих все слова."""
+    words = query_terms(query)
+    field = 'comment' if comments else 'post'
+    entries = SearchEntry.objects.filter(
+        term__in=words, comment__isnull=not comments
+    ).values(field).annotate(
+        matched=Count('term', distinct=True)
+    ).filter(matched=len(words)).values(field)
+    return entries if words else SearchEntry.objects.none().values(field)
+
+
+@transaction.atomic
+def rebuild():
+    """Заново строит индекс по всем постам и комментариям."""
+    SearchEntry.objects.all().delete()
+    for model, index in ((Post, index_posts), (Comment, index_comments)):
+        batch = []
+        for document in model.objects.order_by().iterator():
+            batch.append(document)
+            if len(batch) == SEARCH_BATCH_SIZE:
+                index(batch)
+                batch = []
+        index(batch)
@@ -1 +1,44 @@
 POSTS_PER_PAGE = 10
+# Число постов для ссылок на страницы кешируется вместо COUNT(*) на каждый
+# запрос; ссылки — окно из PAGE_WINDOW страниц с каждой стороны текущей.
+PAGINATOR_COUNT_TIMEOUT = 60
+PAGE_WINDOW = 2
+# Карточки лент берут автора и сообщество из снимка в посте
+# (posts.snapshots), без JOIN; переименования догоняют фоновые задачи.
+FEED_SNAPSHOTS = True
+SNAPSHOT_BATCH_SIZE = 1000
+COMMENTS_PER_PAGE = 10
+STATS_CHUNK_SIZE = 1000
+# Авторам с большим числом подписчиков ленты собираются при чтении.
+FANOUT_FOLLOWERS_LIMIT = 1000
+TIMELINE_BATCH_SIZE = 1000
+# Подсказки «кого почитать» (posts.suggestions): сколько показывать, вес
+# «друзей друзей» и совместных подписок, пачка пересчёта и срок, после
+# которого страница ставит пересчёт.
+SUGGESTIONS_COUNT = 10
+SUGGESTIONS_FRIEND_WEIGHT = 2
+SUGGESTIONS_COFOLLOW_WEIGHT = 1
+SUGGESTIONS_BATCH_SIZE = 100
+SUGGESTIONS_TIMEOUT = 60 * 60 * 24
+# Популярное (posts.popular): окна скорости комментариев в часах, вес
+# подписчиков автора, длина рейтинга и период пересчёта в секундах.
+POPULAR_WINDOWS = (1, 6, 24, 72)
+POPULAR_FOLLOWER_WEIGHT = 0.5
+POPULAR_SIZE = 100
+POPULAR_INTERVAL = 5 * 60
+# Фрагменты лент устаревают по смене поколения (posts.feed_cache).
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+# Миниатюры постов готовят фоновые задачи (core.tasks, run_workers).
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+# Записей о миниатюрах в памяти процесса (posts.kvstore).
+THUMBNAIL_LRU_SIZE = 10000
+# Вес совпадения в тексте поста и в комментарии к нему.
+SEARCH_POST_WEIGHT = 3
+SEARCH_COMMENT_WEIGHT = 1
+SEARCH_MAX_TERMS = 10
+SEARCH_BATCH_SIZE = 1000
+# Основ слов в памяти процесса (posts.search.stem).
+SEARCH_STEM_CACHE_SIZE = 100000
+IMPORT_CHUNK_SIZE = 500
+EXPORT_CHUNK_SIZE = 2000
@@ -0,0 +1,249 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.tasks import enqueue
+
+from . import (feed_cache, groups, search, snapshots, stats, suggestions,
+               thumbnails, timeline)
+from .models import (Comment, Follow, Group, Post, User, UserStats,
+                     bulk_created)
+
+
+@receiver(post_save, sender=User)
+def create_stats(sender, instance, created, raw=False, **kwargs):
+    # Счётчики заводятся при регистрации, чтобы первая запись
+    # пользователя не пересчитывала их по таблицам. По id — чтобы
+    # в instance.stats не осталась копия, которую не увидят обновления.
+    if created and not raw:
+        UserStats.objects.create(user_id=instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Follow)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.apply(sender, [instance], 1)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Follow)
+def count_deleted(sender, instance, **kwargs):
+    stats.apply(sender, [instance], -1)
+
+
+@receiver(bulk_created, sender=Post)
+@receiver(bulk_created, sender=Comment)
+@receiver(bulk_created, sender=Follow)
+def count_bulk_created(sender, objs, ignore_conflicts, **kwargs):
+    if not ignore_conflicts:
+        stats.apply(sender, objs, 1)
+        return
+    # Неизвестно, какие строки вставлены на самом деле: считаем заново.
+    stats.refresh(sender, objs)
+
+
+@receiver(pre_save, sender=Post)
+def queue_thumbnail(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    name = instance.image.name or ''
+    if name == getattr(instance, 'loaded_image', None):
+        return
+    # Новое или заменённое изображение: старая миниатюра не годится,
+    # новую подготовит фоновая задача после сохранения.
+    instance.thumbnail_url = ''
+    instance.thumbnail_width = instance.thumbnail_height = None
+    instance.thumbnail_pending = instance.thumbnail_queued = bool(name)
+    instance.thumbnail_failed = False
+
+
+@receiver(post_save, sender=Post)
+def enqueue_thumbnail(sender, instance, raw=False, **kwargs):
+    if not raw and getattr(instance, 'thumbnail_queued', False):
+        instance.thumbnail_queued = False
+        enqueue(
+            thumbnails.generate,
+            instance.pk,
+            key=f'thumbnail:{instance.pk}'
+        )
+
+
+@receiver(pre_save, sender=Post)
+def take_snapshot(sender, instance, raw=False, **kwargs):
+    if not raw:
+        Post.fill_snapshots([instance])
+
+
+@receiver(post_save, sender=User)
+def refresh_author_snapshots(sender, instance, created, raw=False,
+                             update_fields=None, **kwargs):
+    if created or raw:
+        return
+    if update_fields is not None and not set(update_fields) & {
+        'username', 'first_name', 'last_name'
+    }:
+        return
+    snapshots.author_renamed(instance)
+
+
+@receiver(post_save, sender=Group)
+def refresh_group_snapshots(sender, instance, created, raw=False,
+                            **kwargs):
+    if not created and not raw:
+        snapshots.group_renamed(instance)
+
+
+@receiver(bulk_created, sender=Post)
+def enqueue_bulk_thumbnails(sender, objs, **kwargs):
+    for post in objs:
+        if post.pk is not None and post.thumbnail_pending:
+            enqueue(thumbnails.generate, post.pk, key=f'thumbnail:{post.pk}')
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Follow)
+def mark_timeline_pending(sender, instance, raw=False, **kwargs):
+    if instance._state.adding and not raw:
+        instance.timeline_pending = True
+
+
+# Ленты подключаются после счётчиков: им нужно уже обновлённое
+# число подписчиков автора.
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.post_created(instance)
+
+
+@receiver(bulk_created, sender=Post)
+def fan_out_posts(sender, objs, **kwargs):
+    timeline.fan_out([post for post in objs if post.pk is not None])
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.follows_changed([instance])
+
+
+@receiver(bulk_created, sender=Follow)
+def backfill_timelines(sender, objs, **kwargs):
+    # Для уже существовавших подписок задача ничего не сделает.
+    timeline.follows_changed(objs)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.follow_deleted(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def refresh_suggestions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        suggestions.follows_changed([instance.user_id])
+
+
+@receiver(bulk_created, sender=Follow)
+def refresh_bulk_suggestions(sender, objs, **kwargs):
+    suggestions.follows_changed({follow.user_id for follow in objs})
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.post_saved(instance)
+
+
+@receiver(bulk_created, sender=Post)
+def index_bulk_posts(sender, objs, **kwargs):
+    search.index_posts([post for post in objs if post.pk is not None])
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.comment_saved(instance)
+
+
+@receiver(bulk_created, sender=Comment)
+def index_bulk_comments(sender, objs, **kwargs):
+    search.index_comments(
+        [comment for comment in objs if comment.pk is not None]
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed_cache.bump(*feed_cache.post_scopes([instance]))
+
+
+@receiver(bulk_created, sender=Post)
+def invalidate_posts(sender, objs, **kwargs):
+    feed_cache.bump(*feed_cache.post_scopes(objs))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed_cache.bump(
+            f'post:{instance.post_id}',
+            f'author:{instance.author_id}'
+        )
+
+
+@receiver(bulk_created, sender=Comment)
+def invalidate_comments(sender, objs, **kwargs):
+    feed_cache.bump(
+        *{f'post:{comment.post_id}' for comment in objs},
+        *{f'author:{comment.author_id}' for comment in objs}
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed_cache.bump(
+            f'user:{instance.user_id}',
+            f'author:{instance.user_id}',
+            f'author:{instance.author_id}'
+        )
+
+
+@receiver(bulk_created, sender=Follow)
+def invalidate_follows(sender, objs, **kwargs):
+    feed_cache.bump(*{
+        scope
+        for follow in objs
+        for scope in (
+            f'user:{follow.user_id}',
+            f'author:{follow.user_id}',
+            f'author:{follow.author_id}',
+        )
+    })
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def refresh_group_page(sender, instance, raw=False, **kwargs):
+    if not raw:
+        groups.posts_changed([instance])
+
+
+@receiver(bulk_created, sender=Post)
+def refresh_group_pages(sender, objs, **kwargs):
+    groups.posts_changed(objs)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed_cache.bump('global', 'groups', f'group:{instance.pk}')
+        groups.group_changed(instance)
@@ -0,0 +1,112 @@
+"""Снимки автора и сообщества в постах для лент без JOIN.
+
+Карточке поста нужны только имя пользователя и полное имя автора,
+метка и название сообщества — они хранятся в самом посте и заполняются
+при сохранении (``Post.fill_snapshots``). Когда автора или сообщество
+переименовывают, сигнал ставит фоновую задачу (``core.tasks``) с ключом
+на автора или сообщество; она пачками переписывает снимки в их постах
+и сбрасывает кеш затронутых лент.
+"""
+from core.tasks import enqueue, task
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Trim
+
+from . import feed_cache, timeline
+from .models import Group, Post, User
+from .settings import SNAPSHOT_BATCH_SIZE
+
+
+def author_values(author):
+    return {
+        'author_username': author.username,
+        'author_full_name': author.get_full_name(),
+    }
+
+
+def group_values(group):
+    return {'group_slug': group.slug, 'group_title': group.title}
+
+
+def _renamed(posts, values):
+    """Совпадает ли снимок в свежем посте с текущими значениями."""
+    sample = posts.values(*values).first()
+    return sample is not None and sample != values
+
+
+def author_renamed(author):
+    if _renamed(author.posts.all(), author_values(author)):
+        enqueue(
+            refresh_author, author.pk, key=f'snapshots:author:{author.pk}'
+        )
+
+
+def group_renamed(group):
+    if _renamed(group.posts.all(), group_values(group)):
+        enqueue(refresh_group, group.pk, key=f'snapshots:group:{group.pk}')
+
+
+def _rewrite(posts, values, scopes):
+    """Переписывает устаревшие снимки пачками; возвращает число постов."""
+    stale = posts.exclude(**values).order_by()
+    done = 0
+    while True:
+        batch = list(stale.values_list('pk', flat=True)[:SNAPSHOT_BATCH_SIZE])
+        if not batch:
+            break
+        done += Post.objects.filter(pk__in=batch).update(**values)
+    if done:
+        feed_cache.bump(*scopes)
+    return done
+
+
+@task
+def refresh_author(author_id):
+    author = User.objects.filter(pk=author_id).first()
+    if author is None:
+        return 0
+    posts = Post.objects.filter(author_id=author_id)
+    group_ids = posts.order_by().values_list('group_id', flat=True).distinct()
+    return _rewrite(posts, author_values(author), [
+        'global',
+        f'author:{author_id}',
+        *(f'group:{pk}' for pk in group_ids if pk is not None),
+        *(f'user:{pk}' for pk in timeline.followers_of([author_id])),
+    ])
+
+
+@task
+def refresh_group(group_id):
+    group = Group.objects.filter(pk=group_id).first()
+    if group is None:
+        return 0
+    return _rewrite(
+        Post.objects.filter(group_id=group_id),
+        group_values(group),
+        ['global', 'groups', f'group:{group_id}']
+    )
+
+
+def backfill(batch_size=SNAPSHOT_BATCH_SIZE):
+    """Заполняет снимки всех постов по диапазонам id (после загрузки)."""
+    author = User.objects.filter(pk=OuterRef('author_id'))
+    group = Group.objects.filter(pk=OuterRef('group_id'))
+    values = {
+        'author_username': Subquery(author.values('username')[:1]),
+        'author_full_name': Subquery(author.annotate(
+            full_name=Trim(Concat('first_name', Value(' '), 'last_name'))
+        ).values('full_name')[:1]),
+        'group_slug': Coalesce(
+            Subquery(group.values('slug')[:1]), Value('')
+        ),
+        'group_title': Coalesce(
+            Subquery(group.values('title')[:1]), Value('')
+        ),
+    }
+    last = Post.objects.order_by('-pk').values_list('pk', flat=True).first()
+    done = 0
+    for start in range(0, last or 0, batch_size):
+        done += Post.objects.filter(
+            pk__gt=start,
+            pk__lte=start + batch_size
+        ).update(**values)
+    return done
@@ -0,0 +1,113 @@
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+FIELDS = (
+    'posts_count',
+    'follows_count',
+    'followers_count',
+    'comments_count',
+)
+# Модель -> пары (счётчик, поле модели с id пользователя).
+COUNTERS = {
+    Post: (('posts_count', 'author_id'),),
+    Comment: (('comments_count', 'author_id'),),
+    Follow: (
+        ('follows_count', 'user_id'),
+        ('followers_count', 'author_id'),
+    ),
+}
+
+
+def for_user(user):
+    """Статистика пользователя одной строкой; создаётся при отсутствии."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        fixed = recount([user.pk])
+        # Пусто, если запись успел создать параллельный запрос.
+        return fixed[0] if fixed else UserStats.objects.get(pk=user.pk)
+
+
+def apply(model, objs, sign):
+    """Сдвигает счётчики на ``sign`` за каждый созданный/удалённый объект."""
+    for field, user_field in COUNTERS[model]:
+        by_delta = defaultdict(list)
+        amounts = Counter(getattr(obj, user_field) for obj in objs)
+        for user_id, amount in amounts.items():
+            by_delta[amount * sign].append(user_id)
+        for delta, user_ids in by_delta.items():
+            updated = UserStats.objects.filter(pk__in=user_ids).update(
+                **{field: F(field) + delta}
+            )
+            if delta > 0 and updated < len(user_ids):
+                recount(set(user_ids) - set(
+                    UserStats.objects.filter(
+                        pk__in=user_ids
+                    ).values_list('pk', flat=True)
+                ))
+
+
+def _total(model, user_field):
+    """Подзапрос: число объектов ``model`` пользователя из внешней строки."""
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{user_field: OuterRef('pk')}
+        ).order_by().values(user_field).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+def refresh(model, objs):
+    """Пересчитывает по таблице счётчики ``model`` у пользователей ``objs``.
+
+    Для ``bulk_create(ignore_conflicts=True)``, после которого неизвестно,
+    какие строки вставлены: один UPDATE с подзапросом на счётчик.
+    """
+    for field, user_field in COUNTERS[model]:
+        user_ids = {getattr(obj, user_field) for obj in objs}
+        updated = UserStats.objects.filter(pk__in=user_ids).update(
+            **{field: _total(model, user_field)}
+        )
+        if updated < len(user_ids):
+            recount(user_ids - set(
+                UserStats.objects.filter(
+                    pk__in=user_ids
+                ).values_list('pk', flat=True)
+            ))
+
+
+def recount(user_ids, dry_run=False):
+    """Пересчитывает счётчики по таблицам и исправляет расхождения.
+
+    Возвращает список созданных или исправленных записей.
+    """
+    if not user_ids:
+        return []
+    # Все счётчики одним запросом: подзапрос на счётчик для каждого.
+    rows = User.objects.filter(pk__in=user_ids).annotate(**{
+        f'total_{field}': _total(model, user_field)
+        for model, counters in COUNTERS.items()
+        for field, user_field in counters
+    }).values_list('pk', *(f'total_{field}' for field in FIELDS))
+    counts = {
+        user_id: dict(zip(FIELDS, totals)) for user_id, *totals in rows
+    }
+    existing = UserStats.objects.in_bulk(counts)
+    created, updated = [], []
+    for user_id, values in counts.items():
+        stats = existing.get(user_id)
+        if stats is None:
+            created.append(UserStats(user_id=user_id, **values))
+        elif any(getattr(stats, f) != v for f, v in values.items()):
+            for field, value in values.items():
+                setattr(stats, field, value)
+            updated.append(stats)
+    if not dry_run:
+        UserStats.objects.bulk_create(created, ignore_conflicts=True)
+        UserStats.objects.bulk_update(updated, FIELDS)
+    return created + updated
@@ -0,0 +1,149 @@
+"""Подсказки «кого почитать» по таблице подписок.
+
+Кандидат получает очки двух видов:
+
+* друзья друзей — на него подписаны авторы, которых читает пользователь;
+* совместные подписки — его читают те, кто читает тех же авторов, что
+  и пользователь (общие авторы с подписчиками больше
+  ``FANOUT_FOLLOWERS_LIMIT`` не учитываются: они связывают почти всех).
+
+Очки считаются сразу для пачки пользователей двумя запросами с GROUP BY,
+без запросов на каждого, и только в фоне. Готовый список id лежит
+в таблице ``FollowSuggestions`` — его видят все процессы, а не только
+воркер, который его посчитал. Подписка или отписка (а также отсутствие
+или устаревание списка) ставит задачу, которая пересчитывает подсказки
+самого пользователя и его подписчиков — их «друзья друзей» тоже
+поменялись. Подписчиков авторов над порогом задача не трогает: их
+догонит периодический ``refresh_suggestions`` или срок
+``SUGGESTIONS_TIMEOUT``.
+"""
+import heapq
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from core.tasks import enqueue_many, task
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Follow, FollowSuggestions, User
+from .settings import (FANOUT_FOLLOWERS_LIMIT, SUGGESTIONS_BATCH_SIZE,
+                       SUGGESTIONS_COFOLLOW_WEIGHT, SUGGESTIONS_COUNT,
+                       SUGGESTIONS_FRIEND_WEIGHT, SUGGESTIONS_TIMEOUT)
+from .timeline import followers_of
+
+
+def _friends_of_friends(user_ids):
+    """(читатель, кандидат, число его подписчиков среди авторов читателя)."""
+    reader = 'user__following__user_id'
+    return Follow.objects.filter(
+        **{f'{reader}__in': user_ids}
+    ).values(reader=F(reader)).annotate(
+        score=Count('pk')
+    ).values_list('reader', 'author_id', 'score')
+
+
+def _co_follows(user_ids):
+    """(читатель, кандидат, сколько читателей общих авторов на него подписано).
+    """
+    reader = 'user__follower__author__following__user_id'
+    return Follow.objects.filter(
+        ~Q(user_id=F(reader)),
+        **{
+            f'{reader}__in': user_ids,
+            'user__follower__author__stats__followers_count__lte': (
+                FANOUT_FOLLOWERS_LIMIT
+            ),
+        }
+    ).values(reader=F(reader)).annotate(
+        score=Count('pk')
+    ).values_list('reader', 'author_id', 'score')
+
+
+def compute(user_ids):
+    """Подсказки для пачки пользователей: id -> список id авторов."""
+    scores = defaultdict(Counter)
+    for rows, weight in (
+        (_friends_of_friends(user_ids), SUGGESTIONS_FRIEND_WEIGHT),
+        (_co_follows(user_ids), SUGGESTIONS_COFOLLOW_WEIGHT),
+    ):
+        for user_id, author_id, score in rows:
+            scores[user_id][author_id] += score * weight
+    followed = defaultdict(set)
+    for user_id, author_id in Follow.objects.filter(
+        user_id__in=user_ids
+    ).values_list('user_id', 'author_id'):
+        followed[user_id].add(author_id)
+    result = {}
+    for user_id in user_ids:
+        skip = followed[user_id] | {user_id}
+        candidates = (
+            (score, -author_id)
+            for author_id, score in scores[user_id].items()
+            if author_id not in skip
+        )
+        result[user_id] = [
+            -negated for _, negated in heapq.nlargest(
+                SUGGESTIONS_COUNT, candidates
+            )
+        ]
+    return result
+
+
+def _store(suggested):
+    now = timezone.now()
+    with transaction.atomic():
+        FollowSuggestions.objects.filter(user_id__in=suggested).delete()
+        FollowSuggestions.objects.bulk_create(
+            FollowSuggestions(
+                user_id=user_id,
+                author_ids=author_ids,
+                refreshed=now
+            )
+            for user_id, author_ids in suggested.items()
+        )
+
+
+def refresh(user_ids):
+    """Пересчитывает подсказки пачками и сохраняет их."""
+    user_ids = iter(user_ids)
+    refreshed = 0
+    chunks = iter(lambda: list(islice(user_ids, SUGGESTIONS_BATCH_SIZE)), [])
+    for chunk in chunks:
+        _store(compute(chunk))
+        refreshed += len(chunk)
+    return refreshed
+
+
+def for_user(user):
+    """Авторы, которых стоит предложить пользователю, по убыванию очков.
+
+    Страница подсказки не считает: если их нет или они старше
+    ``SUGGESTIONS_TIMEOUT``, ставится задача, а подписки, оформленные
+    после расчёта, отсекаются здесь же.
+    """
+    author_ids, refreshed = FollowSuggestions.objects.filter(
+        user_id=user.pk
+    ).values_list('author_ids', 'refreshed').first() or ([], None)
+    stale = timezone.now() - timedelta(seconds=SUGGESTIONS_TIMEOUT)
+    if refreshed is None or refreshed < stale:
+        follows_changed([user.pk])
+    if not author_ids:
+        return []
+    authors = User.objects.filter(pk__in=author_ids).exclude(
+        following__user=user
+    ).only('username', 'first_name', 'last_name').in_bulk()
+    return [authors[pk] for pk in author_ids if pk in authors]
+
+
+def follows_changed(user_ids):
+    enqueue_many(refresh_around, [
+        ((user_id,), f'suggestions:{user_id}') for user_id in user_ids
+    ])
+
+
+@task
+def refresh_around(user_id):
+    """Подсказки пользователя, сменившего подписки, и его подписчиков."""
+    refresh([user_id, *followers_of([user_id]).iterator()])
@@ -0,0 +1,146 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import (AsyncClient, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+
+from core import metrics
+from yatube.urls import urlpatterns as site_urlpatterns
+
+from ..models import Comment, Follow, Group, Post, User
+from ..settings import POSTS_PER_PAGE
+
+USERNAME = 'UserTest'
+AUTHOR_USERNAME = 'Author'
+SLUG = 'test-slug'
+MAIN_URL = reverse('posts:index')
+GROUP_URL = reverse('posts:group_list', args=[SLUG])
+PROFILE_URL = reverse('posts:profile', args=[AUTHOR_USERNAME])
+FOLLOW_URL = reverse('posts:follow_index')
+LOGIN_URL = reverse('users:login')
+
+# Сайт с асинхронными лентами, как под ASGI (ASYNC_VIEWS).
+urlpatterns = [
+    path('', include('posts.urls_async', namespace='posts')),
+    *site_urlpatterns,
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, ASYNC_PARALLEL_QUERIES=False)
+class AsyncViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author = User.objects.create_user(
+            username=AUTHOR_USERNAME,
+            first_name='Лев',
+            last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+            group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.post,
+            author=cls.user,
+            text='Тестовый комментарий'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post_url = reverse('posts:post_detail', args=[cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+        self.reader = AsyncClient()
+        self.reader.force_login(self.user)
+
+    async def test_pages_show_posts(self):
+        """Асинхронные ленты показывают те же посты, что и синхронные."""
+        cases = (
+            (MAIN_URL, 'Тестовый пост'),
+            (GROUP_URL, 'Тестовое описание'),
+            (PROFILE_URL, 'Лев Толстой'),
+            (self.post_url, 'Тестовый комментарий'),
+            (FOLLOW_URL, 'Тестовый пост'),
+        )
+        for url, text in cases:
+            with self.subTest(url=url):
+                response = await self.reader.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, text)
+
+    async def test_profile_shows_subscription(self):
+        """Профиль показывает подписку читателя на автора."""
+        response = await self.reader.get(PROFILE_URL)
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+
+    def test_profile_count_comes_from_stats(self):
+        """Число постов профиля — из счётчика автора, без COUNT(*)."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author)
+            for i in range(POSTS_PER_PAGE)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = async_to_sync(self.async_client.get)(PROFILE_URL)
+        self.assertEqual(
+            response.context['page_obj'].paginator.count,
+            POSTS_PER_PAGE + 1
+        )
+        self.assertFalse([
+            query['sql'] for query in queries if 'COUNT(' in query['sql']
+        ])
+
+    async def test_missing_objects_return_404(self):
+        """Несуществующие сообщество, автор и пост отдают 404."""
+        urls = (
+            reverse('posts:group_list', args=['missing']),
+            reverse('posts:profile', args=['missing']),
+            reverse('posts:post_detail', args=[self.post.pk + 1]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    async def test_follow_index_requires_login(self):
+        """Лента подписок отправляет анонима на страницу входа."""
+        response = await self.async_client.get(FOLLOW_URL)
+        self.assertRedirects(
+            response,
+            f'{LOGIN_URL}?next={FOLLOW_URL}',
+            fetch_redirect_response=False
+        )
+
+    async def test_anonymous_page_is_cached(self):
+        """Анонимная страница кешируется и отдаёт 304 по ETag."""
+        response = await self.async_client.get(MAIN_URL)
+        repeated = await self.async_client.get(
+            MAIN_URL,
+            **{'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(repeated.status_code, 304)
+
+
+@override_settings(ROOT_URLCONF=__name__, ASYNC_PARALLEL_QUERIES=True)
+class ParallelQueriesTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=AUTHOR_USERNAME)
+        Post.objects.create(text='Тестовый пост', author=self.author)
+
+    async def test_queries_of_other_threads_are_counted(self):
+        """Запросы из потоков пула учитываются в метриках запроса."""
+        before = metrics.DB_QUERIES.series.get('posts:profile', ([], 0))[1]
+        response = await self.async_client.get(PROFILE_URL)
+        self.assertContains(response, 'Тестовый пост')
+        after = metrics.DB_QUERIES.series['posts:profile'][1]
+        self.assertGreaterEqual(after - before, 3)
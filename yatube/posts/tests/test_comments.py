@@ -0,0 +1,65 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..settings import COMMENTS_PER_PAGE
+
+USERNAME = 'UserTest'
+
+
+class CommentThreadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+        cls.DETAIL_POST_URL = reverse('posts:post_detail', args=[cls.post.id])
+        cls.COMMENTS_URL = reverse('posts:post_comments', args=[cls.post.id])
+        cls.guest = Client()
+
+    def add_comments(self, count):
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'Комментарий {i}')
+            for i in range(count)
+        )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest.get(url)
+        return len(queries), response
+
+    def test_post_detail_shows_first_page_of_comments(self):
+        """Страница поста показывает только первую порцию комментариев."""
+        self.add_comments(COMMENTS_PER_PAGE + 1)
+        comments = self.guest.get(self.DETAIL_POST_URL).context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(
+            list(comments),
+            list(Comment.objects.all()[:COMMENTS_PER_PAGE])
+        )
+        self.assertIsNotNone(comments.paginator.next_cursor)
+
+    def test_post_detail_query_count_does_not_depend_on_thread(self):
+        """Число запросов страницы поста не зависит от числа комментариев."""
+        self.add_comments(1)
+        single_comment, _ = self.count_queries(self.DETAIL_POST_URL)
+        self.add_comments(COMMENTS_PER_PAGE * 3)
+        long_thread, _ = self.count_queries(self.DETAIL_POST_URL)
+        self.assertEqual(long_thread, single_comment)
+
+    def test_load_more_returns_next_fragment(self):
+        """«Показать ещё» отдаёт следующую порцию без остальной страницы."""
+        self.add_comments(COMMENTS_PER_PAGE + 2)
+        cursor = self.guest.get(self.DETAIL_POST_URL).context[
+            'comments'
+        ].paginator.next_cursor
+        response = self.guest.get(self.COMMENTS_URL, {'cursor': cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comment_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(
+            list(response.context['comments']),
+            list(Comment.objects.all()[COMMENTS_PER_PAGE:])
+        )
+        self.assertIsNone(response.context['comments'].paginator.next_cursor)
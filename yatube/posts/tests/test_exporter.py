@@ -0,0 +1,96 @@
+import csv
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+USERNAME = 'UserTest'
+ANOTHER_USERNAME = 'Another'
+STAFF_USERNAME = 'Staff'
+GROUP_SLUG = 'test-slug'
+PROFILE_EXPORT_URL = reverse('posts:profile_export', args=[USERNAME])
+GROUP_EXPORT_URL = reverse('posts:group_export', args=[GROUP_SLUG])
+SITE_EXPORT_URL = reverse('posts:site_export')
+USER_URL = reverse('posts:profile', args=[USERNAME])
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.another_user = User.objects.create_user(
+            username=ANOTHER_USERNAME
+        )
+        cls.staff_user = User.objects.create_user(
+            username=STAFF_USERNAME, is_staff=True
+        )
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество',
+            slug=GROUP_SLUG,
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост автора', author=cls.user, group=cls.group
+        )
+        Post.objects.create(text='Чужой пост', author=cls.another_user)
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.another_user, text='Комментарий'
+        )
+        cls.author = Client()
+        cls.author.force_login(cls.user)
+        cls.another = Client()
+        cls.another.force_login(cls.another_user)
+        cls.staff = Client()
+        cls.staff.force_login(cls.staff_user)
+
+    def lines(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_profile_takeout_streams_jsonl(self):
+        """Автор выгружает свои посты построчно в JSON Lines."""
+        response = self.author.get(PROFILE_EXPORT_URL)
+        records = [json.loads(line) for line in self.lines(response)]
+        self.assertEqual(records, [{
+            'type': 'post',
+            'id': self.post.pk,
+            'post': None,
+            'author': USERNAME,
+            'group': GROUP_SLUG,
+            'pub_date': self.post.pub_date.isoformat(),
+            'text': 'Пост автора',
+            'image': '',
+        }])
+        self.assertIn('attachment', response['Content-Disposition'])
+
+    def test_group_export_csv_includes_comments(self):
+        """Выгрузка сообщества в CSV содержит посты и комментарии."""
+        response = self.staff.get(GROUP_EXPORT_URL, {'format': 'csv'})
+        rows = list(csv.DictReader(self.lines(response)))
+        self.assertEqual(
+            [(row['type'], row['text']) for row in rows],
+            [('post', 'Пост автора'), ('comment', 'Комментарий')]
+        )
+        self.assertEqual(rows[1]['post'], str(self.post.pk))
+
+    def test_export_requires_owner_or_staff(self):
+        """Чужой профиль, сообщество и сайт выгружает только персонал."""
+        self.assertRedirects(self.another.get(PROFILE_EXPORT_URL), USER_URL)
+        for url in (GROUP_EXPORT_URL, SITE_EXPORT_URL):
+            with self.subTest(url=url):
+                self.assertFalse(self.another.get(url).streaming)
+        self.assertEqual(len(self.lines(self.staff.get(SITE_EXPORT_URL))), 3)
+
+    def test_export_posts_command(self):
+        """Команда export_posts пишет выгрузку в stdout."""
+        out = StringIO()
+        call_command('export_posts', '--author', ANOTHER_USERNAME, stdout=out)
+        self.assertEqual(
+            [json.loads(line)['type'] for line in out.getvalue().splitlines()],
+            ['post', 'comment']
+        )
@@ -0,0 +1,129 @@
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import groups
+from ..models import Group, Post, User
+from ..settings import POSTS_PER_PAGE
+
+USERNAME = 'UserTest'
+SLUG = 'test-slug'
+OTHER_SLUG = 'other-slug'
+GROUP_URL = reverse('posts:group_list', args=[SLUG])
+
+
+class GroupsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        cls.other = Group.objects.create(
+            title='Другое сообщество',
+            slug=OTHER_SLUG,
+            description='Другое описание',
+        )
+        cls.posts = Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+            for i in range(POSTS_PER_PAGE + 2)
+        )
+        cls.authorized = Client()
+        cls.authorized.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def newest_ids(self, group):
+        return list(group.posts.order_by('-pub_date', '-id').values_list(
+            'pk', flat=True
+        )[:POSTS_PER_PAGE + 1])
+
+    def test_group_is_cached_by_slug(self):
+        """Сообщество читается из кеша, смена метки сбрасывает запись."""
+        groups.by_slug(SLUG)
+        with self.assertNumQueries(0):
+            self.assertEqual(groups.by_slug(SLUG), self.group)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            group.save()
+        self.assertIsNone(groups.by_slug(SLUG))
+        self.assertEqual(groups.by_slug('renamed').title, group.title)
+
+    def test_first_page_follows_post_changes(self):
+        """Создание, перенос и удаление поста обновляют первые страницы."""
+        self.assertEqual(
+            groups.first_page(self.group.pk),
+            {'ids': self.newest_ids(self.group), 'count': len(self.posts)}
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(
+                text='Новый пост', author=self.user, group=self.group
+            )
+        with self.assertNumQueries(0):
+            head = groups.first_page(self.group.pk)
+        self.assertEqual(head['ids'][0], post.pk)
+        self.assertEqual(head['count'], len(self.posts) + 1)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        self.assertEqual(groups.first_page(self.other.pk)['ids'], [post.pk])
+        self.assertEqual(
+            groups.first_page(self.group.pk)['ids'],
+            self.newest_ids(self.group)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertEqual(
+            groups.first_page(self.other.pk),
+            {'ids': [], 'count': 0}
+        )
+
+    def test_first_page_is_one_in_lookup(self):
+        """Первая страница ленты — выборка по готовым id, без COUNT(*)."""
+        groups.by_slug(SLUG)
+        groups.first_page(self.group.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized.get(GROUP_URL)
+        posts_queries = [
+            query['sql'] for query in queries
+            if 'posts_post' in query['sql']
+        ]
+        self.assertEqual(len(posts_queries), 1)
+        self.assertIn(' IN (', posts_queries[0])
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            self.newest_ids(self.group)[:POSTS_PER_PAGE]
+        )
+        self.assertEqual(
+            response.context['page_obj'].paginator.count,
+            len(self.posts)
+        )
+
+    def test_cached_fragment_skips_page_fetch(self):
+        """Лента и паджинатор из кеша фрагмента: посты не выбираются."""
+        self.authorized.get(GROUP_URL)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized.get(GROUP_URL)
+        self.assertFalse([
+            query['sql'] for query in queries
+            if 'posts_post' in query['sql']
+        ])
+        self.assertContains(response, self.posts[-1].text)
+        self.assertContains(response, '?cursor=')
+        self.assertIs(type(response.context['page_obj']), Page)
+
+    def test_missing_group_returns_404(self):
+        """Несуществующая метка по-прежнему отдаёт 404."""
+        response = self.authorized.get(
+            reverse('posts:group_list', args=['missing'])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,116 @@
+import json
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from core.tasks import run_pending
+
+from ..exporter import export
+from ..models import (Comment, Follow, Group, Post, TimelineEntry, User,
+                      bulk_created)
+from ..search import search
+from ..stats import for_user
+
+USERNAME = 'UserTest'
+NEW_USERNAME = 'Newcomer'
+GROUP_SLUG = 'test-slug'
+PUB_DATE = '2015-06-01T12:00:00+00:00'
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество',
+            slug=GROUP_SLUG,
+            description='Тестовое описание',
+        )
+
+    def import_file(self, content, suffix, *args):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix=suffix, encoding='utf-8'
+        ) as source:
+            source.write(content)
+            source.flush()
+            call_command(
+                'import_posts', source.name, *args, stdout=StringIO()
+            )
+
+    def test_jsonl_import_in_chunks(self):
+        """JSONL импортируется пачками, сигналы приходят раз на пачку."""
+        records = [
+            {'text': f'Импорт {i}', 'author': USERNAME, 'group': GROUP_SLUG}
+            for i in range(5)
+        ]
+        records[0].update(pub_date=PUB_DATE, image='posts/old.gif')
+        batches = []
+
+        def receiver(sender, objs, **kwargs):
+            batches.append(len(objs))
+
+        bulk_created.connect(receiver, sender=Post)
+        self.addCleanup(bulk_created.disconnect, receiver, sender=Post)
+        self.import_file(
+            '\n'.join(json.dumps(record) for record in records),
+            '.jsonl',
+            '--chunk-size=2'
+        )
+        self.assertEqual(batches, [2, 2, 1])
+        self.assertEqual(self.group.posts.count(), 5)
+        self.assertEqual(for_user(self.user).posts_count, 5)
+        self.assertEqual(search('импорт').count(), 5)
+        post = Post.objects.get(text='Импорт 0')
+        self.assertEqual(
+            post.pub_date, datetime(2015, 6, 1, 12, tzinfo=timezone.utc)
+        )
+        self.assertTrue(post.thumbnail_pending)
+
+    def test_imported_date_reaches_timelines(self):
+        """Записи лент подписчиков получают дату из записи импорта."""
+        follower = User.objects.create_user(username='Follower')
+        Follow.objects.create(user=follower, author=self.user)
+        run_pending()
+        self.import_file(
+            json.dumps({
+                'text': 'Старый пост',
+                'author': USERNAME,
+                'pub_date': PUB_DATE,
+            }),
+            '.jsonl'
+        )
+        self.assertEqual(
+            TimelineEntry.objects.get(user=follower).pub_date,
+            datetime(2015, 6, 1, 12, tzinfo=timezone.utc)
+        )
+
+    def test_csv_import_creates_authors_on_request(self):
+        """CSV с новым автором требует --create-authors."""
+        content = f'text,author,group\nПривет,{NEW_USERNAME},\n'
+        with self.assertRaises(CommandError):
+            self.import_file(content, '.csv')
+        self.assertFalse(Post.objects.exists())
+        self.import_file(content, '.csv', '--create-authors')
+        post = Post.objects.get()
+        self.assertEqual(post.author.username, NEW_USERNAME)
+        self.assertIsNone(post.group)
+        self.assertFalse(post.author.has_usable_password())
+
+    def test_exported_comments_are_not_imported_as_posts(self):
+        """Повторный импорт выгрузки не превращает комментарии в посты."""
+        post = Post.objects.create(text='Пост', author=self.user)
+        Comment.objects.create(post=post, author=self.user, text='Коммент')
+        exports = {
+            suffix: ''.join(export(format))
+            for format, suffix in (('jsonl', '.jsonl'), ('csv', '.csv'))
+        }
+        for suffix, content in exports.items():
+            self.import_file(content, suffix)
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)),
+            ['Пост'] * 3
+        )
@@ -0,0 +1,87 @@
+from unittest import skipUnless
+
+from django.db import IntegrityError, connection
+from django.test import TestCase
+
+from .. import popular, timeline
+from ..models import Follow, Group, Post, User
+from ..paginators import KeysetPaginator
+from ..settings import POSTS_PER_PAGE
+
+
+@skipUnless(connection.vendor == 'sqlite', 'План запроса в формате SQLite')
+class FeedIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='UserTest')
+        cls.group = Group.objects.create(
+            title='Тестовое название сообщества',
+            slug='test-slug',
+            description='Тестовое описание сообщества',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовая запись текста поста',
+            author=cls.user,
+            group=cls.group
+        )
+
+    def test_feed_pages_use_composite_indexes(self):
+        """Страницы лент читаются по составным индексам без сортировки.
+
+        Лента подписок — по индексу своих записей с ключом ``FEED_KEYS``.
+        """
+        keys = ('pub_date', 'id')
+        data = (
+            (Post.objects.for_feed(), keys, 'post_pub_date_idx'),
+            (self.group.posts.for_feed(), keys, 'post_group_pub_date_idx'),
+            (self.user.posts.for_feed(), keys, 'post_author_pub_date_idx'),
+            (
+                self.post.comments.for_thread(),
+                keys,
+                'comment_post_pub_date_idx'
+            ),
+            (
+                timeline.feed_for(self.user).for_feed(),
+                timeline.FEED_KEYS,
+                'timeline_user_pub_date_idx'
+            ),
+        )
+        for queryset, keys, index in data:
+            paginator = KeysetPaginator(queryset, POSTS_PER_PAGE, keys=keys)
+            pages = (
+                paginator.object_list,
+                paginator.object_list.filter(paginator._seek(
+                    [str(self.post.pub_date), str(self.post.pk)], 'lt'
+                )),
+            )
+            for page in pages:
+                with self.subTest(index=index, query=str(page.query)):
+                    plan = page[:POSTS_PER_PAGE + 1].explain()
+                    self.assertRegex(plan, f'USING (COVERING )?INDEX {index}')
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_popular_reads_only_comment_window(self):
+        """Рейтинг популярного читает из индекса только окно комментариев."""
+        plan = popular._comment_counts(
+            {24: self.post.pub_date, 72: self.post.pub_date}
+        ).explain()
+        self.assertIn(
+            'COVERING INDEX comment_pub_date_post_idx (pub_date>?)', plan
+        )
+        self.assertNotIn('SCAN', plan)
+
+    def test_follow_lookup_uses_unique_index(self):
+        """Проверка подписки идёт по уникальному индексу (user, author)."""
+        plan = Follow.objects.filter(
+            user=self.user,
+            author=self.user
+        ).values('pk').explain()
+        self.assertIn('COVERING INDEX', plan)
+        self.assertIn('user_id=? AND author_id=?', plan)
+
+    def test_follow_pair_is_unique(self):
+        """Повторная подписка на того же автора запрещена базой."""
+        Follow.objects.create(user=self.user, author=self.user)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=self.user, author=self.user)
@@ -0,0 +1,155 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+
+from ..models import Comment, Follow, Group, Post, User
+
+USERNAME = 'UserTest'
+AUTHOR_USERNAME = 'Author'
+GROUP_SLUG = 'test-slug'
+METRICS_URL = reverse('metrics')
+MAIN_URL = reverse('posts:index')
+POSTS_COUNT = 25
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(QUERY_BUDGETS_STRICT=True, MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество',
+            slug=GROUP_SLUG,
+            description='Тестовое описание',
+        )
+        for i in range(POSTS_COUNT):
+            post = Post.objects.create(
+                text=f'Тестовый пост {i}', author=cls.author, group=cls.group
+            )
+            Comment.objects.create(post=post, author=cls.user, text='Да')
+        cls.post = Post.objects.create(text='Свой пост', author=cls.user)
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.guest = Client()
+        cls.authorized = Client()
+        cls.authorized.force_login(cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_views_stay_within_budgets(self):
+        """Страницы укладываются в бюджеты запросов из QUERY_BUDGETS."""
+        urls = (
+            MAIN_URL,
+            reverse('posts:group_list', args=[GROUP_SLUG]),
+            reverse('posts:profile', args=[AUTHOR_USERNAME]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:post_comments', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+            reverse('posts:search') + '?q=пост',
+            reverse('posts:popular'),
+            reverse('posts:post_create'),
+            reverse('posts:post_edit', args=[self.post.pk]),
+        )
+        for client in (self.guest, self.authorized):
+            for url in urls:
+                with self.subTest(url=url, client=client):
+                    client.get(url)
+
+    def test_write_views_stay_within_budgets(self):
+        """Запись, правка, комментарий и подписки укладываются в бюджеты."""
+        requests = (
+            (reverse('posts:post_create'), {
+                'text': 'Новый пост',
+                'group': self.group.pk,
+            }),
+            (reverse('posts:post_create'), {
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    name='small.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif'
+                ),
+            }),
+            (reverse('posts:post_edit', args=[self.post.pk]), {
+                'text': 'Правка',
+                'group': self.group.pk,
+            }),
+            (reverse('posts:add_comment', args=[self.post.pk]), {
+                'text': 'Комментарий',
+            }),
+            (reverse('posts:profile_unfollow', args=[AUTHOR_USERNAME]), {}),
+            (reverse('posts:profile_follow', args=[AUTHOR_USERNAME]), {}),
+            (reverse('posts:follow_many'), {'authors': [self.author.pk]}),
+        )
+        for url, data in requests:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.authorized.post(url, data).status_code,
+                    302
+                )
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0})
+    def test_exceeded_budget_fails_in_strict_mode(self):
+        """Превышение бюджета роняет запрос в тестах."""
+        with self.assertRaises(metrics.QueryBudgetExceeded):
+            self.guest.get(MAIN_URL)
+
+    @override_settings(
+        QUERY_BUDGETS={'posts:index': 0}, QUERY_BUDGETS_STRICT=False
+    )
+    def test_exceeded_budget_logs_warning(self):
+        """В бою превышение бюджета только пишется в лог."""
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            self.assertEqual(self.guest.get(MAIN_URL).status_code, 200)
+        self.assertIn('posts:index', logs.output[0])
+
+
+class MetricsEndpointTest(TestCase):
+    def test_prometheus_histograms(self):
+        """Эндпоинт отдаёт гистограммы по представлениям."""
+        client = Client()
+        client.get(MAIN_URL)
+        response = client.get(METRICS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        for name in (
+            'yatube_request_duration_seconds',
+            'yatube_db_queries',
+            'yatube_db_duration_seconds',
+            'yatube_template_render_seconds',
+        ):
+            with self.subTest(name=name):
+                self.assertIn(f'# TYPE {name} histogram', body)
+                self.assertIn(
+                    f'{name}_bucket{{view="posts:index",le="+Inf"}}', body
+                )
+
+    def test_endpoint_is_internal(self):
+        """Снаружи эндпоинт не виден."""
+        self.assertNotIn('10.0.0.1', settings.INTERNAL_IPS)
+        response = Client(REMOTE_ADDR='10.0.0.1').get(METRICS_URL)
+        self.assertEqual(response.status_code, 404)
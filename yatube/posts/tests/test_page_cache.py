@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+USERNAME = 'UserTest'
+GROUP_SLUG = 'test-slug'
+MAIN_URL = reverse('posts:index')
+USER_URL = reverse('posts:profile', args=[USERNAME])
+COMMUNITY_URL = reverse('posts:group_list', args=[GROUP_SLUG])
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(
+            title='Тестовое название сообщества',
+            slug=GROUP_SLUG,
+            description='Тестовое описание сообщества',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовая запись текста поста',
+            author=cls.user,
+            group=cls.group
+        )
+        cls.DETAIL_POST_URL = reverse('posts:post_detail', args=[cls.post.id])
+        cls.URLS = (MAIN_URL, USER_URL, COMMUNITY_URL, cls.DETAIL_POST_URL)
+        cls.guest = Client()
+        cls.author = Client()
+        cls.author.force_login(cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeated_anonymous_request_is_served_from_cache(self):
+        """Повторный анонимный запрос не рендерит страницу заново."""
+        for url in self.URLS:
+            with self.subTest(url=url):
+                first = self.guest.get(url)
+                Post.objects.update(text='Изменено в обход сигналов')
+                second = self.guest.get(url)
+                self.assertIsNone(second.context)
+                self.assertEqual(second.content, first.content)
+
+    def test_conditional_get_returns_not_modified(self):
+        """ETag и Last-Modified позволяют получить 304."""
+        for url in self.URLS:
+            response = self.guest.get(url)
+            for header, value in (
+                ('HTTP_IF_NONE_MATCH', response['ETag']),
+                ('HTTP_IF_MODIFIED_SINCE', response['Last-Modified']),
+            ):
+                with self.subTest(url=url, header=header):
+                    self.assertEqual(
+                        self.guest.get(url, **{header: value}).status_code,
+                        HTTPStatus.NOT_MODIFIED
+                    )
+
+    def test_changes_invalidate_cached_pages(self):
+        """Новые посты и комментарии сбрасывают закешированные страницы."""
+        etags = {url: self.guest.get(url)['ETag'] for url in self.URLS}
+        Post.objects.create(
+            text='Совсем новый пост',
+            author=self.user,
+            group=self.group
+        )
+        Comment.objects.create(
+            post=self.post,
+            author=self.user,
+            text='Совсем новый комментарий'
+        )
+        for url in self.URLS:
+            with self.subTest(url=url):
+                response = self.guest.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIsNotNone(response.context)
+
+    def test_authorized_user_bypasses_cache(self):
+        """Авторизованный пользователь получает страницу без кеша."""
+        for url in self.URLS:
+            with self.subTest(url=url):
+                self.guest.get(url)
+                response = self.author.get(url)
+                self.assertIsNotNone(response.context)
+                self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,178 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Post, User
+from ..paginators import KeysetPaginator
+from ..settings import POSTS_PER_PAGE
+
+USERNAME = 'UserTest'
+MAIN_URL = reverse('posts:index')
+POSTS_COUNT = POSTS_PER_PAGE * 2 + 3
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост {i}', author=cls.user)
+            for i in range(POSTS_COUNT)
+        )
+        # Одинаковая дата у всех постов: порядок держится только на id.
+        Post.objects.update(pub_date=timezone.now())
+        cls.guest = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def paginator(self, per_page=POSTS_PER_PAGE, **kwargs):
+        return KeysetPaginator(Post.objects.all(), per_page, **kwargs)
+
+    def test_cursor_pages_match_offset_pages(self):
+        """Страницы по курсору совпадают со страницами по номеру."""
+        cursor = None
+        for number in range(1, 4):
+            with self.subTest(number=number):
+                paginator = self.paginator()
+                page = paginator.get_page(1, cursor=cursor)
+                expected = self.paginator().get_page(number)
+                self.assertEqual(page.number, number)
+                self.assertEqual(
+                    list(page.object_list),
+                    list(expected.object_list)
+                )
+                cursor = paginator.next_cursor
+        self.assertIsNone(cursor)
+
+    def test_previous_cursor(self):
+        """Курсор назад возвращает предыдущую страницу."""
+        paginator = self.paginator()
+        paginator.get_page(2)
+        previous = self.paginator()
+        page = previous.get_page(cursor=paginator.previous_cursor)
+        self.assertEqual(page.number, 1)
+        self.assertEqual(
+            list(page.object_list),
+            list(self.paginator().get_page(1).object_list)
+        )
+        self.assertIsNone(previous.previous_cursor)
+        self.assertIsNotNone(previous.next_cursor)
+
+    def test_invalid_cursor_falls_back_to_page_number(self):
+        """Повреждённый курсор не ломает страницу."""
+        broken_values = KeysetPaginator(
+            Post.objects.all(), POSTS_PER_PAGE
+        ).encode_cursor(2, True, Post(pub_date='не дата', id='не id'))
+        for cursor in ('garbage', 'WzEsIHRydWVd', '!!!', broken_values):
+            with self.subTest(cursor=cursor):
+                response = self.guest.get(
+                    MAIN_URL, {'cursor': cursor, 'page': 2}
+                )
+                self.assertEqual(response.context['page_obj'].number, 2)
+
+    def test_index_follows_cursor_links(self):
+        """Главная страница отдаёт курсор следующей страницы."""
+        response = self.guest.get(MAIN_URL)
+        cursor = response.context['page_obj'].paginator.next_cursor
+        self.assertContains(response, f'?cursor={cursor}')
+        page = self.guest.get(MAIN_URL, {'cursor': cursor}).context[
+            'page_obj'
+        ]
+        self.assertEqual(page.number, 2)
+        self.assertEqual(len(page), POSTS_PER_PAGE)
+
+    def test_count_is_cached_between_requests(self):
+        """COUNT(*) выполняется один раз, дальше число берётся из кеша."""
+        with self.assertNumQueries(2):
+            page = self.paginator().get_page(1)
+            self.assertEqual(page.paginator.count, POSTS_COUNT)
+        with self.assertNumQueries(1):
+            page = self.paginator().get_page(1)
+            self.assertEqual(page.paginator.count, POSTS_COUNT)
+            self.assertIsNone(page.paginator.last_page)
+        with self.assertNumQueries(1):
+            page = self.paginator(count=POSTS_COUNT).get_page(2)
+            self.assertEqual(page.paginator.last_page, 3)
+
+    def test_stale_count_is_corrected_by_pages(self):
+        """Устаревшее число не мешает листать и уточняется по страницам."""
+        paginator = self.paginator()
+        cache.set(paginator._count_key(), 0)
+        page = paginator.get_page(1)
+        self.assertTrue(page.has_next())
+        self.assertEqual(paginator.count, POSTS_PER_PAGE + 1)
+        last = self.paginator().get_page(3)
+        self.assertEqual(len(last), 3)
+        self.assertFalse(last.has_next())
+        self.assertEqual(last.paginator.last_page, 3)
+        self.assertEqual(cache.get(paginator._count_key()), POSTS_COUNT)
+        beyond = self.paginator(count=0).get_page(100)
+        self.assertEqual(beyond.number, 3)
+
+    def test_page_window_is_bounded(self):
+        """Ссылки — окно вокруг текущей страницы, а не все страницы."""
+        ellipsis = KeysetPaginator.ELLIPSIS
+        exact = self.paginator(1, count=POSTS_COUNT)
+        exact.get_page(12)
+        self.assertEqual(
+            exact.window,
+            [1, ellipsis, 10, 11, 12, 13, 14, ellipsis, POSTS_COUNT]
+        )
+        estimated = self.paginator(1)
+        cache.set(estimated._count_key(), POSTS_COUNT)
+        estimated.get_page(12)
+        self.assertEqual(
+            estimated.window,
+            [1, ellipsis, 10, 11, 12, 13, 14, ellipsis,
+             KeysetPaginator.INFINITY]
+        )
+
+    def test_window_links_are_cursors(self):
+        """Ссылки окна ведут на те же страницы без OFFSET от начала."""
+        current = self.paginator(1, count=POSTS_COUNT)
+        current.get_page(12)
+        links = dict(current.window_links)
+        self.assertIsNone(links[12])
+        for number, cursor in links.items():
+            if cursor is None:
+                continue
+            with self.subTest(number=number):
+                with CaptureQueriesContext(connection) as queries:
+                    page = self.paginator(1, count=POSTS_COUNT).get_page(
+                        cursor=cursor
+                    )
+                self.assertEqual(page.number, number)
+                self.assertEqual(
+                    list(page.object_list),
+                    list(self.paginator(1).get_page(number).object_list)
+                )
+                if number in (1, POSTS_COUNT):
+                    self.assertNotIn('OFFSET', queries[-1]['sql'])
+
+    def test_last_cursor_opens_partial_last_page(self):
+        """«Последняя» по курсору — неполная страница с конца выборки."""
+        paginator = self.paginator(count=POSTS_COUNT)
+        paginator.get_page(1)
+        last = self.paginator(count=POSTS_COUNT)
+        page = last.get_page(cursor=paginator.last_cursor)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(
+            list(page.object_list),
+            list(self.paginator().get_page(3).object_list)
+        )
+        self.assertFalse(page.has_next())
+        self.assertIsNotNone(last.previous_cursor)
+
+    def test_page_links_use_cursors(self):
+        """На главной номера страниц — ссылки с курсором, а не ?page=."""
+        response = self.guest.get(MAIN_URL)
+        self.assertNotContains(response, '?page=')
+        self.assertContains(
+            response,
+            '?cursor=' + response.context['page_obj'].paginator.page_cursor(2)
+        )
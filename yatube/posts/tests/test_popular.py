@@ -0,0 +1,108 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from core.tasks import run_pending
+
+from .. import popular
+from ..models import Comment, Follow, Post, User
+
+USERNAME = 'UserTest'
+POPULAR_URL = reverse('posts:popular')
+
+
+class PopularTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.star = User.objects.create_user(username='Star')
+        Follow.objects.bulk_create(
+            Follow(user=User.objects.create_user(username=f'Fan{i}'),
+                   author=cls.star)
+            for i in range(9)
+        )
+        cls.fresh, cls.older, cls.quiet, cls.stale = (
+            Post.objects.create(text=f'Пост {i}', author=cls.user)
+            for i in range(4)
+        )
+        cls.starred = Post.objects.create(text='Пост звезды', author=cls.star)
+        now = timezone.now()
+        for post, hours_ago, count in (
+            (cls.fresh, 0, 2),
+            (cls.starred, 0, 2),
+            (cls.older, 30, 5),
+            (cls.stale, 100, 10),
+        ):
+            comments = Comment.objects.bulk_create(
+                Comment(post=post, author=cls.user, text='Да')
+                for _ in range(count)
+            )
+            Comment.objects.filter(pk__in=[c.pk for c in comments]).update(
+                pub_date=now - timedelta(hours=hours_ago)
+            )
+        run_pending()
+        cls.guest = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rank_decays_and_boosts_followed_authors(self):
+        """Свежие комментарии весят больше, подписчики автора поднимают пост.
+
+        Посты без комментариев в окнах в рейтинг не попадают.
+        """
+        self.assertEqual(
+            popular.rank(),
+            [self.starred.pk, self.fresh.pk, self.older.pk]
+        )
+
+    def test_rank_query_count_does_not_depend_on_posts(self):
+        """Рейтинг считается двумя запросами, а не запросом на пост."""
+        with self.assertNumQueries(2):
+            popular.rank()
+
+    def test_page_is_one_in_lookup(self):
+        """Страница рейтинга выбирает посты одним IN в порядке рейтинга.
+
+        Рейтинг лежит в базе, а не в кеше процесса, который его посчитал.
+        """
+        popular.refresh()
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest.get(POPULAR_URL)
+        self.assertEqual(len(queries), 2)
+        self.assertIn('posts_popularpost', queries[0]['sql'])
+        self.assertIn(' IN (', queries[1]['sql'])
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.starred, self.fresh, self.older]
+        )
+
+    def test_empty_ranking_schedules_ranking_once(self):
+        """Без рейтинга страница пуста и ставит один пересчёт на всех."""
+        response = self.guest.get(POPULAR_URL)
+        self.assertEqual(len(response.context['page_obj']), 0)
+        cache.clear()
+        self.guest.get(POPULAR_URL)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(popular.ranked_ids()[0], self.starred.pk)
+        following = Task.objects.get(name='posts.popular.rank_periodically')
+        self.assertGreater(following.run_after, timezone.now())
+
+    def test_rank_popular_command(self):
+        """rank_popular считает рейтинг и ставит периодический пересчёт."""
+        out = StringIO()
+        call_command('rank_popular', stdout=out)
+        self.assertIn('Постов в рейтинге: 3', out.getvalue())
+        self.assertTrue(Task.objects.filter(
+            name='posts.popular.rank_periodically'
+        ).exists())
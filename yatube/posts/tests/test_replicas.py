@@ -0,0 +1,57 @@
+from core.db import ReplicaMiddleware
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post, User
+
+USERNAME = 'UserTest'
+MAIN_URL = reverse('posts:index')
+LOGIN_URL = reverse('users:login')
+REPLICA = 'replica'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTest(TestCase):
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Пост есть только в основной базе: реплика «отстала».
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.post = Post.objects.create(text='Свежий пост', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+
+    def index_posts(self):
+        return list(self.guest.get(MAIN_URL).context['page_obj'])
+
+    def test_get_reads_from_replica(self):
+        """Страницы читаются с реплики."""
+        self.assertEqual(self.index_posts(), [])
+
+    def test_write_pins_primary(self):
+        """После POST чтение закрепляется за основной базой."""
+        response = self.guest.post(LOGIN_URL, {})
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.assertEqual(self.index_posts(), [self.post])
+
+    def test_orm_outside_requests_uses_primary(self):
+        """Вне запросов ORM читает основную базу."""
+        self.assertEqual(list(Post.objects.all()), [self.post])
+
+    def test_write_during_get_pins_rest_of_request(self):
+        """Запись в GET-запросе переводит чтение на основную базу."""
+        def view(request):
+            Post.objects.create(text='Ещё пост', author=self.user)
+            return HttpResponse(Post.objects.count())
+
+        response = ReplicaMiddleware(view)(RequestFactory().get(MAIN_URL))
+        self.assertEqual(response.content, b'2')
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
@@ -9,12 +9,19 @@ POST_ID = 1
 DATA = (
     ('index', [], '/'),
     ('group_list', [GROUP_SLUG], f'/group/{GROUP_SLUG}/'),
+    ('group_export', [GROUP_SLUG], f'/group/{GROUP_SLUG}/export/'),
     ('profile', [USERNAME], f'/profile/{USERNAME}/'),
+    ('profile_export', [USERNAME], f'/profile/{USERNAME}/export/'),
     ('post_detail', [POST_ID], f'/posts/{POST_ID}/'),
     ('post_create', [], '/create/'),
     ('post_edit', [POST_ID], f'/posts/{POST_ID}/edit/'),
     ('add_comment', [POST_ID], f'/posts/{POST_ID}/comment/'),
+    ('post_comments', [POST_ID], f'/posts/{POST_ID}/comments/'),
+    ('search', [], '/search/'),
+    ('popular', [], '/popular/'),
+    ('site_export', [], '/export/'),
     ('follow_index', [], '/follow/'),
+    ('follow_many', [], '/follow/many/'),
     ('profile_follow', [USERNAME], f'/profile/{USERNAME}/follow/'),
     ('profile_unfollow', [USERNAME], f'/profile/{USERNAME}/unfollow/'),
 )
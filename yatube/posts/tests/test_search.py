@@ -0,0 +1,116 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.tasks import run_pending
+
+from ..models import Comment, Post, SearchEntry, User
+from ..search import search
+from ..settings import POSTS_PER_PAGE
+
+USERNAME = 'UserTest'
+ADMIN_USERNAME = 'Admin'
+SEARCH_URL = reverse('posts:search')
+ADMIN_POSTS_URL = reverse('admin:posts_post_changelist')
+ADMIN_COMMENTS_URL = reverse('admin:posts_comment_changelist')
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.admin = User.objects.create_superuser(
+            username=ADMIN_USERNAME, password='password'
+        )
+        cls.cats = Post.objects.create(
+            text='Кошки любят коробки. Коробка для кошки — дом.',
+            author=cls.user
+        )
+        cls.box = Post.objects.create(
+            text='Новая коробка приехала вчера.',
+            author=cls.user
+        )
+        cls.dogs = Post.objects.create(text='Собаки гуляют', author=cls.user)
+        cls.comment = Comment.objects.create(
+            post=cls.dogs,
+            author=cls.user,
+            text='А мои кошки спят в коробке'
+        )
+        run_pending()
+        cls.guest = Client()
+        cls.staff = Client()
+        cls.staff.force_login(cls.admin)
+
+    def test_stemming_and_ranking(self):
+        """Разные формы слова находятся, пост весит больше комментария."""
+        self.assertEqual(list(search('КОШКАМИ').order_by('-rank')), [
+            self.cats, self.dogs
+        ])
+        self.assertEqual(
+            set(search('коробками')), {self.cats, self.box, self.dogs}
+        )
+        self.assertEqual(set(search('кошка коробка')), {self.cats, self.dogs})
+        self.assertEqual(list(search('  ')), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении документов."""
+        self.dogs.text = 'Собаки и кошки'
+        self.dogs.save()
+        self.assertEqual(set(search('собака')), {self.dogs})
+        run_pending()
+        self.assertEqual(set(search('собака')), {self.dogs})
+        comment_id = self.comment.pk
+        self.comment.delete()
+        self.assertEqual(set(search('спят')), set())
+        self.assertFalse(
+            SearchEntry.objects.filter(comment=comment_id).exists()
+        )
+        Post.objects.bulk_create([Post(text='Коробка', author=self.user)])
+        self.assertEqual(search('коробка').count(), 3)
+
+    def test_search_view_paginates_ranked_results(self):
+        """Страница поиска отдаёт результаты по рангу постранично."""
+        Post.objects.bulk_create(
+            Post(text='коробка ' * (i + 1), author=self.user)
+            for i in range(POSTS_PER_PAGE)
+        )
+        response = self.guest.get(SEARCH_URL, {'q': 'коробка'})
+        page = response.context['page_obj']
+        ranks = [post.rank for post in page]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertEqual(page.paginator.count, POSTS_PER_PAGE + 3)
+        cursor = page.paginator.next_cursor
+        self.assertContains(response, '?q=%D0%BA')
+        response = self.guest.get(
+            SEARCH_URL, {'q': 'коробка', 'cursor': cursor}
+        )
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_search_view_without_words(self):
+        """Пустой запрос и запрос из одних коротких слов не ломают поиск."""
+        for params in ({}, {'q': 'я'}):
+            with self.subTest(params=params):
+                response = self.guest.get(SEARCH_URL, params)
+                self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_admin_uses_index(self):
+        """Поиск в админке идёт по индексу постов и комментариев."""
+        response = self.staff.get(ADMIN_POSTS_URL, {'q': 'кошки'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.cats]
+        )
+        response = self.staff.get(ADMIN_COMMENTS_URL, {'q': 'кошки'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.comment]
+        )
+
+    def test_rebuild_search_index_command(self):
+        """Команда rebuild_search_index восстанавливает индекс."""
+        SearchEntry.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(
+            set(search('коробка')), {self.cats, self.box, self.dogs}
+        )
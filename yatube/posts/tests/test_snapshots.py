@@ -0,0 +1,142 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import run_pending
+
+from ..models import Group, Post, User
+
+USERNAME = 'UserTest'
+SLUG = 'test-slug'
+MAIN_URL = reverse('posts:index')
+
+
+class PostSnapshotTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=USERNAME,
+            first_name='Лев',
+            last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовое сообщество',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.user,
+            group=cls.group
+        )
+        cls.guest = Client()
+
+    def setUp(self):
+        cache.clear()
+
+    def assertSnapshot(self, post, username, full_name, slug, title):
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.author_username, post.author_full_name,
+             post.group_slug, post.group_title),
+            (username, full_name, slug, title)
+        )
+
+    def snapshot_tasks(self):
+        return Task.objects.filter(name__startswith='posts.snapshots.')
+
+    def post_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest.get(MAIN_URL)
+        return response, [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT "posts_post"."id"')
+        ]
+
+    def test_save_and_bulk_create_fill_snapshot(self):
+        """Снимок заполняется при сохранении и массовом создании."""
+        self.assertSnapshot(
+            self.post, USERNAME, 'Лев Толстой', SLUG, 'Тестовое сообщество'
+        )
+        post, = Post.objects.bulk_create([Post(
+            text='Пост пачкой',
+            author_id=self.user.pk,
+            group_id=self.group.pk
+        )])
+        self.assertSnapshot(
+            post, USERNAME, 'Лев Толстой', SLUG, 'Тестовое сообщество'
+        )
+        post.group = None
+        post.save()
+        self.assertSnapshot(post, USERNAME, 'Лев Толстой', '', '')
+
+    def test_feed_reads_post_table_only(self):
+        """Лента читается одним запросом к таблице постов без JOIN."""
+        response, queries = self.post_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('JOIN', queries[0])
+        self.assertContains(response, f'/profile/{USERNAME}/')
+        self.assertContains(response, '@Лев Толстой')
+        self.assertContains(response, '#Тестовое сообщество')
+
+    @mock.patch('posts.models.FEED_SNAPSHOTS', False)
+    def test_feed_joins_without_snapshots(self):
+        """Без FEED_SNAPSHOTS автор и сообщество подтягиваются JOIN."""
+        response, queries = self.post_queries()
+        self.assertIn('JOIN', queries[0])
+        self.assertContains(response, '@Лев Толстой')
+
+    def test_rename_is_refreshed_by_background_task(self):
+        """Переименования догоняют фоновые задачи, по одной на объект."""
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Алексей'
+        user.save()
+        user.last_name = 'Толстой-младший'
+        user.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        self.assertEqual(self.snapshot_tasks().count(), 2)
+        self.assertSnapshot(
+            self.post, USERNAME, 'Лев Толстой', SLUG, 'Тестовое сообщество'
+        )
+        run_pending()
+        self.assertFalse(self.snapshot_tasks().exists())
+        self.assertSnapshot(
+            self.post,
+            USERNAME,
+            'Алексей Толстой-младший',
+            SLUG,
+            'Новое название'
+        )
+        self.assertContains(
+            self.guest.get(MAIN_URL), '@Алексей Толстой-младший'
+        )
+
+    def test_unrelated_user_save_is_ignored(self):
+        """Сохранение без смены имён не ставит обновление."""
+        user = User.objects.get(pk=self.user.pk)
+        user.save(update_fields=['last_login'])
+        user.save()
+        self.assertFalse(self.snapshot_tasks().exists())
+
+    def test_backfill_fills_missing_snapshots(self):
+        """backfill_snapshots заполняет снимки постов в обход модели."""
+        Post.objects.update(
+            author_username='',
+            author_full_name='',
+            group_slug='',
+            group_title=''
+        )
+        call_command('backfill_snapshots', stdout=StringIO())
+        self.assertSnapshot(
+            self.post, USERNAME, 'Лев Толстой', SLUG, 'Тестовое сообщество'
+        )
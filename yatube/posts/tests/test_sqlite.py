@@ -0,0 +1,26 @@
+from core.db import apply_sqlite_pragmas
+from django.db import connection
+from django.test import TestCase, override_settings
+
+CACHE_SIZE = -2048
+
+
+class SqlitePragmasTest(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'cache_size': CACHE_SIZE})
+    def test_pragmas_applied_to_connection(self):
+        """Обработчик connection_created выставляет PRAGMA из настроек."""
+        apply_sqlite_pragmas(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], CACHE_SIZE)
+
+    def test_production_profile_enables_wal_and_reuse(self):
+        """Профиль settings_production включает WAL и CONN_MAX_AGE."""
+        from yatube import settings_production
+
+        self.assertEqual(
+            settings_production.SQLITE_PRAGMAS['journal_mode'], 'WAL'
+        )
+        self.assertGreater(
+            settings_production.DATABASES['default']['CONN_MAX_AGE'], 0
+        )
@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, User, UserStats
+from ..stats import for_user
+
+USERNAME = 'UserTest'
+FOLLOWER_USERNAME = 'Follower'
+USER_URL = reverse('posts:profile', args=[USERNAME])
+
+
+class UserStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.follower = User.objects.create_user(username=FOLLOWER_USERNAME)
+        cls.guest = Client()
+
+    def assertStats(self, user, **expected):
+        stats = UserStats.objects.get(pk=user.pk)
+        for field, value in expected.items():
+            with self.subTest(user=user, field=field):
+                self.assertEqual(getattr(stats, field), value)
+
+    def test_counters_follow_create_and_delete(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        post = Post.objects.create(text='Тестовый пост', author=self.user)
+        Comment.objects.create(post=post, author=self.follower, text='Да')
+        follow = Follow.objects.create(user=self.follower, author=self.user)
+        self.assertStats(self.user, posts_count=1, followers_count=1)
+        self.assertStats(self.follower, comments_count=1, follows_count=1)
+        follow.delete()
+        post.delete()
+        self.assertStats(self.user, posts_count=0, followers_count=0)
+        self.assertStats(self.follower, comments_count=0, follows_count=0)
+
+    def test_counters_follow_bulk_create_and_queryset_delete(self):
+        """Массовые операции тоже учитываются."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.user) for i in range(5)
+        )
+        self.assertStats(self.user, posts_count=5)
+        Post.objects.filter(
+            pk__in=Post.objects.values('pk')[:2]
+        ).delete()
+        self.assertStats(self.user, posts_count=3)
+
+    def test_counters_follow_cascade(self):
+        """Удаление пользователя обновляет счётчики его подписчиков."""
+        author = User.objects.create_user(username='Temporary')
+        Follow.objects.create(user=self.follower, author=author)
+        self.assertStats(self.follower, follows_count=1)
+        author.delete()
+        self.assertStats(self.follower, follows_count=0)
+        self.assertFalse(UserStats.objects.filter(pk=author.pk).exists())
+
+    def test_recount_stats_command_fixes_drift(self):
+        """Команда recount_stats находит и исправляет расхождения."""
+        Post.objects.create(text='Тестовый пост', author=self.user)
+        for_user(self.follower)
+        UserStats.objects.filter(pk=self.user.pk).update(posts_count=42)
+        out = StringIO()
+        call_command('recount_stats', '--check', stdout=out)
+        self.assertIn('Расхождений: 1', out.getvalue())
+        self.assertStats(self.user, posts_count=42)
+        call_command('recount_stats', stdout=StringIO())
+        self.assertStats(self.user, posts_count=1)
+
+    def test_profile_reads_stats_row(self):
+        """Профиль показывает счётчики из записи статистики."""
+        Post.objects.create(text='Тестовый пост', author=self.user)
+        UserStats.objects.filter(pk=self.user.pk).delete()
+        response = self.guest.get(USER_URL)
+        self.assertEqual(response.context['stats'], for_user(self.user))
+        self.assertContains(response, 'Всего постов: 1,')
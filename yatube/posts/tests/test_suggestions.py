@@ -0,0 +1,197 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.tasks import run_pending
+
+from ..models import (Follow, FollowSuggestions, Post, TimelineEntry, User,
+                      UserStats)
+from ..settings import SUGGESTIONS_TIMEOUT
+from ..suggestions import compute, for_user, refresh
+
+READER_USERNAME = 'Reader'
+FOLLOW_URL = reverse('posts:follow_index')
+FOLLOW_MANY_URL = reverse('posts:follow_many')
+
+
+class SuggestionsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username=READER_USERNAME)
+        cls.friend, cls.other_friend, cls.neighbour, cls.popular, \
+            cls.cofollowed = (
+                User.objects.create_user(username=name) for name in (
+                    'Friend', 'OtherFriend', 'Neighbour', 'Popular',
+                    'Cofollowed'
+                )
+            )
+        Follow.objects.bulk_create([
+            Follow(user=cls.reader, author=cls.friend),
+            Follow(user=cls.reader, author=cls.other_friend),
+            Follow(user=cls.friend, author=cls.popular),
+            Follow(user=cls.other_friend, author=cls.popular),
+            Follow(user=cls.friend, author=cls.other_friend),
+            Follow(user=cls.friend, author=cls.reader),
+            Follow(user=cls.neighbour, author=cls.friend),
+            Follow(user=cls.neighbour, author=cls.cofollowed),
+        ])
+        run_pending()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_scores_friends_of_friends_and_co_follows(self):
+        """Друзья друзей весят больше совместных подписок.
+
+        Себя и уже читаемых авторов в подсказках нет.
+        """
+        self.assertEqual(
+            compute([self.reader.pk]),
+            {self.reader.pk: [
+                self.popular.pk,
+                self.cofollowed.pk,
+            ]}
+        )
+
+    @mock.patch('posts.suggestions.FANOUT_FOLLOWERS_LIMIT', 1)
+    def test_popular_common_authors_are_skipped(self):
+        """Общий автор с множеством подписчиков не даёт совместных подписок.
+        """
+        self.assertEqual(
+            compute([self.reader.pk])[self.reader.pk],
+            [self.popular.pk]
+        )
+
+    def test_batch_matches_single_user(self):
+        """Расчёт пачкой совпадает с расчётом по одному."""
+        users = [self.reader, self.friend, self.neighbour]
+        batch = compute([user.pk for user in users])
+        for user in users:
+            with self.subTest(user=user.username):
+                self.assertEqual(batch[user.pk], compute([user.pk])[user.pk])
+
+    def test_missing_suggestions_enqueue_refresh(self):
+        """Без сохранённых подсказок запрос их не считает, а ставит задачу.
+
+        Посчитанные воркером подсказки видны и без кеша, а новых задач
+        страница больше не ставит.
+        """
+        FollowSuggestions.objects.all().delete()
+        self.assertEqual(for_user(self.reader), [])
+        self.assertEqual(run_pending(), 1)
+        cache.clear()
+        self.assertEqual(for_user(self.reader), [
+            self.popular,
+            self.cofollowed,
+        ])
+        self.client.force_login(self.reader)
+        self.client.get(FOLLOW_URL)
+        self.assertEqual(run_pending(), 0)
+
+    def test_stale_suggestions_are_shown_and_refreshed(self):
+        """Устаревшие подсказки показываются, пока задача их пересчитывает."""
+        refresh([self.reader.pk])
+        FollowSuggestions.objects.update(
+            refreshed=timezone.now() - timedelta(
+                seconds=SUGGESTIONS_TIMEOUT + 1
+            )
+        )
+        self.assertEqual(len(for_user(self.reader)), 2)
+        self.assertEqual(run_pending(), 1)
+        self.assertGreater(
+            FollowSuggestions.objects.get(pk=self.reader.pk).refreshed,
+            timezone.now() - timedelta(seconds=SUGGESTIONS_TIMEOUT)
+        )
+
+    def test_cached_list_skips_new_follows(self):
+        """Закешированные подсказки не предлагают только что читаемых."""
+        refresh([self.reader.pk])
+        Follow.objects.create(user=self.reader, author=self.popular)
+        with self.assertNumQueries(2):
+            self.assertNotIn(self.popular, for_user(self.reader))
+
+    def test_follows_refresh_suggestions_of_followers(self):
+        """Подписка пересчитывает подсказки пользователя и его читателей."""
+        author = User.objects.create_user(username='NewAuthor')
+        refresh([self.neighbour.pk])
+        self.assertNotIn(author, for_user(self.neighbour))
+        Follow.objects.create(user=self.friend, author=author)
+        run_pending()
+        with self.assertNumQueries(2):
+            self.assertIn(author, for_user(self.neighbour))
+
+    def test_refresh_suggestions_command(self):
+        """refresh_suggestions пересчитывает всех, у кого есть подписки."""
+        out = StringIO()
+        call_command('refresh_suggestions', stdout=out)
+        self.assertIn('Пересчитано подсказок: 4', out.getvalue())
+        with self.assertNumQueries(2):
+            for_user(self.reader)
+
+
+class BulkFollowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username=READER_USERNAME)
+        cls.authors = [
+            User.objects.create_user(username=f'Author{i}') for i in range(3)
+        ]
+        cls.post = Post.objects.create(text='Пост', author=cls.authors[0])
+        cls.client_reader = Client()
+        cls.client_reader.force_login(cls.reader)
+
+    def test_follow_skips_existing_and_self(self):
+        """Повторная подписка и подписка на себя не создают строк."""
+        Follow.objects.follow(self.reader, [self.authors[0].pk])
+        Follow.objects.follow(self.reader, [
+            author.pk for author in self.authors
+        ] + [self.reader.pk])
+        self.assertEqual(
+            set(Follow.objects.filter(user=self.reader).values_list(
+                'author_id', flat=True
+            )),
+            {author.pk for author in self.authors}
+        )
+        self.assertEqual(
+            UserStats.objects.get(pk=self.reader.pk).follows_count, 3
+        )
+        self.assertEqual(
+            UserStats.objects.get(pk=self.authors[0].pk).followers_count, 1
+        )
+
+    def test_bulk_follow_fills_timeline(self):
+        """Пачка подписок попадает в ленту сразу и в записи после воркера."""
+        Follow.objects.follow(self.reader, [self.authors[0].pk])
+        response = self.client_reader.get(FOLLOW_URL)
+        self.assertEqual(list(response.context['page_obj']), [self.post])
+        run_pending()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader,
+            post=self.post
+        ).exists())
+
+    def test_follow_many_view(self):
+        """Форма подсказок подписывает на всех выбранных авторов."""
+        response = self.client_reader.post(FOLLOW_MANY_URL, {
+            'authors': [author.pk for author in self.authors[:2]],
+        })
+        self.assertRedirects(response, FOLLOW_URL)
+        self.assertEqual(
+            Follow.objects.filter(user=self.reader).count(),
+            2
+        )
+
+    def test_follow_many_rejects_unknown_authors(self):
+        """Несуществующий автор делает форму недействительной."""
+        self.client_reader.post(FOLLOW_MANY_URL, {
+            'authors': [self.authors[0].pk, 10 ** 6],
+        })
+        self.assertFalse(Follow.objects.filter(user=self.reader).exists())
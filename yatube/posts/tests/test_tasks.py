@@ -0,0 +1,142 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+from ..models import Follow, Post, User
+
+USERNAME = 'UserTest'
+AUTHOR_USERNAME = 'Author'
+CREATE_URL = reverse('posts:post_create')
+FOLLOW_URL = reverse('posts:profile_follow', args=[AUTHOR_USERNAME])
+
+calls = []
+
+
+@tasks.task
+def remember(value):
+    calls.append(value)
+
+
+@tasks.task
+def explode():
+    raise RuntimeError('сбой задачи')
+
+
+def not_a_task():
+    pass
+
+
+@override_settings(TASK_MAX_ATTEMPTS=2, TASK_RETRY_DELAY=10)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_key_deduplicates_waiting_tasks(self):
+        """Задача с тем же ключом не дублируется, пока ждёт в очереди."""
+        tasks.enqueue(remember, 1, key='remember')
+        tasks.enqueue(remember, 2, key='remember')
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(calls, [1])
+        tasks.enqueue(remember, 3, key='remember')
+        tasks.run_pending()
+        self.assertEqual(calls, [1, 3])
+        self.assertFalse(Task.objects.exists())
+
+    def test_claimed_task_releases_key(self):
+        """Взятая воркером задача освобождает ключ для новой."""
+        tasks.enqueue(remember, 1, key='remember')
+        claimed = tasks.claim(10)
+        self.assertEqual(tasks.claim(10), [])
+        tasks.enqueue(remember, 2, key='remember')
+        self.assertEqual(Task.objects.count(), 2)
+        tasks.execute(claimed[0])
+        self.assertEqual(calls, [1])
+
+    def test_failed_task_is_retried_then_given_up(self):
+        """Упавшая задача повторяется с паузой, затем помечается failed."""
+        tasks.enqueue(explode)
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.assertEqual(tasks.run_pending(), 0)
+        entry = Task.objects.get()
+        self.assertEqual(entry.attempts, 1)
+        self.assertFalse(entry.failed)
+        self.assertIn('сбой задачи', entry.error)
+        self.assertGreater(entry.run_after, timezone.now())
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.update(run_after=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            tasks.run_pending()
+        entry = Task.objects.get()
+        self.assertEqual(entry.attempts, 2)
+        self.assertTrue(entry.failed)
+        Task.objects.update(run_after=timezone.now())
+        self.assertEqual(tasks.claim(10), [])
+
+    def test_expired_lease_is_claimed_again(self):
+        """Задачу умершего воркера после конца аренды берёт другой."""
+        tasks.enqueue(remember, 1)
+        tasks.claim(10)
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertEqual(len(tasks.claim(10)), 1)
+
+    def test_only_marked_functions_are_enqueued(self):
+        """Поставить можно только функцию, помеченную @task."""
+        with self.assertRaises(ValueError):
+            tasks.enqueue(not_a_task)
+
+    def test_run_workers_command(self):
+        """run_workers --once выполняет очередь и сообщает итог."""
+        tasks.enqueue(remember, 1)
+        tasks.enqueue(explode)
+        out = StringIO()
+        with self.assertLogs('core.tasks', 'ERROR'):
+            call_command('run_workers', '--once', '--workers=0', stdout=out)
+        self.assertIn('Выполнено задач: 1, с ошибкой: 1', out.getvalue())
+        self.assertEqual(calls, [1])
+
+
+class WriteViewsEnqueueTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.author = User.objects.create_user(username=AUTHOR_USERNAME)
+        Post.objects.create(text='Пост автора', author=cls.author)
+        tasks.run_pending()
+        cls.authorized = Client()
+        cls.authorized.force_login(cls.user)
+
+    def test_views_only_enqueue_side_effects(self):
+        """Запись ставит рассылку и индексацию в очередь, не выполняя их."""
+        with mock.patch('posts.timeline.fan_out') as fan_out, \
+                mock.patch('posts.search.index_posts') as index_posts:
+            self.authorized.post(CREATE_URL, {'text': 'Новый пост'})
+            self.authorized.get(FOLLOW_URL)
+        fan_out.assert_not_called()
+        index_posts.assert_not_called()
+        self.assertEqual(
+            sorted(Task.objects.values_list('name', flat=True)),
+            [
+                'posts.search.index_post',
+                'posts.suggestions.refresh_around',
+                'posts.timeline.fan_out_post',
+                'posts.timeline.sync_follow',
+            ]
+        )
+        follow = Follow.objects.get(user=self.user, author=self.author)
+        self.assertTrue(follow.timeline_pending)
+        self.assertEqual(tasks.run_pending(), 4)
+        follow.refresh_from_db()
+        self.assertFalse(follow.timeline_pending)
+        self.assertFalse(
+            Post.objects.filter(timeline_pending=True).exists()
+        )
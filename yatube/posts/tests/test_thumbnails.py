@@ -0,0 +1,164 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default, get_thumbnail
+
+from core.models import Task
+
+from ..models import Post, User
+from ..settings import THUMBNAIL_GEOMETRY, THUMBNAIL_OPTIONS
+from ..thumbnails import resolve, thumbnail_file
+
+USERNAME = 'UserTest'
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+PLACEHOLDER = 'img/thumbnail-placeholder.svg'
+MAIN_URL = reverse('posts:index')
+
+
+def uploaded(name='small.gif'):
+    return SimpleUploadedFile(
+        name=name,
+        content=SMALL_GIF,
+        content_type='image/gif'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.guest = Client()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def run_worker(self):
+        out = StringIO()
+        call_command('run_workers', '--once', '--workers=0', stdout=out)
+        return out.getvalue()
+
+    def test_placeholder_until_worker_finishes(self):
+        """До обработки показывается заглушка, после — готовая миниатюра."""
+        post = Post.objects.create(
+            text='Пост с картинкой', author=self.user, image=uploaded()
+        )
+        self.assertTrue(post.thumbnail_pending)
+        url = reverse('posts:post_detail', args=[post.pk])
+        self.assertContains(self.guest.get(url), PLACEHOLDER)
+        self.assertIn('с ошибкой: 0', self.run_worker())
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnail_pending)
+        self.assertEqual(
+            (post.thumbnail_width, post.thumbnail_height), (960, 339)
+        )
+        response = self.guest.get(url)
+        self.assertContains(response, post.thumbnail_url)
+        self.assertNotContains(response, PLACEHOLDER)
+
+    def test_new_image_requeues_thumbnail(self):
+        """Замена изображения сбрасывает миниатюру, правка текста — нет."""
+        post = Post.objects.create(
+            text='Пост с картинкой', author=self.user, image=uploaded()
+        )
+        self.run_worker()
+        post = Post.objects.get(pk=post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertFalse(post.thumbnail_pending)
+        self.assertNotEqual(post.thumbnail_url, '')
+        post.image = uploaded('other.gif')
+        post.save()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_pending)
+        self.assertEqual(post.thumbnail_url, '')
+
+    def test_broken_image_fails_without_placeholder(self):
+        """Нечитаемое изображение не ждёт миниатюру вечно под заглушкой."""
+        post = Post.objects.create(
+            text='Пост с битой картинкой',
+            author=self.user,
+            image=SimpleUploadedFile('broken.gif', b'not a gif', 'image/gif')
+        )
+        with self.assertLogs('posts.thumbnails', 'WARNING'):
+            self.assertIn('с ошибкой: 0', self.run_worker())
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnail_pending)
+        self.assertTrue(post.thumbnail_failed)
+        self.assertEqual(post.thumbnail_url, '')
+        self.assertNotContains(
+            self.guest.get(reverse('posts:post_detail', args=[post.pk])),
+            PLACEHOLDER
+        )
+
+    def test_storage_errors_are_retried(self):
+        """Сбой хранилища не помечает пост: задача повторится позже."""
+        post = Post.objects.create(
+            text='Пост с картинкой', author=self.user, image=uploaded()
+        )
+        with mock.patch(
+            'posts.thumbnails.get_thumbnail',
+            side_effect=OSError('Хранилище недоступно')
+        ), self.assertLogs('core.tasks', 'ERROR'):
+            self.run_worker()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail_pending)
+        self.assertFalse(post.thumbnail_failed)
+        task = Task.objects.get(name='posts.thumbnails.generate')
+        self.assertEqual(task.attempts, 1)
+        self.assertFalse(task.failed)
+
+    def test_posts_without_image_are_not_queued(self):
+        """Посты без изображения в очередь не попадают."""
+        Post.objects.create(text='Пост без картинки', author=self.user)
+        self.assertFalse(
+            Task.objects.filter(name='posts.thumbnails.generate').exists()
+        )
+
+    def test_resolve_uses_existing_sorl_thumbnails(self):
+        """Готовые миниатюры sorl подставляются пачкой до работы пула."""
+        posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=self.user, image=uploaded()
+            )
+            for i in range(3)
+        ]
+        made = [
+            get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+            for post in posts
+        ]
+        self.assertEqual(
+            [thumbnail_file(post.image).name for post in posts],
+            [thumbnail.name for thumbnail in made]
+        )
+        default.kvstore._local.clear()
+        default.kvstore.cache.clear()
+        with self.assertNumQueries(1):
+            resolve(posts)
+        fresh = Post.objects.get(pk=posts[0].pk)
+        with self.assertNumQueries(0):
+            resolve([fresh])
+        self.assertEqual(fresh.thumbnail_url, made[0].url)
+        self.assertEqual(
+            [post.thumbnail_url for post in posts],
+            [thumbnail.url for thumbnail in made]
+        )
+        self.assertContains(self.guest.get(MAIN_URL), made[0].url)
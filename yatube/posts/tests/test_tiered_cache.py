@@ -0,0 +1,104 @@
+from io import StringIO
+
+from core.cache import TieredCache
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from yatube.cache_profiles import DEFAULT_PROFILE, caches_for
+
+from ..feed_cache import bump, version_key
+from ..models import Post, User
+
+USERNAME = 'UserTest'
+MAIN_URL = reverse('posts:index')
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TieredCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': 2,
+            'SHARED_ONLY_PREFIXES': ('feed-version:',),
+            'STATS_FLUSH_EVERY': 1,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tiered-cache-test',
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+class TieredCacheTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def another_process(self):
+        """Второй экземпляр с пустым LRU, как в соседнем процессе."""
+        return TieredCache('shared', CACHES['default'])
+
+    def test_local_tier_and_lru_bound(self):
+        """Значения читаются из памяти процесса, LRU ограничен."""
+        cache = caches['default']
+        cache.set('a', 1)
+        caches['shared'].delete('a')
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+        self.assertEqual(len(cache._local), 2)
+        self.assertIsNone(cache.get('a'))
+
+    def test_processes_share_store_and_versions(self):
+        """Соседний процесс видит записи и новые метки поколений."""
+        self.another_process().set('fragment', 'html')
+        self.assertEqual(caches['default'].get('fragment'), 'html')
+        before = version_key('global')
+        other = self.another_process()
+        other.set('feed-version:global', 'new')
+        self.assertNotEqual(version_key('global'), before)
+        bump('global')
+        self.assertEqual(
+            other.get('feed-version:global'),
+            caches['default'].get('feed-version:global')
+        )
+
+    def test_stats_are_reported(self):
+        """Команда cache_stats складывает счётчики всех процессов."""
+        cache = caches['default']
+        cache.set('key', 'value')
+        cache.get('key')
+        cache.get('missing')
+        self.another_process().get('key')
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+        self.assertIn('local_hits: 1', out.getvalue())
+        self.assertIn('shared_hits: 1', out.getvalue())
+        self.assertIn('misses: 1', out.getvalue())
+
+    def test_pages_render_through_tiered_cache(self):
+        """Ленты работают поверх двухуровневого кеша."""
+        user = User.objects.create_user(username=USERNAME)
+        Post.objects.create(text='Тестовый пост', author=user)
+        self.assertContains(Client().get(MAIN_URL), 'Тестовый пост')
+        self.assertContains(Client().get(MAIN_URL), 'Тестовый пост')
+
+
+class CacheProfilesTest(TestCase):
+    def test_shared_profiles_are_tiered(self):
+        """Общие профили подключаются за LRU процесса."""
+        for profile, backend in (
+            ('file', 'FileBasedCache'),
+            ('db', 'DatabaseCache'),
+            ('redis://localhost:6379/0', 'RedisCache'),
+            ('memcached://localhost:11211', 'PyMemcacheCache'),
+        ):
+            with self.subTest(profile=profile):
+                config = caches_for(profile, '/tmp')
+                self.assertEqual(
+                    config['default']['BACKEND'], 'core.cache.TieredCache'
+                )
+                self.assertTrue(config['shared']['BACKEND'].endswith(backend))
+        self.assertNotIn('shared', caches_for('locmem', '/tmp'))
+        # Воркеры задач ставят метки лент: по умолчанию кеш общий.
+        self.assertIn('shared', caches_for(DEFAULT_PROFILE, '/tmp'))
@@ -0,0 +1,154 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.tasks import run_pending
+
+from ..models import Follow, Post, TimelineEntry, User
+from ..paginators import KeysetPaginator
+from ..settings import POSTS_PER_PAGE
+from ..timeline import FEED_KEYS, feed_for, merged_for
+
+AUTHOR_USERNAME = 'Author'
+FOLLOWER_USERNAME = 'Follower'
+FOLLOW_URL = reverse('posts:follow_index')
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.follower = User.objects.create_user(username=FOLLOWER_USERNAME)
+        cls.old_post = Post.objects.create(
+            text='Старый пост',
+            author=cls.author
+        )
+
+    def feed(self):
+        """Первая страница ленты подписок, как её читает представление."""
+        return list(KeysetPaginator(
+            feed_for(self.follower),
+            POSTS_PER_PAGE,
+            keys=FEED_KEYS,
+            merge=merged_for(self.follower)
+        ).page(1))
+
+    def entries(self):
+        return set(TimelineEntry.objects.filter(
+            user=self.follower
+        ).values_list('post_id', flat=True))
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка дополняет ленту, отписка очищает её.
+
+        Новая подписка видна сразу, до того как воркер обновит записи,
+        а отписка — когда он удалит записи автора.
+        """
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        self.assertEqual(self.feed(), [self.old_post])
+        run_pending()
+        self.assertEqual(self.entries(), {self.old_post.pk})
+        self.assertFalse(Follow.objects.get(pk=follow.pk).timeline_pending)
+        follow.delete()
+        run_pending()
+        self.assertEqual(self.entries(), set())
+        self.assertEqual(self.feed(), [])
+
+    def test_unfollow_refreshes_cached_feed(self):
+        """Лента из кеша фрагмента не показывает автора после отписки.
+
+        Первая страница после отписки кешируется, пока записи автора
+        ещё в ленте; очистка ленты воркером делает этот фрагмент
+        устаревшим.
+        """
+        cache.clear()
+        client = Client()
+        client.force_login(self.follower)
+        client.get(reverse('posts:profile_follow', args=[AUTHOR_USERNAME]))
+        post = Post.objects.create(
+            text='Пост после подписки',
+            author=self.author
+        )
+        run_pending()
+        self.assertContains(client.get(FOLLOW_URL), post.text)
+        client.get(reverse('posts:profile_unfollow', args=[AUTHOR_USERNAME]))
+        client.get(FOLLOW_URL)
+        run_pending()
+        self.assertNotContains(client.get(FOLLOW_URL), post.text)
+
+    def test_new_posts_fan_out_to_followers(self):
+        """Новые посты, в том числе пачкой, попадают в ленты подписчиков."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        bulk = Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author) for i in range(3)
+        )
+        self.assertEqual(
+            self.feed(),
+            list(Post.objects.filter(author=self.author))
+        )
+        run_pending()
+        self.assertEqual(
+            self.entries(),
+            {self.old_post.pk, post.pk, *(p.pk for p in bulk)}
+        )
+        self.assertEqual(
+            self.feed(),
+            list(Post.objects.filter(author=self.author))
+        )
+
+    @mock.patch('posts.timeline.FANOUT_FOLLOWERS_LIMIT', 0)
+    def test_heavy_authors_are_read_on_demand(self):
+        """Посты популярных авторов не рассылаются, а читаются из таблицы."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        run_pending()
+        self.assertEqual(self.entries(), set())
+        self.assertEqual(
+            set(self.feed()),
+            {self.old_post, post}
+        )
+
+    @mock.patch('posts.timeline.FANOUT_FOLLOWERS_LIMIT', 1)
+    def test_cursor_pages_merge_entries_and_heavy_authors(self):
+        """Курсор идёт по записям и постам автора над порогом вперемешку."""
+        heavy = User.objects.create_user(username='Heavy')
+        fan = User.objects.create_user(username='Fan')
+        Follow.objects.bulk_create([
+            Follow(user=self.follower, author=self.author),
+            Follow(user=self.follower, author=heavy),
+            Follow(user=fan, author=heavy),
+        ])
+        for i in range(5):
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+            Post.objects.create(text=f'Пост {i}', author=heavy)
+        run_pending()
+        self.assertEqual(len(self.entries()), 6)
+        pages, cursor = [], None
+        while True:
+            paginator = KeysetPaginator(
+                feed_for(self.follower),
+                3,
+                keys=FEED_KEYS,
+                merge=merged_for(self.follower)
+            )
+            pages.extend(paginator.get_page(cursor=cursor))
+            cursor = paginator.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(
+            pages,
+            list(Post.objects.filter(author__in=[self.author, heavy]))
+        )
+
+    def test_rebuild_timelines_command(self):
+        """Команда rebuild_timelines восстанавливает ленты."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', FOLLOWER_USERNAME, stdout=StringIO())
+        self.assertEqual(self.entries(), {self.old_post.pk})
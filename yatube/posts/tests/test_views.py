@@ -4,7 +4,9 @@ import tempfile
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..models import Follow, Group, Post, User
@@ -145,13 +147,28 @@ class PostModelTest(TestCase):
     def test_cache_index_page(self):
         """Проверка кеширования главной страницы"""
         response_first = self.author.get(MAIN_URL)
-        Post.objects.all().delete()
+        Post.objects.update(text='Изменено в обход сигналов')
         response_second = self.author.get(MAIN_URL)
         self.assertEqual(response_second.content, response_first.content)
         cache.clear()
         response_third = self.author.get(MAIN_URL)
         self.assertNotEqual(response_third.content, response_second.content)
 
+    def test_cache_index_page_invalidated_by_new_post(self):
+        """Новый пост сбрасывает кеш главной страницы без ожидания."""
+        self.author.get(MAIN_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(text='Совсем новый пост', author=self.user)
+        self.assertContains(self.author.get(MAIN_URL), 'Совсем новый пост')
+
+    def test_cache_follow_page_is_per_user(self):
+        """Кеш ленты подписок не отдаёт одному пользователю чужую ленту."""
+        Follow.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(user=self.follower, author=self.user)
+        self.assertContains(self.subscriber.get(FOLLOW_URL), self.post.text)
+        self.assertNotContains(self.another.get(FOLLOW_URL), self.post.text)
+
     def test_subscription_to_other_users_of_an_authorized_user(self):
         """Тест возможности подписки на других пользователей авторизованного
          пользователя."""
@@ -207,3 +224,33 @@ class PostModelTest(TestCase):
                 response = self.subscriber.get(page_url)
                 posts = response.context['page_obj']
                 self.assertEqual(len(posts), post_count)
+
+    def test_feed_query_count_does_not_depend_on_page_size(self):
+        """Число запросов ленты не зависит от количества постов на ней."""
+        Follow.objects.get_or_create(user=self.follower, author=self.user)
+        # Миниатюры изображений проверяются отдельно.
+        Post.objects.update(image='')
+        urls = (MAIN_URL, USER_URL, COMMUNITY_URL, FOLLOW_URL)
+
+        def count_queries(url):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.subscriber.get(url)
+            return len(queries)
+
+        single_post = {url: count_queries(url) for url in urls}
+        Post.objects.bulk_create(Post(
+            text=f'Тестовая запись текста {i} поста',
+            author=self.user,
+            group=self.group1,
+        ) for i in range(POSTS_PER_PAGE))
+        # Ленте из нескольких страниц нужно число постов для ссылок:
+        # при пустом кеше это один COUNT, а не запрос на пост. Профиль
+        # берёт число из счётчика автора, сообщество — из готовой первой
+        # страницы (posts.groups).
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    count_queries(url),
+                    single_post[url] + (url not in (USER_URL, COMMUNITY_URL))
+                )
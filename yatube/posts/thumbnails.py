@@ -0,0 +1,119 @@
+"""Миниатюры изображений постов, подготовленные заранее.
+
+При сохранении поста с новым изображением сигнал помечает его
+``thumbnail_pending`` и ставит фоновую задачу ``generate`` (``core.tasks``),
+которая нарезает миниатюру и записывает её адрес и размеры в сам пост. Шаблоны
+лент берут готовые поля и не трогают ни изображения, ни хранилище sorl.
+Постам, ещё ждущим в очереди, ``resolve`` подставляет уже нарезанные
+sorl миниатюры одним пакетным запросом к хранилищу.
+
+Изображение, которое не удаётся разобрать, помечается
+``thumbnail_failed`` навсегда. Прочие ошибки (хранилище, база) задача
+пробрасывает, и ``core.tasks`` повторяет её позже.
+"""
+import logging
+from io import BytesIO
+
+from core.tasks import task
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from . import feed_cache
+from .models import Post
+from .settings import THUMBNAIL_GEOMETRY, THUMBNAIL_OPTIONS
+
+logger = logging.getLogger(__name__)
+
+
+def thumbnail_file(image):
+    """Файл миниатюры, который ``get_thumbnail`` создал бы для ``image``.
+
+    Повторяет сборку опций из ``ThumbnailBackend.get_thumbnail``, чтобы
+    получить имя без обращения к изображению и хранилищу.
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(THUMBNAIL_OPTIONS)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return ImageFile(
+        backend._get_thumbnail_filename(source, THUMBNAIL_GEOMETRY, options),
+        default.storage
+    )
+
+
+def resolve(posts):
+    """Подставляет постам без миниатюры уже готовые, если они есть."""
+    waiting = [
+        (post, thumbnail_file(post.image))
+        for post in posts
+        if post.image and not post.thumbnail_url and not post.thumbnail_failed
+    ]
+    if not waiting:
+        return
+    found = default.kvstore.get_many(file for _, file in waiting)
+    for post, file in waiting:
+        thumbnail = found.get(file.key)
+        if thumbnail is not None:
+            post.thumbnail_url = thumbnail.url
+            post.thumbnail_width, post.thumbnail_height = thumbnail.size
+
+
+def decode_error(image):
+    """Ошибка разбора изображения или ``None``.
+
+    Файл сначала читается целиком: ошибки хранилища не выдаются
+    за битое изображение и пробрасываются.
+    """
+    with image.open('rb'):
+        data = image.read()
+    try:
+        with Image.open(BytesIO(data)) as source:
+            source.load()
+    except (OSError, SyntaxError, ValueError,
+            Image.DecompressionBombError) as error:
+        return error
+    return None
+
+
+@task
+def generate(post_id):
+    """Готовит миниатюру поста; возвращает, удалось ли её сохранить."""
+    post = Post.objects.filter(pk=post_id, thumbnail_pending=True).only(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None:
+        return False
+    fields = {'thumbnail_pending': False}
+    error = decode_error(post.image)
+    if error is not None:
+        logger.warning(
+            'Изображение поста %s не читается: %s', post_id, error
+        )
+        fields['thumbnail_failed'] = True
+    else:
+        thumbnail = get_thumbnail(
+            post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS
+        )
+        fields.update(
+            thumbnail_url=thumbnail.url,
+            thumbnail_width=thumbnail.width,
+            thumbnail_height=thumbnail.height
+        )
+    # Пока шла нарезка, изображение могли заменить: тогда запись
+    # не обновится, и пост останется в очереди с новым файлом.
+    updated = Post.objects.filter(
+        pk=post_id, image=post.image.name, thumbnail_pending=True
+    ).update(**fields)
+    if updated:
+        feed_cache.bump(*feed_cache.post_scopes([post]))
+    return bool(updated) and 'thumbnail_url' in fields
@@ -0,0 +1,219 @@
+"""Домашние ленты подписчиков с рассылкой постов при записи (fan-out).
+
+Пост автора копируется ссылкой в ``TimelineEntry`` каждого подписчика
+при публикации, при подписке лента дополняется постами автора, при
+отписке — очищается от них. Запись хранит дату поста, и страница ленты
+читается по индексу ``(user, -pub_date, -post)`` с ключом ``FEED_KEYS``.
+Посты авторов, у которых подписчиков больше ``FANOUT_FOLLOWERS_LIMIT``,
+не рассылаются: их, как и ждущие рассылки, подмешивает отдельный запрос
+``merged_for`` с тем же ключом и лимитом страницы.
+
+Рассылку выполняют фоновые задачи (``core.tasks``). Пока задача ждёт,
+пост или подписка помечены ``timeline_pending``, и лента подмешивает
+их при чтении — читатель видит новую подписку, не дожидаясь воркера.
+Посты автора, от которого отписались, уходят из ленты вместе с её
+записями, когда их удалит задача ``sync_follow``.
+"""
+from collections import defaultdict
+
+from core.tasks import enqueue, enqueue_many, task
+from django.db.models import Exists, F, OuterRef, Q
+
+from . import feed_cache
+from .models import Follow, Post, TimelineEntry, UserStats
+from .settings import FANOUT_FOLLOWERS_LIMIT, TIMELINE_BATCH_SIZE
+
+# Ключ ленты подписок берётся из записи, а не из поста: так и порядок,
+# и условие курсора обслуживает индекс записей пользователя.
+FEED_KEYS = ('feed_date', 'feed_id')
+
+
+def heavy_authors():
+    return UserStats.objects.filter(
+        followers_count__gt=FANOUT_FOLLOWERS_LIMIT
+    ).values('pk')
+
+
+def followers_of(author_ids):
+    """id подписчиков, в ленты которых рассылаются посты этих авторов."""
+    return Follow.objects.filter(author_id__in=author_ids).exclude(
+        author_id__in=heavy_authors()
+    ).values_list('user_id', flat=True)
+
+
+def feed_scopes(user):
+    """Области кеша (posts.feed_cache), от которых зависит лента."""
+    heavy = Follow.objects.filter(
+        user=user,
+        author_id__in=heavy_authors()
+    ).values_list('author_id', flat=True)
+    return [f'user:{user.pk}', *(f'author:{pk}' for pk in heavy)]
+
+
+def feed_for(user):
+    """Посты из записей ленты пользователя с ключом ``FEED_KEYS``."""
+    return Post.objects.filter(timeline_entries__user=user).annotate(
+        feed_date=F('timeline_entries__pub_date'),
+        feed_id=F('timeline_entries__post')
+    )
+
+
+def merged_for(user):
+    """Посты подписок, которых нет в записях ленты.
+
+    Это посты авторов над порогом и авторов, чьи посты ещё не добавлены
+    в ленту, и посты, ждущие рассылки.
+    """
+    follows = Follow.objects.filter(user=user)
+    return Post.objects.filter(
+        # Порог проверяется по счётчику каждого читаемого автора, а не
+        # выборкой всех авторов над порогом.
+        Q(author_id__in=follows.filter(
+            Q(author__stats__followers_count__gt=FANOUT_FOLLOWERS_LIMIT)
+            | Q(timeline_pending=True)
+        ).values('author_id'))
+        | Q(
+            timeline_pending=True,
+            author_id__in=follows.values('author_id')
+        )
+    ).annotate(
+        feed_date=F('pub_date'),
+        feed_id=F('id')
+    )
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for user_id, post_id, pub_date in entries),
+        batch_size=TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def fan_out(posts):
+    """Рассылает новые посты в ленты подписчиков их авторов."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append((post.pk, post.pub_date))
+    light = set(by_author) - set(
+        heavy_authors().filter(
+            pk__in=by_author
+        ).values_list('pk', flat=True)
+    )
+    follows = Follow.objects.filter(author_id__in=light).values_list(
+        'user_id', 'author_id'
+    )
+    _insert(
+        (user_id, post_id, pub_date)
+        for user_id, author_id in follows.iterator()
+        for post_id, pub_date in by_author[author_id]
+    )
+
+
+def backfill(author_id, follower_ids):
+    """Добавляет в ленты подписчиков все посты автора."""
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )
+    _insert(
+        (follower_id, post_id, pub_date)
+        for post_id, pub_date in posts.iterator()
+        for follower_id in follower_ids
+    )
+
+
+def post_created(post):
+    enqueue(fan_out_post, post.pk, key=f'timeline:post:{post.pk}')
+
+
+def follows_changed(follows):
+    enqueue_many(sync_follow, [
+        (
+            (follow.user_id, follow.author_id),
+            f'timeline:follow:{follow.user_id}:{follow.author_id}'
+        )
+        for follow in follows
+    ])
+
+
+def follow_deleted(follow):
+    follows_changed([follow])
+    if UserStats.objects.filter(
+        pk=follow.author_id,
+        followers_count=FANOUT_FOLLOWERS_LIMIT
+    ).exists():
+        # Автор только что перестал читаться «при чтении»: посты, которые
+        # он публиковал, пока был над порогом, нужно разослать.
+        enqueue(
+            backfill_followers,
+            follow.author_id,
+            key=f'timeline:followers:{follow.author_id}'
+        )
+
+
+@task
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id, timeline_pending=True).only(
+        'author_id', 'pub_date'
+    ).first()
+    if post is None:
+        return
+    fan_out([post])
+    Post.objects.filter(pk=post_id).update(timeline_pending=False)
+
+
+@task
+def sync_follow(user_id, author_id):
+    """Приводит ленту к текущей подписке: дополняет или очищает её."""
+    follow = Follow.objects.filter(
+        user_id=user_id,
+        author_id=author_id
+    ).first()
+    if follow is None:
+        # Условие в самом DELETE: подписку могли вернуть, пока шла задача.
+        deleted, _ = TimelineEntry.objects.filter(
+            ~Exists(Follow.objects.filter(
+                user_id=OuterRef('user_id'),
+                author_id=author_id
+            )),
+            user_id=user_id,
+            post__author_id=author_id
+        ).delete()
+        if deleted:
+            # Лента, закешированная до очистки, ещё показывает автора.
+            feed_cache.bump(f'user:{user_id}')
+        return
+    if not follow.timeline_pending:
+        return
+    if not heavy_authors().filter(pk=author_id).exists():
+        backfill(author_id, [user_id])
+    Follow.objects.filter(pk=follow.pk).update(timeline_pending=False)
+
+
+@task
+def backfill_followers(author_id):
+    if heavy_authors().filter(pk=author_id).exists():
+        return
+    backfill(author_id, list(
+        Follow.objects.filter(author_id=author_id).values_list(
+            'user_id', flat=True
+        )
+    ))
+
+
+def rebuild(user_ids):
+    """Заново собирает ленты пользователей по таблице подписок."""
+    TimelineEntry.objects.filter(user_id__in=user_ids).delete()
+    Follow.objects.filter(
+        user_id__in=user_ids,
+        timeline_pending=True
+    ).update(timeline_pending=False)
+    follows = Follow.objects.filter(user_id__in=user_ids).exclude(
+        author_id__in=heavy_authors()
+    ).values_list('user_id', 'author_id')
+    followers = defaultdict(list)
+    for user_id, author_id in follows:
+        followers[author_id].append(user_id)
+    for author_id, follower_ids in followers.items():
+        backfill(author_id, follower_ids)
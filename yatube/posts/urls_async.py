@@ -0,0 +1,26 @@
+"""Маршруты posts с асинхронными лентами (``ASYNC_VIEWS``).
+
+Остальные представления — синхронные из ``urls``; Django сам переводит
+их в поток при работе под ASGI.
+"""
+from django.urls import path
+
+from . import async_views
+from .urls import app_name, urlpatterns as sync_urlpatterns  # noqa: F401
+
+ASYNC_VIEWS = {
+    'index': async_views.index,
+    'group_list': async_views.group_posts,
+    'profile': async_views.profile,
+    'post_detail': async_views.post_detail,
+    'follow_index': async_views.follow_index,
+}
+
+urlpatterns = [
+    path(
+        str(pattern.pattern),
+        ASYNC_VIEWS.get(pattern.name, pattern.callback),
+        name=pattern.name
+    )
+    for pattern in sync_urlpatterns
+]
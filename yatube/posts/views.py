@@ -1,38 +1,186 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.paginator import Page
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import urlencode
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
-from .settings import POSTS_PER_PAGE
+from . import (exporter, feed_cache, groups, popular, search, stats,
+               suggestions, thumbnails, timeline)
+from .forms import CommentForm, FollowManyForm, PostForm
+from .models import Comment, Follow, Group, Post, User
+from .paginators import (KeysetPaginator, RankedPaginator,
+                         requested_number)
+from .settings import COMMENTS_PER_PAGE, FEED_CACHE_TIMEOUT, POSTS_PER_PAGE
 
 
-def paginator_page(request, posts):
-    return Paginator(posts, POSTS_PER_PAGE).get_page(request.GET.get('page'))
+def paginator_page(request, posts, per_page=POSTS_PER_PAGE, **kwargs):
+    return KeysetPaginator(posts, per_page, **kwargs).get_page(
+        request.GET.get('page'),
+        cursor=request.GET.get('cursor')
+    )
+
+
+def posts_page(request, posts, **kwargs):
+    page = paginator_page(request, posts, **kwargs)
+    thumbnails.resolve(page.object_list)
+    return page
+
+
+def feed_page(request, fragment, fetch, *args):
+    """Страница ``fetch(*args)`` для ленты во фрагменте ``{% cache %}``.
+
+    ``fragment`` — имя и ключи фрагмента до номера страницы и курсора.
+    Если фрагмент уже в кеше, шаблон к странице не обращается: вместо
+    выборки постов и поиска миниатюр в контекст идёт ``Page``, чьи посты
+    и паджинатор выбираются только при первом обращении.
+    """
+    number = request.GET.get('page', '')
+    cursor = request.GET.get('cursor', '')
+    if not feed_cache.fragment_cached(*fragment, number, cursor):
+        return fetch(*args)
+    fetched = SimpleLazyObject(lambda: fetch(*args))
+    return Page(
+        SimpleLazyObject(lambda: fetched.object_list),
+        requested_number(number, cursor),
+        SimpleLazyObject(lambda: fetched.paginator)
+    )
+
+
+def follow_page(request, user):
+    """Страница ленты подписок: записи ленты и подмешанные к ним посты."""
+    return posts_page(
+        request,
+        timeline.feed_for(user).for_feed(),
+        keys=timeline.FEED_KEYS,
+        merge=timeline.merged_for(user).for_feed()
+    )
+
+
+def comments_page(request, post_id):
+    return paginator_page(
+        request,
+        Comment.objects.filter(post_id=post_id).for_thread(),
+        COMMENTS_PER_PAGE
+    )
+
+
+def index_scopes():
+    return ['global']
+
+
+def popular_scopes():
+    return ['global', 'popular']
+
+
+def group_scopes(slug):
+    group = groups.by_slug(slug)
+    return None if group is None else [f'group:{group.pk}']
 
 
+def profile_scopes(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    return None if author_id is None else ['groups', f'author:{author_id}']
+
+
+def post_scopes(post_id):
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    return None if author_id is None else [
+        'groups',
+        f'author:{author_id}',
+        f'post:{post_id}',
+    ]
+
+
+@feed_cache.cache_anonymous_page(index_scopes)
 def index(request):
+    version = feed_cache.version_key('global')
     return render(request, 'posts/index.html', {
-        'page_obj': paginator_page(request, Post.objects.all())
+        'page_obj': feed_page(
+            request,
+            ('index_page', version),
+            posts_page, request, Post.objects.for_feed()
+        ),
+        'feed_version': version,
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
+    })
+
+
+def popular_page(request):
+    """Страница рейтинга популярных постов: один IN по id рейтинга."""
+    page = RankedPaginator(
+        popular.ranked_ids(),
+        Post.objects.for_feed(),
+        POSTS_PER_PAGE
+    ).get_page(request.GET.get('page'))
+    thumbnails.resolve(page.object_list)
+    return page
+
+
+@feed_cache.cache_anonymous_page(popular_scopes)
+def popular_posts(request):
+    version = feed_cache.version_key(*popular_scopes())
+    return render(request, 'posts/popular.html', {
+        'page_obj': feed_page(
+            request,
+            ('popular_page', version),
+            popular_page, request
+        ),
+        'feed_version': version,
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
     })
 
 
+def group_page(request, group):
+    """Страница ленты сообщества; первая — по готовому списку id."""
+    head = groups.first_page(group.pk)
+    return posts_page(
+        request,
+        Post.objects.filter(group_id=group.pk).for_feed(),
+        count=head['count'],
+        first_ids=head['ids']
+    )
+
+
+@feed_cache.cache_anonymous_page(group_scopes)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = groups.by_slug(slug)
+    if group is None:
+        raise Http404
+    version = feed_cache.version_key(f'group:{group.pk}')
     return render(request, 'posts/group_list.html', {
         'group': group,
-        'page_obj': paginator_page(request, group.posts.all()),
+        'page_obj': feed_page(
+            request,
+            ('group_page', group.pk, version),
+            group_page, request, group
+        ),
+        'feed_version': version,
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
     })
 
 
+@feed_cache.cache_anonymous_page(profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
+    author_stats = stats.for_user(author)
     return render(request, 'posts/profile.html', {
-        'page_obj': paginator_page(
+        # Счётчик постов автора заменяет COUNT(*) для ссылок на страницы.
+        'page_obj': posts_page(
             request,
-            Post.objects.filter(author__username=username)
+            author.posts.for_feed(),
+            count=author_stats.posts_count
         ),
         'author': author,
+        'stats': author_stats,
         'following': (
             request.user != author
             and request.user.is_authenticated
@@ -44,14 +192,31 @@ def profile(request, username):
     })
 
 
+@feed_cache.cache_anonymous_page(post_scopes)
 def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        id=post_id
+    )
+    thumbnails.resolve([post])
     return render(request, 'posts/post_detail.html', {
-        'post': get_object_or_404(Post, id=post_id),
+        'post': post,
+        'stats': stats.for_user(post.author),
+        'comments': comments_page(request, post_id),
         'form': CommentForm(),
     })
 
 
+def post_comments(request, post_id):
+    """Следующая порция комментариев для кнопки «Показать ещё»."""
+    return render(request, 'posts/includes/comment_list.html', {
+        'post': get_object_or_404(Post.objects.only('id'), id=post_id),
+        'comments': comments_page(request, post_id),
+    })
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
@@ -63,9 +228,10 @@ def post_create(request):
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    if request.user != post.author:
+    if request.user.pk != post.author_id:
         return redirect('posts:post_detail', post_id)
     form = PostForm(
         request.POST or None,
@@ -82,6 +248,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -93,27 +260,94 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id)
 
 
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    return render(request, 'posts/search.html', {
+        'query': query,
+        'page_obj': posts_page(
+            request,
+            search.search(query, Post.objects.for_feed()),
+            keys=('rank', 'id')
+        ),
+        'paginator_query': urlencode({'q': query}) + '&',
+    })
+
+
 @login_required
 def follow_index(request):
+    version = feed_cache.version_key(*timeline.feed_scopes(request.user))
     return render(request, 'posts/follow.html', {
-        'page_obj': paginator_page(
+        'page_obj': feed_page(
             request,
-            Post.objects.filter(author__following__user=request.user)
-        )})
+            ('follow_page', request.user.pk, version),
+            follow_page, request, request.user
+        ),
+        'feed_version': version,
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
+        'suggestions': suggestions.for_user(request.user),
+    })
+
+
+def export_response(request, filename, **filters):
+    format = request.GET.get('format')
+    if format not in exporter.WRITERS:
+        format = 'jsonl'
+    response = StreamingHttpResponse(
+        exporter.export(format, **filters),
+        content_type=exporter.CONTENT_TYPES[format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{format}"'
+    )
+    return response
 
 
 @login_required
-def profile_follow(request, username):
+def profile_export(request, username):
     author = get_object_or_404(User, username=username)
-    if request.user != author and not Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).exists():
-        Follow.objects.create(user=request.user, author=author)
+    if request.user != author and not request.user.is_staff:
+        return redirect('posts:profile', username)
+    return export_response(request, f'yatube-{username}', author=author)
+
+
+@login_required
+def group_export(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    if not request.user.is_staff:
+        return redirect('posts:group_list', slug)
+    return export_response(request, f'yatube-{slug}', group=group)
+
+
+@login_required
+def site_export(request):
+    if not request.user.is_staff:
+        return redirect('posts:index')
+    return export_response(request, 'yatube')
+
+
+@login_required
+@transaction.atomic
+def profile_follow(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    Follow.objects.follow(request.user, [author.pk])
     return redirect('posts:profile', username)
 
 
 @login_required
+@transaction.atomic
+def follow_many(request):
+    """Подписка сразу на нескольких авторов из подсказок."""
+    form = FollowManyForm(request.POST or None)
+    if form.is_valid():
+        Follow.objects.follow(
+            request.user,
+            [author.pk for author in form.cleaned_data['authors']]
+        )
+    return redirect('posts:follow_index')
+
+
+@login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     get_object_or_404(
         Follow,
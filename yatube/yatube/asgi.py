@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+# Под ASGI ленты обслуживают асинхронные представления (posts.async_views).
+os.environ.setdefault('YATUBE_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
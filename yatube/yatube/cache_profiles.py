@@ -0,0 +1,75 @@
+"""Профили кеша для ``CACHES``.
+
+Профиль выбирается переменной окружения ``YATUBE_CACHE``:
+
+* ``file`` (по умолчанию) — общий для процессов кеш в файлах
+  ``BASE_DIR/cache``;
+* ``locmem`` — отдельный кеш в памяти каждого процесса. Годится только
+  для тестов: метки лент, которые ставят воркеры задач, процессы
+  приложения в нём не увидят;
+* ``db`` — общий кеш в таблице основной базы
+  (``python manage.py createcachetable``);
+* ``redis://…`` — Redis через django-redis;
+* ``memcached://host:port`` — Memcached через pymemcache.
+
+Любое общее хранилище подключается алиасом ``shared``, а ``default``
+становится ``core.cache.TieredCache``: LRU процесса на
+``YATUBE_CACHE_LOCAL_ENTRIES`` записей (0 — без него) перед ``shared``
+и счётчики попаданий.
+"""
+import os
+
+DEFAULT_PROFILE = 'file'
+
+# Изменяемые ключи, которые нельзя держать в памяти процесса.
+SHARED_ONLY_PREFIXES = (
+    'feed-version:',
+    'group-by-slug:',
+    'group-page:',
+    'sorl-thumbnail',
+)
+
+
+def shared_store(profile, base_dir):
+    if profile == 'file':
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(base_dir, 'cache'),
+        }
+    if profile == 'db':
+        return {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'yatube_cache',
+        }
+    if profile.startswith(('redis://', 'rediss://')):
+        return {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': profile,
+        }
+    if profile.startswith('memcached://'):
+        return {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': profile[len('memcached://'):],
+        }
+    raise ValueError(f'Неизвестный профиль кеша: {profile}')
+
+
+def caches_for(profile, base_dir, local_entries=1000):
+    """Значение ``CACHES`` для профиля."""
+    if profile == 'locmem':
+        return {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            }
+        }
+    return {
+        'default': {
+            'BACKEND': 'core.cache.TieredCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {
+                'LOCAL_MAX_ENTRIES': local_entries,
+                'SHARED_ONLY_PREFIXES': SHARED_ONLY_PREFIXES,
+            },
+        },
+        'shared': shared_store(profile, base_dir),
+    }
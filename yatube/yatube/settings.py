@@ -1,6 +1,8 @@
 import os.path
 from pathlib import Path
 
+from .cache_profiles import DEFAULT_PROFILE, caches_for
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = ('django-insecure-qkz870%_f#u!13#k7jfb21d2=(0jg5l55=up0)5uo4m84l'
@@ -31,6 +33,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.db.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -38,15 +42,25 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware'
 ]
 
+# Асинхронные ленты (posts.async_views); включаются в yatube.asgi.
+ASYNC_VIEWS = os.environ.get('YATUBE_ASYNC_VIEWS') == '1'
+
+# Независимые запросы асинхронных представлений идут в разных потоках
+# и соединениях (core.aio.parallel); в тестах — в одном.
+ASYNC_PARALLEL_QUERIES = True
+
+if not ASYNC_VIEWS:
+    # Панель отладки работает только синхронно.
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -67,9 +81,65 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    # Локальная заглушка реплики (второй файл SQLite) для разработки и
+    # тестов; в бою — копия основной базы только для чтения.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+    },
+}
+
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+
+# Алиасы реплик, на которые уходит чтение из представлений (core.db).
+DATABASE_REPLICAS = []
+
+REPLICA_PIN_COOKIE = 'pin_primary'
+
+REPLICA_PIN_SECONDS = 5
+
+# Предел SQL-запросов на представление (core.metrics): превышение
+# пишется в лог, а при QUERY_BUDGETS_STRICT — роняет запрос (в тестах).
+QUERY_BUDGETS = {
+    'posts:index': 5,
+    'posts:group_list': 6,
+    'posts:profile': 7,
+    'posts:post_detail': 7,
+    'posts:post_comments': 6,
+    # Холодный кеш: миниатюры из хранилища и задача пересчёта подсказок.
+    'posts:follow_index': 9,
+    'posts:search': 6,
+    'posts:popular': 4,
+    # Запись: сессия, пользователь, SAVEPOINT/RELEASE транзакции (BEGIN
+    # вне тестов), проверки формы, сама запись, счётчики, постановка задач
+    # и пересчёт первой страницы сообщества после фиксации.
+    'posts:post_create': 13,
+    'posts:post_edit': 12,
+    'posts:add_comment': 8,
+    'posts:profile_follow': 10,
+    'posts:profile_unfollow': 11,
+    'posts:follow_many': 10,
 }
 
+QUERY_BUDGETS_STRICT = False
+
+# Тесты (manage.py test и pytest) проверяют бюджеты строго
+# (core.test_runner.TEST_SETTINGS).
+TEST_RUNNER = 'core.test_runner.StrictBudgetRunner'
+
+# Очередь фоновых задач (core.tasks, команда run_workers): пачка на
+# один опрос, аренда задачи воркером и повторы с удвоением паузы.
+TASK_WORKERS = 4
+TASK_BATCH_SIZE = 100
+TASK_POLL_INTERVAL = 1
+TASK_LEASE = 300
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10
+
+# PRAGMA для новых соединений SQLite (core.db.apply_sqlite_pragmas).
+SQLITE_PRAGMAS = {}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': ('django.contrib.auth.password_validation.UserAttributeSimila'
@@ -117,11 +187,13 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
-}
+CACHES = caches_for(
+    os.environ.get('YATUBE_CACHE', DEFAULT_PROFILE),
+    BASE_DIR,
+    local_entries=int(os.environ.get('YATUBE_CACHE_LOCAL_ENTRIES', 1000))
+)
+
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
 
 INTERNAL_IPS = [
     '127.0.0.1',
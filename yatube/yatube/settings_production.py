@@ -0,0 +1,30 @@
+"""Профиль для небольших боевых инстансов на SQLite.
+
+Включается через ``DJANGO_SETTINGS_MODULE=yatube.settings_production``.
+WAL разрешает читать во время записи, ``busy_timeout`` заставляет
+конкурирующих писателей ждать блокировку вместо «database is locked»,
+а постоянные соединения (``CONN_MAX_AGE``) не открывают базу и не
+настраивают PRAGMA на каждый запрос.
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import DATABASES
+
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        'CONN_MAX_AGE': 600,
+        # Ожидание блокировки в модуле sqlite3, в секундах.
+        'OPTIONS': {'timeout': 20},
+    },
+}
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
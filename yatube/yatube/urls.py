@@ -1,14 +1,18 @@
+from core.metrics import metrics_view
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+POSTS_URLS = 'posts.urls_async' if settings.ASYNC_VIEWS else 'posts.urls'
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
-    path('', include('posts.urls', namespace='posts')),
+    path('metrics/', metrics_view, name='metrics'),
+    path('', include(POSTS_URLS, namespace='posts')),
 ]
 handler404 = 'core.views.page_not_found'
 handler500 = 'core.views.server_error'